@@ -0,0 +1,126 @@
+from agent.minimax_agent import PruningAgent
+from chess.board import ChessBoard
+from chess.movement import NO_MOVE, moveToNotation, notationToMove
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, TextIO
+import argparse
+import json
+import os
+import sys
+import time
+
+# A position line is either a FEN, a FEN followed by "moves" and a move list, or a bare move list
+# played from the starting position. Moves are in coordinate notation, e.g. "e2e4 e7e5 g1f3".
+def parsePosition(text: str) -> ChessBoard:
+    fields: list[str] = text.split()
+    moves: list[str] = fields
+    board: ChessBoard = ChessBoard()
+    if len(fields) > 0 and "/" in fields[0]:
+        end: int = fields.index("moves") if "moves" in fields else len(fields)
+        board = ChessBoard.fromFEN(" ".join(fields[:end]))
+        moves = fields[end + 1:]
+    for notation in moves:
+        code: int = notationToMove(notation)
+        if code not in board.getLegalMoveCodes(board.sideToMove):
+            raise ValueError(f"Illegal move {notation}")
+        board.makeMove(code, board.sideToMove)
+    return board
+
+# runs in a worker process, a fresh agent per position keeps the results independent of the order
+# in which positions reach the worker
+def analyzePosition(line: int, text: str, depth: Optional[int], timeLimit: Optional[float],
+                    nodeLimit: Optional[int], tableMegabytes: int) -> dict:
+    start: float = time.perf_counter()
+    try:
+        board: ChessBoard = parsePosition(text)
+    except ValueError as e:
+        return {"line": line, "position": text, "error": str(e)}
+    agent: PruningAgent = PruningAgent(board, board.sideToMove, tableMegabytes=tableMegabytes, timeLimit=timeLimit,
+                                       nodeLimit=nodeLimit, maxDepth=depth)
+    move, score = agent.analyze()
+    seconds: float = time.perf_counter() - start
+    return {"line": line,
+            "position": text,
+            "fen": board.toFEN(),
+            "move": moveToNotation(move) if move != NO_MOVE else None,
+            "score": score,
+            "nodes": agent.getNodeCount(),
+            "seconds": seconds}
+
+# line numbers already written to an earlier output, a line cut short by a crash is dropped
+def finishedLines(path: str) -> set[int]:
+    toRet: set[int] = set()
+    if not os.path.exists(path):
+        return toRet
+    with open(path, "rb+") as file:
+        data: bytes = file.read()
+        end: int = data.rfind(b"\n") + 1
+        if end != len(data):
+            file.truncate(end)
+    for record in data[:end].splitlines():
+        try:
+            toRet.add(json.loads(record)["line"])
+        except (ValueError, KeyError):
+            continue
+    return toRet
+
+# numbered position lines, blank lines and lines starting with # are skipped but still counted
+def readPositions(file: TextIO, skip: set[int]) -> Iterator[tuple[int, str]]:
+    for line, text in enumerate(file, start=1):
+        text = text.strip()
+        if len(text) == 0 or text.startswith("#") or line in skip:
+            continue
+        yield (line, text)
+
+# Results are written as they complete, so the output is not in input order. At most maxInFlight
+# positions are queued at once, which keeps memory flat however large the input is.
+def analyzeFile(inputPath: str, outputPath: str, workers: Optional[int] = None, maxInFlight: Optional[int] = None,
+                depth: Optional[int] = None, timeLimit: Optional[float] = None, nodeLimit: Optional[int] = None,
+                tableMegabytes: int = 16, resume: bool = True) -> int:
+    workers = workers if workers is not None else os.cpu_count() or 1
+    maxInFlight = maxInFlight if maxInFlight is not None else 2 * workers
+    skip: set[int] = finishedLines(outputPath) if resume else set()
+    done: int = 0
+    start: float = time.perf_counter()
+    with open(inputPath) as inputFile, open(outputPath, "a" if resume else "w") as outputFile, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        inFlight: set[Future] = set()
+        positions: Iterator[tuple[int, str]] = readPositions(inputFile, skip)
+        exhausted: bool = False
+        while not exhausted or len(inFlight) > 0:
+            while not exhausted and len(inFlight) < maxInFlight:
+                position: Optional[tuple[int, str]] = next(positions, None)
+                if position is None:
+                    exhausted = True
+                    break
+                inFlight.add(pool.submit(analyzePosition, position[0], position[1], depth, timeLimit, nodeLimit, tableMegabytes))
+            if len(inFlight) == 0:
+                break
+            finished, inFlight = wait(inFlight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                outputFile.write(json.dumps(future.result()) + "\n")
+                done += 1
+            outputFile.flush()
+    seconds: float = time.perf_counter() - start
+    print(f"{done} positions in {seconds:.2f}s, {done / seconds if seconds > 0 else 0.0:.2f} positions/s, "
+          f"{len(skip)} already done", file=sys.stderr)
+    return done
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Search the best move of every position in a file")
+    parser.add_argument("input", help="one FEN or move list per line")
+    parser.add_argument("output", help="JSONL results, appended to and resumed from unless --restart")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--in-flight", type=int, help="most positions queued at once, defaults to twice the workers")
+    parser.add_argument("--depth", type=int, help="search depth, or the deepest iteration with a budget")
+    parser.add_argument("--time", type=float, help="seconds per position")
+    parser.add_argument("--nodes", type=int, help="nodes per position")
+    parser.add_argument("--table", type=int, default=16, help="transposition table megabytes per search")
+    parser.add_argument("--restart", action="store_true", help="overwrite the output instead of resuming")
+    args = parser.parse_args(argv)
+    analyzeFile(args.input, args.output, workers=args.workers, maxInFlight=args.in_flight, depth=args.depth,
+                timeLimit=args.time, nodeLimit=args.nodes, tableMegabytes=args.table, resume=not args.restart)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+from agent.scorer import BoardScorer
+from chess.board import ChessBoard, MATERIAL_VALUES
+from chess.pieces import ChessPiece, PieceColor, PieceType
+from chess.movement import Move, NO_MOVE
+from typing import Optional, Union
+
+# numpy is only needed for batch scoring, the rest of the engine runs without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PAWN_VALUE: int = 100
+
+# centipawn bonuses for white, indexed by type.value and written from a8 to h8 down to a1 to h1
+# so that they read like a board; black uses them mirrored
+_PIECE_SQUARE_ROWS: list[list[int]] = [
+    # pawn
+    [  0,   0,   0,   0,   0,   0,   0,   0,
+      50,  50,  50,  50,  50,  50,  50,  50,
+      10,  10,  20,  30,  30,  20,  10,  10,
+       5,   5,  10,  25,  25,  10,   5,   5,
+       0,   0,   0,  20,  20,   0,   0,   0,
+       5,  -5, -10,   0,   0, -10,  -5,   5,
+       5,  10,  10, -20, -20,  10,  10,   5,
+       0,   0,   0,   0,   0,   0,   0,   0],
+    # rook
+    [  0,   0,   0,   0,   0,   0,   0,   0,
+       5,  10,  10,  10,  10,  10,  10,   5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+       0,   0,   0,   5,   5,   0,   0,   0],
+    # knight
+    [-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20,   0,   0,   0,   0, -20, -40,
+     -30,   0,  10,  15,  15,  10,   0, -30,
+     -30,   5,  15,  20,  20,  15,   5, -30,
+     -30,   0,  15,  20,  20,  15,   0, -30,
+     -30,   5,  10,  15,  15,  10,   5, -30,
+     -40, -20,   0,   5,   5,   0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50],
+    # bishop
+    [-20, -10, -10, -10, -10, -10, -10, -20,
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,  10,  10,   5,   0, -10,
+     -10,   5,   5,  10,  10,   5,   5, -10,
+     -10,   0,  10,  10,  10,  10,   0, -10,
+     -10,  10,  10,  10,  10,  10,  10, -10,
+     -10,   5,   0,   0,   0,   0,   5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20],
+    # queen
+    [-20, -10, -10,  -5,  -5, -10, -10, -20,
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,   5,   5,   5,   0, -10,
+      -5,   0,   5,   5,   5,   5,   0,  -5,
+       0,   0,   5,   5,   5,   5,   0,  -5,
+     -10,   5,   5,   5,   5,   5,   0, -10,
+     -10,   0,   5,   0,   0,   0,   0, -10,
+     -20, -10, -10,  -5,  -5, -10, -10, -20],
+    # king
+    [-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+      20,  20,   0,   0,   0,   0,  20,  20,
+      20,  30,  10,   0,   0,  10,  30,  20],
+]
+# the same tables indexed by square, a1 = 0
+PIECE_SQUARE_TABLES: list[list[int]] = [[rows[sq ^ 56] for sq in range(64)] for rows in _PIECE_SQUARE_ROWS]
+
+# N x 12 x 64 array of 0/1, the 12 planes in bitboard order (color.value * 6 + type.value),
+# from a flat list of 12 bitboards per position
+def encodeBitboards(bitboards: list[int]) -> "np.ndarray":
+    words: np.ndarray = np.array(bitboards, dtype="<u8")
+    return np.unpackbits(words.view(np.uint8), bitorder="little").reshape(-1, 12, 64)
+
+def encodePositions(boards: list[ChessBoard]) -> "np.ndarray":
+    bitboards: list[int] = []
+    for board in boards:
+        bitboards.extend(board._pieceBB)
+    return encodeBitboards(bitboards)
+
+# Material plus piece-square evaluation from white's point of view, computed for a whole batch of
+# encoded positions with one tensor product against a 12 x 64 weight array. Scores are in
+# centipawns by default; pawnValue sets the worth of a pawn, and the tables are in the same unit.
+class BatchScorer(BoardScorer):
+    def __init__(self, pieceSquareTables: Optional[list[list[int]]] = None, pawnValue: int = PAWN_VALUE):
+        super().__init__()
+        if np is None:
+            raise ImportError("BatchScorer needs numpy")
+        self.pawnValue: int = pawnValue
+        tables: list[list[int]] = pieceSquareTables if pieceSquareTables is not None else PIECE_SQUARE_TABLES
+        self._weights: np.ndarray = np.zeros((12, 64), dtype=np.int32)
+        for pieceType in range(6):
+            for sq in range(64):
+                value: int = MATERIAL_VALUES[pieceType] * pawnValue + tables[pieceType][sq]
+                self._weights[pieceType][sq] = value
+                self._weights[6 + pieceType][sq ^ 56] = -value
+
+    def scoreBatch(self, positions: "np.ndarray") -> "np.ndarray":
+        return np.tensordot(positions.astype(np.int32), self._weights, axes=([1, 2], [0, 1]))
+
+    # one position at a time, only worth it outside of hot loops
+    def score(self, board: ChessBoard, _: PieceColor) -> int:
+        return int(self.scoreBatch(encodePositions([board]))[0])
+
+    # material alone in pawns, the scores of PruningScorer
+    @staticmethod
+    def material() -> "BatchScorer":
+        return BatchScorer([[0] * 64 for _ in range(6)], pawnValue=1)
+
+# gathers the bitboards of leaf positions during a search so they can be scored in one batch
+class LeafCollector():
+    def __init__(self):
+        self._bitboards: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._bitboards) // 12
+
+    # returns the index of the leaf in the batch
+    def add(self, board: ChessBoard) -> int:
+        self._bitboards.extend(board._pieceBB)
+        return len(self._bitboards) // 12 - 1
+
+    # The position after a legal move of the side to move, read off the bitboards of the board without
+    # playing the move, which costs about as much as scoring the position on its own would.
+    def addChild(self, board: ChessBoard, move: int) -> int:
+        src: int = move & 63
+        dst: int = (move >> 6) & 63
+        piece: ChessPiece = board._board[src]
+        base: int = piece._color.value * 6
+        bitboards: list[int] = board._pieceBB.copy()
+        bitboards[base + piece._type.value] ^= 1 << src
+        promotion: int = move >> 12
+        bitboards[base + (promotion if promotion != 0 else piece._type.value)] ^= 1 << dst
+        victim: Optional[ChessPiece] = board._board[dst]
+        if victim is not None:
+            bitboards[victim._color.value * 6 + victim._type.value] ^= 1 << dst
+        elif piece._type == PieceType.PAWN and (dst - src) % 8 != 0:
+            # en passant, the taken pawn stands behind the target square
+            taken: int = dst - 8 if piece._color == PieceColor.WHITE else dst + 8
+            bitboards[6 - base + PieceType.PAWN.value] ^= 1 << taken
+        elif piece._type == PieceType.KING and abs(dst - src) == 2:
+            rookSquares: int = (1 << (src + 3)) | (1 << (src + 1)) if dst > src else (1 << (src - 4)) | (1 << (src - 1))
+            bitboards[base + PieceType.ROOK.value] ^= rookSquares
+        self._bitboards.extend(bitboards)
+        return len(self._bitboards) // 12 - 1
+
+    def clear(self) -> None:
+        self._bitboards = []
+
+    def positions(self) -> "np.ndarray":
+        return encodeBitboards(self._bitboards)
+
+# a searched node is either the index of its leaf or the side to move with its (move, child) pairs
+_FrontierNode = Union[int, tuple[PieceColor, list[tuple[int, "_FrontierNode"]]]]
+
+def _expand(board: ChessBoard, depth: int, currentTeam: PieceColor, collector: LeafCollector) -> _FrontierNode:
+    opponentColor: PieceColor = PieceColor.WHITE if currentTeam == PieceColor.BLACK else PieceColor.BLACK
+    myMove: list[int] = board.getLegalMoveCodes(currentTeam)
+    if depth <= 0 or len(myMove) == 0 or len(board.getLegalMoveCodes(opponentColor)) == 0:
+        return collector.add(board)
+    children: list[tuple[int, _FrontierNode]] = []
+    for move in myMove:
+        curMove: Move = board.makeMove(move, currentTeam)
+        children.append((move, _expand(board, depth - 1, opponentColor, collector)))
+        board.unMove(curMove)
+    return (currentTeam, children)
+
+def _backUp(node: _FrontierNode, scores: "np.ndarray") -> tuple[int, int]:
+    if isinstance(node, int):
+        return (NO_MOVE, int(scores[node]))
+    currentTeam, children = node
+    toRet: Optional[tuple[int, int]] = None
+    for move, child in children:
+        childScore: int = _backUp(child, scores)[1]
+        if toRet is None or (childScore > toRet[1] if currentTeam == PieceColor.WHITE else childScore < toRet[1]):
+            toRet = (move, childScore)
+    return toRet
+
+# Full-width minimax to a fixed depth in three passes: expand the tree and collect its frontier,
+# score every leaf in one batch, then back the scores up. There is no pruning since no score is
+# known while expanding, so this pays off for shallow searches with an expensive evaluation.
+def frontierSearch(board: ChessBoard, depth: int, scorer: BatchScorer) -> tuple[int, int]:
+    collector: LeafCollector = LeafCollector()
+    tree: _FrontierNode = _expand(board.clone(), depth, board.sideToMove, collector)
+    return _backUp(tree, scorer.scoreBatch(collector.positions()))
@@ -0,0 +1,253 @@
+from agent.minimax_agent import PruningAgent
+from chess.board import ChessBoard
+from chess.chessgame import gameResult
+from chess.movement import NO_MOVE, moveToNotation, notationToMove
+from chess.pieces import PieceColor, PieceType
+from chess.snapshot import PositionSnapshot
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+# Line protocol, one command per line from the client and one reply per line from the server:
+#   newgame white|black [movetime S] [nodes N] [depth D] [gametime S] [fen FEN]
+#                     the client plays the given color, the engine the other one -> game ID,
+#                     or busy when the engine would have to move first
+#   move MOVE         a move in coordinate notation, a missing promotion letter means a queen
+#                     -> illegal MOVE, busy, or the engine's answer
+#   fen               -> fen FEN
+#   isready           -> readyok
+#   quit
+# The engine answers each move with "info nodes N time MS score S" and "bestmove MOVE", scores
+# from white's point of view. Once a game ends the server sends "result 1-0|0-1|1/2-1/2 REASON".
+# Anything it does not understand gets "error TEXT".
+
+# Runs in a pool worker, a fresh agent per search keeps the searches of different games apart.
+# Returns the move, the score, the nodes and the seconds spent.
+def searchMove(snapshot: PositionSnapshot, timeLimit: Optional[float], nodeLimit: Optional[int],
+               depth: Optional[int], tableMegabytes: int) -> tuple[int, int, int, float]:
+    start: float = time.perf_counter()
+    board: ChessBoard = ChessBoard.fromSnapshot(snapshot)
+    agent: PruningAgent = PruningAgent(board, board.sideToMove, tableMegabytes=tableMegabytes, timeLimit=timeLimit,
+                                       nodeLimit=nodeLimit, maxDepth=depth)
+    move, score = agent.analyze()
+    return (move, score, agent.getNodeCount(), time.perf_counter() - start)
+
+class GameSession():
+    # left of the game time, a move gets at most this share
+    MOVES_TO_GO: int = 20
+    MIN_MOVE_TIME: float = 0.05
+
+    def __init__(self, gameId: int, board: ChessBoard, engineColor: PieceColor, moveTime: Optional[float],
+                 nodeLimit: Optional[int], depth: Optional[int], gameTime: Optional[float]):
+        self.gameId: int = gameId
+        self.board: ChessBoard = board
+        self.engineColor: PieceColor = engineColor
+        self.moveTime: Optional[float] = moveTime
+        self.nodeLimit: Optional[int] = nodeLimit
+        self.depth: Optional[int] = depth
+        # seconds of search the engine has left for the whole game, None without a game budget
+        self.timeLeft: Optional[float] = gameTime
+        self.repetitions: dict[int, int] = {board.zobristKey: 1}
+        self.result: Optional[tuple[str, str]] = None
+
+    def play(self, code: int) -> None:
+        self.board.makeMove(code, self.board.sideToMove)
+        key: int = self.board.zobristKey
+        self.repetitions[key] = self.repetitions.get(key, 0) + 1
+        self.result = gameResult(self.board, self.repetitions[key])
+
+    # the time limit of the next search, from the move time and what is left of the game time
+    def searchTime(self) -> Optional[float]:
+        toRet: Optional[float] = self.moveTime
+        if self.timeLeft is not None:
+            share: float = max(GameSession.MIN_MOVE_TIME, self.timeLeft / GameSession.MOVES_TO_GO)
+            toRet = share if toRet is None else min(toRet, share)
+        return toRet
+
+# Hosts any number of games over asyncio streams and sends every engine search to one process pool.
+# At most one search per worker runs at a time and the rest wait their turn on the event loop, their
+# time limit only starts once they reach a worker. With maxPending searches running or waiting a
+# client move, or a new game the engine would open, is refused with "busy" before it is played, and
+# past maxGames new connections are turned away.
+class GameServer():
+    def __init__(self, workers: Optional[int] = None, maxGames: int = 256, maxPending: Optional[int] = None,
+                 moveTime: Optional[float] = 1.0, tableMegabytes: int = 4):
+        self._workers: int = workers if workers is not None else os.cpu_count() or 1
+        self._maxGames: int = maxGames
+        self._maxPending: int = maxPending if maxPending is not None else 4 * self._workers
+        self._moveTime: Optional[float] = moveTime
+        self._tableMegabytes: int = tableMegabytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._searchSlots: Optional[asyncio.Semaphore] = None
+        self._pending: int = 0
+        self._games: int = 0
+        self._nextGameId: int = 1
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 5555, unixPath: Optional[str] = None) -> None:
+        self._searchSlots = asyncio.Semaphore(self._workers)
+        # Workers start on the first search, a forked one would inherit the listening and client sockets
+        # and keep every connection it saw open after the server closes it. The fork server starts
+        # them from a clean process instead.
+        with ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            self._pool = pool
+            if unixPath is not None:
+                server: asyncio.AbstractServer = await asyncio.start_unix_server(self._handle, unixPath)
+            else:
+                server: asyncio.AbstractServer = await asyncio.start_server(self._handle, host, port)
+            async with server:
+                await server.serve_forever()
+
+    async def _send(self, writer: asyncio.StreamWriter, line: str) -> None:
+        writer.write((line + "\n").encode())
+        # a client that does not read its replies holds up its own session only
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self._games >= self._maxGames:
+            await self._send(writer, "error server full")
+            writer.close()
+            return
+        self._games += 1
+        session: Optional[GameSession] = None
+        try:
+            while True:
+                raw: bytes = await reader.readline()
+                if len(raw) == 0:
+                    break
+                fields: list[str] = raw.decode(errors="replace").split()
+                if len(fields) == 0:
+                    continue
+                command: str = fields[0]
+                if command == "quit":
+                    break
+                elif command == "isready":
+                    await self._send(writer, "readyok")
+                elif command == "newgame":
+                    try:
+                        started: GameSession = self._newGame(fields[1:])
+                    except ValueError as e:
+                        await self._send(writer, f"error {e}")
+                        continue
+                    engineFirst: bool = started.board.sideToMove == started.engineColor and started.result is None
+                    if engineFirst and self._pending >= self._maxPending:
+                        await self._send(writer, "busy")
+                        continue
+                    session = started
+                    await self._send(writer, f"game {session.gameId}")
+                    if engineFirst:
+                        await self._engineMove(session, writer)
+                elif session is None:
+                    await self._send(writer, "error no game, send newgame first")
+                elif command == "fen":
+                    await self._send(writer, f"fen {session.board.toFEN()}")
+                elif command == "move" and len(fields) == 2:
+                    await self._playerMove(session, fields[1], writer)
+                else:
+                    await self._send(writer, f"error unknown command {command}")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._games -= 1
+            writer.close()
+
+    def _newGame(self, fields: list[str]) -> GameSession:
+        if len(fields) == 0 or fields[0] not in ("white", "black"):
+            raise ValueError("newgame needs white or black")
+        engineColor: PieceColor = PieceColor.BLACK if fields[0] == "white" else PieceColor.WHITE
+        settings: dict[str, str] = {}
+        board: ChessBoard = ChessBoard()
+        idx: int = 1
+        while idx < len(fields):
+            if fields[idx] == "fen":
+                board = ChessBoard.fromFEN(" ".join(fields[idx + 1:]))
+                break
+            if fields[idx] not in ("movetime", "nodes", "depth", "gametime") or idx + 1 >= len(fields):
+                raise ValueError(f"bad newgame option {fields[idx]}")
+            settings[fields[idx]] = fields[idx + 1]
+            idx += 2
+        session: GameSession = GameSession(self._nextGameId, board, engineColor,
+                                           float(settings["movetime"]) if "movetime" in settings else self._moveTime,
+                                           int(settings["nodes"]) if "nodes" in settings else None,
+                                           int(settings["depth"]) if "depth" in settings else None,
+                                           float(settings["gametime"]) if "gametime" in settings else None)
+        session.result = gameResult(board)
+        self._nextGameId += 1
+        return session
+
+    async def _playerMove(self, session: GameSession, notation: str, writer: asyncio.StreamWriter) -> None:
+        if session.result is not None:
+            await self._send(writer, f"result {session.result[0]} {session.result[1]}")
+            return
+        if session.board.sideToMove == session.engineColor:
+            await self._send(writer, "error not your move")
+            return
+        legalMoves: list[int] = session.board.getLegalMoveCodes(session.board.sideToMove)
+        try:
+            code: int = notationToMove(notation)
+        except ValueError:
+            code = NO_MOVE
+        if code >> 12 == 0 and code | (PieceType.QUEEN.value << 12) in legalMoves:
+            code |= PieceType.QUEEN.value << 12
+        if code not in legalMoves:
+            await self._send(writer, f"illegal {notation}")
+            return
+        if self._pending >= self._maxPending:
+            await self._send(writer, "busy")
+            return
+        session.play(code)
+        if session.result is not None:
+            await self._send(writer, f"result {session.result[0]} {session.result[1]}")
+            return
+        await self._engineMove(session, writer)
+
+    async def _engineMove(self, session: GameSession, writer: asyncio.StreamWriter) -> None:
+        self._pending += 1
+        try:
+            async with self._searchSlots:
+                timeLimit: Optional[float] = session.searchTime()
+                move, score, nodes, seconds = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, searchMove, session.board.snapshot(), timeLimit, session.nodeLimit, session.depth,
+                    self._tableMegabytes)
+        finally:
+            self._pending -= 1
+        if session.timeLeft is not None:
+            session.timeLeft = max(0.0, session.timeLeft - seconds)
+        legalMoves: list[int] = session.board.getLegalMoveCodes(session.board.sideToMove)
+        if len(legalMoves) == 0:
+            await self._send(writer, "error the engine has no move")
+            return
+        if move not in legalMoves:
+            # whatever the search came back with, the session board only ever gets legal moves
+            move = legalMoves[0]
+        await self._send(writer, f"info nodes {nodes} time {int(seconds * 1000)} score {score}")
+        await self._send(writer, f"bestmove {moveToNotation(move)}")
+        session.play(move)
+        if session.result is not None:
+            await self._send(writer, f"result {session.result[0]} {session.result[1]}")
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Serve games against the engine over a line protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--unix", help="listen on this unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="search processes, defaults to the CPU count")
+    parser.add_argument("--max-games", type=int, default=256, help="most connections served at once")
+    parser.add_argument("--max-pending", type=int, help="most searches waiting for a worker, defaults to four per worker")
+    parser.add_argument("--movetime", type=float, default=1.0, help="default seconds per engine move")
+    parser.add_argument("--table", type=int, default=4, help="transposition table megabytes per search")
+    args = parser.parse_args(argv)
+    server: GameServer = GameServer(workers=args.workers, maxGames=args.max_games, maxPending=args.max_pending,
+                                    moveTime=args.movetime, tableMegabytes=args.table)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,38 +1,67 @@
 from agent.abstract_agent import Agent
 from agent.scorer import BoardScorer, PruningScorer, SimpleScorer
-from chess.pieces import PieceColor
+from agent.transposition import Bound, TranspositionEntry, TranspositionTable
+from agent.search_budget import MAX_SEARCH_DEPTH, SearchBudget, iterativeDeepening
+from agent.move_ordering import MoveOrderer
+from agent.opening_book import OpeningBook
+from agent.search_stats import SearchStats
+from agent.batch_scorer import BatchScorer, LeafCollector
+from chess.pieces import ChessPiece, PieceColor, PieceType
 from chess.board import ChessBoard
-from chess.utils import chessNotationToIdx
-from chess.movement import Move
+from chess.tablebase import Tablebase, distance, isLoss, isWin
+from chess.movement import Move, NO_MOVE, moveToNotation
+from typing import Callable, Optional
 import sys
 
+# Without a time or node limit the agents search a fixed depth, otherwise they deepen
+# iteratively until the budget runs out, up to maxDepth when it is given.
+# stats collects counters and timings of every search into the given SearchStats, off by default.
 class MinimaxAgent(Agent):
-    def __init__(self, board: ChessBoard, team: PieceColor):
+    def __init__(self, board: ChessBoard, team: PieceColor, timeLimit: Optional[float] = None,
+                 nodeLimit: Optional[int] = None, maxDepth: Optional[int] = None, stats: Optional[SearchStats] = None):
         super().__init__(team)
         self._board = board
         self._scorer = SimpleScorer()
         self.__MINIMAXDEPTH = 2
+        self._budget: SearchBudget = SearchBudget(timeLimit, nodeLimit)
+        if maxDepth is None:
+            maxDepth = MAX_SEARCH_DEPTH if self._budget.isLimited() else self.__MINIMAXDEPTH
+        self._maxDepth: int = maxDepth
+        self._stats: Optional[SearchStats] = stats
+        self._rootMoveNumber: int = 0
     
     def getMove(self) -> str:
         clonedBoard: ChessBoard = self._board.clone()
-        return self.minimax(clonedBoard, self.__MINIMAXDEPTH, self._team)[0]
+        self._rootMoveNumber = clonedBoard.curNumOfMove
+        search = lambda depth: self.minimax(clonedBoard, depth, self._team)
+        if self._stats is not None:
+            return moveToNotation(self._stats.deepen(search, clonedBoard, self._scorer, self._budget, None,
+                                                     clonedBoard.curNumOfMove, self._maxDepth)[0])
+        return moveToNotation(iterativeDeepening(search, self._budget, self._maxDepth)[0])
+    
+    def getStats(self) -> Optional[SearchStats]:
+        return self._stats
+    
+    # nodes visited by the last getMove, over all iterations
+    def getNodeCount(self) -> int:
+        return self._budget.nodes
     
     def getPawnPromotion(self) -> str:
         # :)
         return "q"
     
-    def minimax(self, board: ChessBoard, depth: int, currentTeam: PieceColor) -> tuple[str, int]:
+    def minimax(self, board: ChessBoard, depth: int, currentTeam: PieceColor) -> tuple[int, int]:
+        self._budget.tick()
         opponentColor: PieceColor = PieceColor.WHITE if currentTeam == PieceColor.BLACK else PieceColor.BLACK
-        myMove: set[str] = board.getLegalMoves(currentTeam)
-        if depth <= 0 or len(myMove) == 0 or len(board.getLegalMoves(opponentColor)) == 0:
-            return ("", self._scorer.score(board, currentTeam))
-        toRet: tuple[str, int]
+        myMove: list[int] = board.getLegalMoveCodes(currentTeam)
+        # the root always searches its own moves, it has to come back with one
+        isRoot: bool = board.curNumOfMove == self._rootMoveNumber
+        if depth <= 0 or len(myMove) == 0 or (not isRoot and len(board.getLegalMoveCodes(opponentColor)) == 0):
+            return (NO_MOVE, self._scorer.score(board, currentTeam))
+        toRet: tuple[int, int]
         minVal: int = sys.maxsize
         for move in myMove:
-            src: int = chessNotationToIdx(move[:2])
-            dst: int = chessNotationToIdx(move[2:])
-            curMove: Move = Move(src, dst, currentTeam)
-            board.move(curMove)
+            curMove: Move = board.makeMove(move, currentTeam)
             oppMax: int = self.minimax(board, depth - 1, opponentColor)[1]
             if oppMax < minVal:
                 minVal = oppMax
@@ -43,33 +72,149 @@ class MinimaxAgent(Agent):
 #WHITE -> maximizer
 #BLACK -> minimizer
 class PruningAgent(Agent):
-    def __init__(self, board: ChessBoard, team: PieceColor):
+    # slack in material for delta pruning in the quiescence search
+    DELTA_MARGIN: int = 2
+    TABLEBASE_WIN: int = 1000
+
+    # tableMegabytes caps the transposition table memory, 0 disables it
+    # moveOrdering=False searches moves in generation order, to compare node counts against
+    # quiescence=False scores depth 0 directly instead of resolving the captures first
+    # book and tablebase are looked up before every search, positions in them are answered without searching
+    # stats collects counters and timings of every search into the given SearchStats, off by default
+    # batchScorer replaces the scorer, and the nodes one ply above the leaves and in the quiescence
+    # search score their children with it in one batch, batchLeaves=False scores them one at a time
+    # instead, to compare against. The margins of the search are in pawns and get scaled to the unit
+    # of its scores.
+    def __init__(self, board: ChessBoard, team: PieceColor, tableMegabytes: int = 16, timeLimit: Optional[float] = None,
+                 nodeLimit: Optional[int] = None, maxDepth: Optional[int] = None, moveOrdering: bool = True,
+                 quiescence: bool = True, book: Optional[OpeningBook] = None, tablebase: Optional[Tablebase] = None,
+                 stats: Optional[SearchStats] = None, batchScorer: Optional[BatchScorer] = None, batchLeaves: bool = True):
         super().__init__(team)
         self._board = board
-        self._scorer = PruningScorer()
+        self._batchScorer: Optional[BatchScorer] = batchScorer if batchLeaves else None
+        self._scorer = batchScorer if batchScorer is not None else PruningScorer()
+        self._pawnValue: int = self._scorer.pawnValue
         self.__MINIMAXDEPTH = 3
+        self._table: Optional[TranspositionTable] = TranspositionTable(tableMegabytes * 1024 * 1024) if tableMegabytes > 0 else None
+        self._budget: SearchBudget = SearchBudget(timeLimit, nodeLimit)
+        if maxDepth is None:
+            maxDepth = MAX_SEARCH_DEPTH if self._budget.isLimited() else self.__MINIMAXDEPTH
+        self._maxDepth: int = maxDepth
+        self._orderer: Optional[MoveOrderer] = MoveOrderer() if moveOrdering else None
+        self._rootMoveNumber: int = 0
+        self._quiescence: bool = quiescence
+        self._book: Optional[OpeningBook] = book
+        self._tablebase: Optional[Tablebase] = tablebase
+        self._stats: Optional[SearchStats] = stats
+        # captures are always tried most valuable victim first, unordered quiescence searches explode
+        self._captureOrderer: MoveOrderer = self._orderer if self._orderer is not None else MoveOrderer()
     
     def getMove(self) -> str:
+        return moveToNotation(self.analyze()[0])
+    
+    # best move code and its score, from white's point of view
+    def analyze(self) -> tuple[int, int]:
+        known: Optional[tuple[int, int]] = self._knownMove()
+        if known is not None:
+            return known
         clonedBoard: ChessBoard = self._board.clone()
-        return self.pruning(clonedBoard, self.__MINIMAXDEPTH, self._team, None, None)[0]
+        if self._table is not None:
+            self._table.newSearch()
+        if self._orderer is not None:
+            self._orderer.newSearch()
+        self._rootMoveNumber = clonedBoard.curNumOfMove
+        return self._deepen(lambda depth: self.pruning(clonedBoard, depth, self._team, None, None), clonedBoard)
+    
+    def _deepen(self, search: Callable[[int], tuple[int, int]], board: ChessBoard) -> tuple[int, int]:
+        if self._stats is not None:
+            return self._stats.deepen(search, board, self._scorer, self._budget, self._table, self._rootMoveNumber, self._maxDepth)
+        return iterativeDeepening(search, self._budget, self._maxDepth)
+    
+    # the book move or the tablebase move of the current position with its score, None when a search is needed
+    def _knownMove(self) -> Optional[tuple[int, int]]:
+        toRet: Optional[tuple[int, int]] = None
+        if self._book is not None:
+            move: int = self._book.choose(self._board)
+            if move != NO_MOVE:
+                toRet = (move, self._scorer.score(self._board, self._team))
+        if toRet is None and self._tablebase is not None and self._tablebase.covers(self._board):
+            move, value = self._tablebase.bestMove(self._board.clone())
+            if move != NO_MOVE:
+                # mates come out above any material score, the quicker the higher
+                score: int = 0
+                if isWin(value):
+                    score = PruningAgent.TABLEBASE_WIN - distance(value)
+                elif isLoss(value):
+                    score = distance(value) - PruningAgent.TABLEBASE_WIN
+                score *= self._pawnValue
+                toRet = (move, score if self._team == PieceColor.WHITE else -score)
+        if toRet is not None:
+            self._budget.start()
+        return toRet
+    
+    def getTranspositionTable(self) -> Optional[TranspositionTable]:
+        return self._table
+    
+    def getStats(self) -> Optional[SearchStats]:
+        return self._stats
+    
+    # nodes visited by the last getMove, over all iterations
+    def getNodeCount(self) -> int:
+        return self._budget.nodes
     
     def getPawnPromotion(self) -> str:
         # :)
         return "q"
     
-    def pruning(self, board: ChessBoard, depth: int, currentTeam: PieceColor, alpha: int, beta: int) -> tuple[str, int]:
+    # staticScore is the score of the position when its parent already scored it in a batch
+    def pruning(self, board: ChessBoard, depth: int, currentTeam: PieceColor, alpha: int, beta: int,
+                staticScore: Optional[int] = None) -> tuple[int, int]:
+        self._budget.tick()
+        key: int = board.zobristKey
+        alphaOrig: int = alpha
+        betaOrig: int = beta
+        ply: int = board.curNumOfMove - self._rootMoveNumber
+        hashMove: int = NO_MOVE
+        if self._table is not None:
+            entry: Optional[TranspositionEntry] = self._table.probe(key)
+            if entry is not None:
+                hashMove = entry.bestMove
+            # the root always searches, it has to come back with a move
+            if entry is not None and entry.depth >= depth and ply > 0:
+                if entry.bound == Bound.EXACT:
+                    return (entry.bestMove, entry.score)
+                if entry.bound == Bound.LOWER:
+                    alpha = entry.score if alpha is None else max(alpha, entry.score)
+                else:
+                    beta = entry.score if beta is None else min(beta, entry.score)
+                if alpha is not None and beta is not None and beta <= alpha:
+                    return (entry.bestMove, entry.score)
         opponentColor: PieceColor = PieceColor.WHITE if currentTeam == PieceColor.BLACK else PieceColor.BLACK
-        myMove: set[str] = board.getLegalMoves(currentTeam)
-        if depth <= 0 or len(myMove) == 0 or len(board.getLegalMoves(opponentColor)) == 0:
-            return ("", self._scorer.score(board, currentTeam))
-        toRet: tuple[str, int]
+        myMove: list[int] = board.getLegalMoveCodes(currentTeam)
+        if (len(myMove) == 0 or (ply > 0 and len(board.getLegalMoveCodes(opponentColor)) == 0)
+            or (depth <= 0 and not self._quiescence)):
+            leafScore: int = self._scorer.score(board, currentTeam) if staticScore is None else staticScore
+            if self._table is not None:
+                self._table.store(key, depth, leafScore, Bound.EXACT, NO_MOVE)
+            return (NO_MOVE, leafScore)
+        if depth <= 0:
+            leafScore: int = self.quiescence(board, currentTeam, alpha, beta, staticScore)
+            if self._table is not None:
+                self._table.store(key, depth, leafScore, self._bound(leafScore, alphaOrig, betaOrig), NO_MOVE)
+            return (NO_MOVE, leafScore)
+        toRet: tuple[int, int]
         curScore: int = None
-        for move in myMove:
-            src: int = chessNotationToIdx(move[:2])
-            dst: int = chessNotationToIdx(move[2:])
-            curMove: Move = Move(src, dst, currentTeam)
-            board.move(curMove)
-            childScore: int = self.pruning(board, depth - 1, opponentColor, alpha, beta)[1]
+        if self._orderer is not None:
+            myMove = self._orderer.order(board, myMove, currentTeam, ply, hashMove)
+        if self._stats is not None:
+            self._stats.interiorNodes += 1
+        childScores: Optional[list[int]] = None
+        for i, move in enumerate(myMove):
+            if i == 1 and depth == 1:
+                childScores = self._scoreChildren(board, myMove[1:])
+            curMove: Move = board.makeMove(move, currentTeam)
+            childScore: int = self.pruning(board, depth - 1, opponentColor, alpha, beta,
+                                           childScores[i - 1] if childScores is not None else None)[1]
             board.unMove(curMove)
             if currentTeam == PieceColor.WHITE: #Maximizer
                 if curScore == None:
@@ -83,6 +228,10 @@ class PruningAgent(Agent):
                 else:
                     alpha = max(alpha, curScore)
                 if beta is not None and beta <= alpha:
+                    if self._orderer is not None:
+                        self._orderer.recordCutoff(board, move, currentTeam, ply, depth)
+                    if self._stats is not None:
+                        self._stats.recordCutoff(i == 0)
                     break
 
             else: #Minimizer
@@ -96,7 +245,232 @@ class PruningAgent(Agent):
                     beta = curScore
                 else:
                     beta = min(beta, curScore)
+                if alpha is not None and beta <= alpha:
+                    if self._orderer is not None:
+                        self._orderer.recordCutoff(board, move, currentTeam, ply, depth)
+                    if self._stats is not None:
+                        self._stats.recordCutoff(i == 0)
+                    break
+
+        if self._table is not None:
+            self._table.store(key, depth, curScore, self._bound(curScore, alphaOrig, betaOrig), toRet[0])
+        return toRet
+    
+    # The scores of the positions after each move, from white's point of view, in one batch. The nodes
+    # one ply above the leaves and the quiescence nodes call it once their first move failed to cut
+    # off, most nodes that get there search all of their moves. None without a batch scorer.
+    def _scoreChildren(self, board: ChessBoard, moves: list[int]) -> Optional[list[int]]:
+        if self._batchScorer is None:
+            return None
+        collector: LeafCollector = LeafCollector()
+        for move in moves:
+            collector.addChild(board, move)
+        return self._batchScorer.scoreBatch(collector.positions()).tolist()
+    
+    # what a score found inside the window (alpha, beta) tells about the true score
+    def _bound(self, score: int, alpha: int, beta: int) -> Bound:
+        if alpha is not None and score <= alpha:
+            return Bound.UPPER
+        if beta is not None and score >= beta:
+            return Bound.LOWER
+        return Bound.EXACT
+    
+    # Only captures and promotions are searched until the position is quiet. The side to move can
+    # always stand pat on the static score, and a capture is skipped when even winning the piece
+    # plus DELTA_MARGIN could not bring the score back inside the window.
+    def quiescence(self, board: ChessBoard, currentTeam: PieceColor, alpha: int, beta: int,
+                   staticScore: Optional[int] = None) -> int:
+        self._budget.tick()
+        standPat: int = self._scorer.score(board, currentTeam) if staticScore is None else staticScore
+        if currentTeam == PieceColor.WHITE:
+            if beta is not None and standPat >= beta:
+                return standPat
+            alpha = standPat if alpha is None else max(alpha, standPat)
+        else:
+            if alpha is not None and standPat <= alpha:
+                return standPat
+            beta = standPat if beta is None else min(beta, standPat)
+        opponentColor: PieceColor = PieceColor.WHITE if currentTeam == PieceColor.BLACK else PieceColor.BLACK
+        captures: list[int] = board.getCaptureMoveCodes(currentTeam)
+        captures.sort(key=lambda move: self._captureOrderer.captureScore(board, move), reverse=True)
+        curScore: int = standPat
+        searched: int = 0
+        childScores: Optional[list[int]] = None
+        batchStart: int = 0
+        for i, move in enumerate(captures):
+            gain: int = (self.DELTA_MARGIN + self._captureGain(board, move)) * self._pawnValue
+            if currentTeam == PieceColor.WHITE:
+                if standPat + gain <= alpha:
+                    continue
+            elif standPat - gain >= beta:
+                continue
+            if searched == 1:
+                childScores = self._scoreChildren(board, captures[i:])
+                batchStart = i
+            searched += 1
+            curMove: Move = board.makeMove(move, currentTeam)
+            childScore: int = self.quiescence(board, opponentColor, alpha, beta,
+                                              childScores[i - batchStart] if childScores is not None else None)
+            board.unMove(curMove)
+            if currentTeam == PieceColor.WHITE: #Maximizer
+                curScore = max(curScore, childScore)
+                alpha = max(alpha, curScore)
+                if beta is not None and beta <= alpha:
+                    break
+            else: #Minimizer
+                curScore = min(curScore, childScore)
+                beta = min(beta, curScore)
                 if alpha is not None and beta <= alpha:
                     break
+        return curScore
+    
+    # material won by a capture or promotion, for delta pruning
+    def _captureGain(self, board: ChessBoard, move: int) -> int:
+        victim: Optional[ChessPiece] = board[(move >> 6) & 63]
+        toRet: int = PruningScorer.scores[victim._type] if victim is not None else 0
+        if victim is None and (move >> 12) == 0:
+            # en passant
+            toRet = PruningScorer.scores[PieceType.PAWN]
+        if move >> 12:
+            toRet += PruningScorer.scores[PieceType(move >> 12)] - PruningScorer.scores[PieceType.PAWN]
+        return toRet
 
+# Negamax principal variation search, scores are from the side to move's point of view inside the
+# search. The first move of a node is searched with the full window and the rest with a null window,
+# re-searched only when they beat alpha. Each iteration starts from an aspiration window around the
+# previous score, and nodes off the principal variation try a null move first unless the side to
+# move is in check or has only pawns left, where passing could be the better move.
+class PVSAgent(PruningAgent):
+    INFINITY: int = 1 << 20
+    ASPIRATION_WINDOW: int = 1
+    NULL_MOVE_REDUCTION: int = 2
+
+    # nullMove=False turns null-move pruning off
+    def __init__(self, board: ChessBoard, team: PieceColor, tableMegabytes: int = 16, timeLimit: Optional[float] = None,
+                 nodeLimit: Optional[int] = None, maxDepth: Optional[int] = None, moveOrdering: bool = True,
+                 quiescence: bool = True, nullMove: bool = True, book: Optional[OpeningBook] = None,
+                 tablebase: Optional[Tablebase] = None, stats: Optional[SearchStats] = None,
+                 batchScorer: Optional[BatchScorer] = None, batchLeaves: bool = True):
+        super().__init__(board, team, tableMegabytes=tableMegabytes, timeLimit=timeLimit, nodeLimit=nodeLimit,
+                         maxDepth=maxDepth, moveOrdering=moveOrdering, quiescence=quiescence, book=book,
+                         tablebase=tablebase, stats=stats, batchScorer=batchScorer, batchLeaves=batchLeaves)
+        self._nullMove: bool = nullMove
+        self._previousScore: Optional[int] = None
+
+    # best move code and its score, from white's point of view like PruningAgent
+    def analyze(self) -> tuple[int, int]:
+        known: Optional[tuple[int, int]] = self._knownMove()
+        if known is not None:
+            return known
+        clonedBoard: ChessBoard = self._board.clone()
+        if self._table is not None:
+            self._table.newSearch()
+        if self._orderer is not None:
+            self._orderer.newSearch()
+        self._rootMoveNumber = clonedBoard.curNumOfMove
+        self._previousScore = None
+        move, score = self._deepen(lambda depth: self.aspiration(clonedBoard, depth), clonedBoard)
+        return (move, score if self._team == PieceColor.WHITE else -score)
+
+    # widens to the full window on the side that failed
+    def aspiration(self, board: ChessBoard, depth: int) -> tuple[int, int]:
+        alpha: int = -PVSAgent.INFINITY
+        beta: int = PVSAgent.INFINITY
+        if self._previousScore is not None:
+            alpha = self._previousScore - PVSAgent.ASPIRATION_WINDOW * self._pawnValue
+            beta = self._previousScore + PVSAgent.ASPIRATION_WINDOW * self._pawnValue
+        while True:
+            toRet: tuple[int, int] = self.pvs(board, depth, self._team, alpha, beta, False)
+            if toRet[1] <= alpha and alpha > -PVSAgent.INFINITY:
+                alpha = -PVSAgent.INFINITY
+            elif toRet[1] >= beta and beta < PVSAgent.INFINITY:
+                beta = PVSAgent.INFINITY
+            else:
+                self._previousScore = toRet[1]
+                return toRet
+
+    # staticScore is the score of the position from white's point of view when its parent already scored it in a batch
+    def pvs(self, board: ChessBoard, depth: int, currentTeam: PieceColor, alpha: int, beta: int, allowNull: bool,
+            staticScore: Optional[int] = None) -> tuple[int, int]:
+        self._budget.tick()
+        key: int = board.zobristKey
+        alphaOrig: int = alpha
+        betaOrig: int = beta
+        ply: int = board.curNumOfMove - self._rootMoveNumber
+        hashMove: int = NO_MOVE
+        if self._table is not None:
+            entry: Optional[TranspositionEntry] = self._table.probe(key)
+            if entry is not None:
+                hashMove = entry.bestMove
+            # the root always searches, it has to come back with a move
+            if entry is not None and entry.depth >= depth and ply > 0:
+                if entry.bound == Bound.EXACT:
+                    return (entry.bestMove, entry.score)
+                if entry.bound == Bound.LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    return (entry.bestMove, entry.score)
+        opponentColor: PieceColor = PieceColor.WHITE if currentTeam == PieceColor.BLACK else PieceColor.BLACK
+        myMove: list[int] = board.getLegalMoveCodes(currentTeam)
+        if (len(myMove) == 0 or (ply > 0 and len(board.getLegalMoveCodes(opponentColor)) == 0)
+            or (depth <= 0 and not self._quiescence)):
+            leafScore: int = self._staticScore(board, currentTeam, staticScore)
+            if self._table is not None:
+                self._table.store(key, depth, leafScore, Bound.EXACT, NO_MOVE)
+            return (NO_MOVE, leafScore)
+        if depth <= 0:
+            # the minimax quiescence search works from white's point of view
+            if currentTeam == PieceColor.WHITE:
+                leafScore: int = self.quiescence(board, currentTeam, alpha, beta, staticScore)
+            else:
+                leafScore: int = -self.quiescence(board, currentTeam, -beta, -alpha, staticScore)
+            if self._table is not None:
+                self._table.store(key, depth, leafScore, self._bound(leafScore, alphaOrig, betaOrig), NO_MOVE)
+            return (NO_MOVE, leafScore)
+        if (self._nullMove and allowNull and beta - alpha == 1 and depth > PVSAgent.NULL_MOVE_REDUCTION
+            and board.hasNonPawnMaterial(currentTeam) and not board.isCheck(currentTeam)
+            and self._staticScore(board, currentTeam) >= beta):
+            board.makeNullMove()
+            nullScore: int = -self.pvs(board, depth - 1 - PVSAgent.NULL_MOVE_REDUCTION, opponentColor, -beta, -beta + 1, False)[1]
+            board.unMakeNullMove()
+            if nullScore >= beta:
+                if self._table is not None:
+                    self._table.store(key, depth, nullScore, Bound.LOWER, NO_MOVE)
+                return (NO_MOVE, nullScore)
+        if self._orderer is not None:
+            myMove = self._orderer.order(board, myMove, currentTeam, ply, hashMove)
+        toRet: tuple[int, int] = (NO_MOVE, -PVSAgent.INFINITY)
+        if self._stats is not None:
+            self._stats.interiorNodes += 1
+        childScores: Optional[list[int]] = None
+        for i, move in enumerate(myMove):
+            if i == 1 and depth == 1:
+                childScores = self._scoreChildren(board, myMove[1:])
+            curMove: Move = board.makeMove(move, currentTeam)
+            childStatic: Optional[int] = childScores[i - 1] if childScores is not None else None
+            if i == 0:
+                childScore: int = -self.pvs(board, depth - 1, opponentColor, -beta, -alpha, True, childStatic)[1]
+            else:
+                childScore: int = -self.pvs(board, depth - 1, opponentColor, -alpha - 1, -alpha, True, childStatic)[1]
+                if alpha < childScore < beta:
+                    childScore = -self.pvs(board, depth - 1, opponentColor, -beta, -alpha, True, childStatic)[1]
+            board.unMove(curMove)
+            if childScore > toRet[1]:
+                toRet = (move, childScore)
+            alpha = max(alpha, childScore)
+            if alpha >= beta:
+                if self._orderer is not None:
+                    self._orderer.recordCutoff(board, move, currentTeam, ply, depth)
+                if self._stats is not None:
+                    self._stats.recordCutoff(i == 0)
+                break
+        if self._table is not None:
+            self._table.store(key, depth, toRet[1], self._bound(toRet[1], alphaOrig, betaOrig), toRet[0])
         return toRet
+    
+    # the white point of view scorer, or the score batched by the parent, turned around for black
+    def _staticScore(self, board: ChessBoard, currentTeam: PieceColor, staticScore: Optional[int] = None) -> int:
+        toRet: int = self._scorer.score(board, currentTeam) if staticScore is None else staticScore
+        return toRet if currentTeam == PieceColor.WHITE else -toRet
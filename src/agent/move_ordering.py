@@ -0,0 +1,74 @@
+from chess.board import ChessBoard
+from chess.pieces import ChessPiece, PieceColor, PieceType
+from chess.movement import NO_MOVE
+from agent.search_budget import MAX_SEARCH_DEPTH
+from typing import Optional
+
+# hash move, then captures, then killers, then quiet moves by history
+HASH_MOVE_SCORE: int = 1 << 30
+CAPTURE_SCORE: int = 1 << 28
+KILLER_SCORE: int = 1 << 26
+
+class MoveOrderer():
+    values: dict[PieceType, int] = {PieceType.PAWN: 1,
+                                    PieceType.KNIGHT: 3,
+                                    PieceType.BISHOP: 3,
+                                    PieceType.ROOK: 5,
+                                    PieceType.QUEEN: 9,
+                                    PieceType.KING: 10}
+    def __init__(self):
+        self._killers: list[list[int]] = [[NO_MOVE, NO_MOVE] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        # indexed by color.value * 4096 + src + dst * 64, the low 12 bits of a move code
+        self._history: list[int] = [0] * (2 * 64 * 64)
+    
+    # killers only make sense within one search, history is kept but decays
+    def newSearch(self) -> None:
+        self._killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        self._history = [score >> 1 for score in self._history]
+    
+    # most valuable victim first, least valuable attacker first among equal victims,
+    # a promotion counts as capturing the piece it promotes to, -1 for quiet moves
+    def captureScore(self, board: ChessBoard, move: int) -> int:
+        src: int = move & 63
+        dst: int = (move >> 6) & 63
+        attacker: ChessPiece = board[src]
+        victim: Optional[ChessPiece] = board[dst]
+        victimValue: int = 0
+        if victim is not None:
+            victimValue = MoveOrderer.values[victim._type]
+        elif attacker._type == PieceType.PAWN and src % 8 != dst % 8:
+            victimValue = MoveOrderer.values[PieceType.PAWN]
+        if move >> 12:
+            victimValue += MoveOrderer.values[PieceType(move >> 12)]
+        if victimValue == 0:
+            return -1
+        return victimValue * 16 - MoveOrderer.values[attacker._type]
+    
+    def order(self, board: ChessBoard, moves: list[int], color: PieceColor, ply: int, hashMove: int) -> list[int]:
+        killers: list[int] = self._killers[min(ply, MAX_SEARCH_DEPTH)]
+        historyBase: int = color.value * 4096
+        scores: dict[int, int] = {}
+        for move in moves:
+            if move == hashMove:
+                scores[move] = HASH_MOVE_SCORE
+                continue
+            captureScore: int = self.captureScore(board, move)
+            if captureScore >= 0:
+                scores[move] = CAPTURE_SCORE + captureScore
+            elif move == killers[0]:
+                scores[move] = KILLER_SCORE + 1
+            elif move == killers[1]:
+                scores[move] = KILLER_SCORE
+            else:
+                scores[move] = self._history[historyBase + (move & 4095)]
+        return sorted(moves, key=scores.__getitem__, reverse=True)
+    
+    # quiet moves that cause a beta cutoff become killers and gain history
+    def recordCutoff(self, board: ChessBoard, move: int, color: PieceColor, ply: int, depth: int) -> None:
+        if self.captureScore(board, move) >= 0:
+            return
+        killers: list[int] = self._killers[min(ply, MAX_SEARCH_DEPTH)]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[color.value * 4096 + (move & 4095)] += depth * depth
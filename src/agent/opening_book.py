@@ -0,0 +1,131 @@
+from chess.board import ChessBoard
+from chess.movement import NO_MOVE, moveToNotation, notationToMove
+from typing import Iterable, Optional
+import argparse
+import mmap
+import random
+import struct
+import sys
+
+# Every entry is a big-endian position key, move code and weight, sorted by key and then by
+# decreasing weight, so all the moves of a position sit next to each other with the best first.
+ENTRY_FORMAT: struct.Struct = struct.Struct(">QHH")
+ENTRY_BYTES: int = ENTRY_FORMAT.size
+_KEY_FORMAT: struct.Struct = struct.Struct(">Q")
+MAX_WEIGHT: int = 0xFFFF
+
+# Read-only view of a book file. The file is memory-mapped rather than read, so opening it costs
+# nothing whatever its size and the pages are shared between every process that maps the same book.
+class OpeningBook():
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        self._size: int = 0
+        fileBytes: int = self._file.seek(0, 2)
+        if fileBytes % ENTRY_BYTES != 0:
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book")
+        if fileBytes > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._size = fileBytes // ENTRY_BYTES
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    # index of the first entry whose key is not below the given one
+    def _lowerBound(self, key: int) -> int:
+        low: int = 0
+        high: int = self._size
+        while low < high:
+            middle: int = (low + high) >> 1
+            if _KEY_FORMAT.unpack_from(self._map, middle * ENTRY_BYTES)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    # (move code, weight) pairs stored for a position key, best first
+    def probe(self, key: int) -> list[tuple[int, int]]:
+        toRet: list[tuple[int, int]] = []
+        idx: int = self._lowerBound(key)
+        while idx < self._size:
+            entryKey, move, weight = ENTRY_FORMAT.unpack_from(self._map, idx * ENTRY_BYTES)
+            if entryKey != key:
+                break
+            toRet.append((move, weight))
+            idx += 1
+        return toRet
+
+    # The best weighted legal move of the side to move, or a random one by weight when rng is given.
+    # NO_MOVE when the position is out of book.
+    def choose(self, board: ChessBoard, rng: Optional[random.Random] = None) -> int:
+        if self._size == 0:
+            return NO_MOVE
+        legalMoves: set[int] = set(board.getLegalMoveCodes(board.sideToMove))
+        # two positions can share a key, their moves would not be legal here
+        candidates: list[tuple[int, int]] = [entry for entry in self.probe(board.zobristKey) if entry[0] in legalMoves]
+        if len(candidates) == 0:
+            return NO_MOVE
+        if rng is None:
+            return candidates[0][0]
+        return rng.choices([move for move, _ in candidates], weights=[weight + 1 for _, weight in candidates])[0]
+
+# Replays each game, a list of moves in coordinate notation from the starting position, for its
+# first maxPlies plies and counts how often each move was played from each position. Moves played
+# fewer than minCount times are dropped. A game stops counting at its first illegal move.
+def buildBook(games: Iterable[list[str]], path: str, maxPlies: int = 16, minCount: int = 1) -> int:
+    counts: dict[tuple[int, int], int] = {}
+    for game in games:
+        board: ChessBoard = ChessBoard()
+        for notation in game[:maxPlies]:
+            try:
+                code: int = notationToMove(notation)
+            except ValueError:
+                break
+            if code not in board.getLegalMoveCodes(board.sideToMove):
+                break
+            entry: tuple[int, int] = (board.zobristKey, code)
+            counts[entry] = counts.get(entry, 0) + 1
+            board.makeMove(code, board.sideToMove)
+    entries: list[tuple[int, int, int]] = [(key, move, min(count, MAX_WEIGHT)) for (key, move), count in counts.items()
+                                           if count >= minCount]
+    entries.sort(key=lambda entry: (entry[0], -entry[2], entry[1]))
+    with open(path, "wb") as file:
+        for entry in entries:
+            file.write(ENTRY_FORMAT.pack(*entry))
+    return len(entries)
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Build or query an opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile a book from games, one move list per line")
+    build.add_argument("games")
+    build.add_argument("book")
+    build.add_argument("--plies", type=int, default=16, help="plies of each game that go in the book")
+    build.add_argument("--min-count", type=int, default=1, help="drop moves played fewer times")
+    probe = commands.add_parser("probe", help="list the book moves of a position")
+    probe.add_argument("book")
+    probe.add_argument("--fen", help="position to look up, the starting position by default")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.games) as file:
+            games: Iterable[list[str]] = (line.split() for line in file if line.strip() and not line.startswith("#"))
+            written: int = buildBook(games, args.book, args.plies, args.min_count)
+        print(f"{written} entries written to {args.book}")
+        return 0
+    board: ChessBoard = ChessBoard.fromFEN(args.fen) if args.fen is not None else ChessBoard()
+    book: OpeningBook = OpeningBook(args.book)
+    for move, weight in book.probe(board.zobristKey):
+        print(f"{moveToNotation(move)} {weight}")
+    book.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
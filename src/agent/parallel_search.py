@@ -0,0 +1,226 @@
+from agent.minimax_agent import PruningAgent
+from agent.opening_book import OpeningBook
+from agent.search_budget import SearchBudget, SearchTimeout, iterativeDeepening
+from chess.pieces import PieceColor
+from chess.board import ChessBoard
+from chess.tablebase import Tablebase
+from chess.movement import Move, NO_MOVE
+from chess.snapshot import PositionSnapshot
+from chess.perft import STANDARD_POSITIONS
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+import argparse
+import os
+import sys
+import time
+
+# one searching agent per worker process, kept between tasks so that its transposition table,
+# killers and history carry over from one iteration to the next
+_workerAgents: dict[tuple[int, bool, bool], PruningAgent] = {}
+_workerSearchIds: dict[tuple[int, bool, bool], int] = {}
+
+def _workerAgent(tableMegabytes: int, moveOrdering: bool, quiescence: bool, searchId: int) -> PruningAgent:
+    settings: tuple[int, bool, bool] = (tableMegabytes, moveOrdering, quiescence)
+    agent: Optional[PruningAgent] = _workerAgents.get(settings)
+    if agent is None:
+        agent = PruningAgent(None, PieceColor.WHITE, tableMegabytes=tableMegabytes, moveOrdering=moveOrdering,
+                             quiescence=quiescence)
+        _workerAgents[settings] = agent
+    if _workerSearchIds.get(settings) != searchId:
+        _workerSearchIds[settings] = searchId
+        if agent._table is not None:
+            agent._table.newSearch()
+        if agent._orderer is not None:
+            agent._orderer.newSearch()
+    return agent
+
+# Searches a share of the root moves one after the other inside the window (alpha, beta) every
+# worker gets, narrowing it with its own results like the serial root does and stopping once a move
+# reaches beta. Each move comes with its index in the root order; the result is (index, move, score,
+# nodes) of the first best move of the share, or index -1 when the budget ran out.
+def searchRootMoves(snapshot: PositionSnapshot, rootMoveNumber: int, team: PieceColor, moves: list[tuple[int, int]],
+                    depth: int, tableMegabytes: int, moveOrdering: bool, quiescence: bool, searchId: int,
+                    timeLimit: Optional[float], nodeLimit: Optional[int], armed: bool,
+                    alpha: Optional[int] = None, beta: Optional[int] = None) -> tuple[int, int, int, int]:
+    agent: PruningAgent = _workerAgent(tableMegabytes, moveOrdering, quiescence, searchId)
+    board: ChessBoard = ChessBoard.fromSnapshot(snapshot)
+    board.curNumOfMove = rootMoveNumber
+    agent._rootMoveNumber = rootMoveNumber
+    agent._budget = SearchBudget(timeLimit, nodeLimit)
+    agent._budget.start()
+    if armed:
+        agent._budget.arm()
+    opponentColor: PieceColor = PieceColor.WHITE if team == PieceColor.BLACK else PieceColor.BLACK
+    toRet: tuple[int, int, int] = (-1, NO_MOVE, 0)
+    try:
+        for idx, move in moves:
+            curMove: Move = board.makeMove(move, team)
+            childScore: int = agent.pruning(board, depth - 1, opponentColor, alpha, beta)[1]
+            board.unMove(curMove)
+            if team == PieceColor.WHITE: #Maximizer
+                if toRet[0] == -1 or toRet[2] < childScore:
+                    toRet = (idx, move, childScore)
+                alpha = toRet[2] if alpha is None else max(alpha, toRet[2])
+            else: #Minimizer
+                if toRet[0] == -1 or toRet[2] > childScore:
+                    toRet = (idx, move, childScore)
+                beta = toRet[2] if beta is None else min(beta, toRet[2])
+            if alpha is not None and beta is not None and beta <= alpha:
+                break
+    except SearchTimeout:
+        return (-1, NO_MOVE, 0, agent._budget.nodes)
+    return (toRet[0], toRet[1], toRet[2], agent._budget.nodes)
+
+# Root-parallel PruningAgent: the first root move is searched alone, then the others are dealt round
+# robin over a process pool and every worker searches its share with its own window, starting from
+# the score of the first move. From the second iteration on, the window starts as an aspiration
+# window around the score of the previous one, widened on the side that failed and searched again
+# when the best score falls outside of it. The best score is the minimax score of the serial search
+# at the same depth, and ties go to the move that comes first in the root order, the one the serial
+# search keeps. Worker tables are private to each process, so with a transposition table the two
+# searches can still differ where a table hit returns a deeper result.
+class ParallelPruningAgent(PruningAgent):
+    ASPIRATION_WINDOW: int = 1
+
+    # workers defaults to the number of CPUs, pool lets several agents share one executor
+    def __init__(self, board: ChessBoard, team: PieceColor, workers: Optional[int] = None, tableMegabytes: int = 16,
+                 timeLimit: Optional[float] = None, nodeLimit: Optional[int] = None, maxDepth: Optional[int] = None,
+                 moveOrdering: bool = True, quiescence: bool = True, pool: Optional[ProcessPoolExecutor] = None,
+                 book: Optional[OpeningBook] = None, tablebase: Optional[Tablebase] = None):
+        # the tables live in the workers, the root keeps none of its own
+        super().__init__(board, team, tableMegabytes=0, timeLimit=timeLimit, nodeLimit=nodeLimit,
+                         maxDepth=maxDepth, moveOrdering=moveOrdering, quiescence=quiescence, book=book,
+                         tablebase=tablebase)
+        self._workers: int = workers if workers is not None else os.cpu_count() or 1
+        self._tableMegabytes: int = tableMegabytes
+        self._moveOrdering: bool = moveOrdering
+        self._pool: Optional[ProcessPoolExecutor] = pool
+        self._ownsPool: bool = pool is None
+        self._searchId: int = 0
+        self._bestMove: int = NO_MOVE
+        self._previousScore: Optional[int] = None
+
+    def getWorkerCount(self) -> int:
+        return self._workers
+
+    def analyze(self) -> tuple[int, int]:
+        known: Optional[tuple[int, int]] = self._knownMove()
+        if known is not None:
+            return known
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        clonedBoard: ChessBoard = self._board.clone()
+        if self._orderer is not None:
+            self._orderer.newSearch()
+        self._searchId += 1
+        self._bestMove = NO_MOVE
+        self._previousScore = None
+        self._rootMoveNumber = clonedBoard.curNumOfMove
+        return iterativeDeepening(lambda depth: self.parallelRoot(clonedBoard, depth), self._budget, self._maxDepth)
+
+    # shuts the pool down if this agent created it
+    def close(self) -> None:
+        if self._pool is not None and self._ownsPool:
+            self._pool.shutdown()
+        self._pool = None
+
+    def parallelRoot(self, board: ChessBoard, depth: int) -> tuple[int, int]:
+        myMove: list[int] = board.getLegalMoveCodes(self._team)
+        # the root searches its own moves even when the opponent has none, it has to come back with one
+        if depth <= 0 or len(myMove) == 0:
+            return (NO_MOVE, self._scorer.score(board, self._team))
+        if self._orderer is not None:
+            # the best move of the previous iteration goes first, like the hash move of the serial root
+            myMove = self._orderer.order(board, myMove, self._team, 0, self._bestMove)
+        alpha: Optional[int] = None
+        beta: Optional[int] = None
+        if self._previousScore is not None:
+            alpha = self._previousScore - ParallelPruningAgent.ASPIRATION_WINDOW * self._pawnValue
+            beta = self._previousScore + ParallelPruningAgent.ASPIRATION_WINDOW * self._pawnValue
+        while True:
+            toRet: tuple[int, int] = self._searchWindow(board, myMove, depth, alpha, beta)
+            # widens to the full window on the side that failed
+            if alpha is not None and toRet[1] <= alpha:
+                alpha = None
+            elif beta is not None and toRet[1] >= beta:
+                beta = None
+            else:
+                self._bestMove = toRet[0]
+                self._previousScore = toRet[1]
+                return toRet
+
+    # The best root move and its score inside (alpha, beta). The first move is searched on its own
+    # and its score bounds the window every worker searches the rest of the moves with.
+    def _searchWindow(self, board: ChessBoard, myMove: list[int], depth: int, alpha: Optional[int],
+                      beta: Optional[int]) -> tuple[int, int]:
+        results: list[tuple[int, int, int, int]] = self._searchShares(board, [[(0, myMove[0])]], depth, alpha, beta)
+        if self._team == PieceColor.WHITE:
+            alpha = results[0][2] if alpha is None else max(alpha, results[0][2])
+        else:
+            beta = results[0][2] if beta is None else min(beta, results[0][2])
+        if len(myMove) > 1 and (alpha is None or beta is None or alpha < beta):
+            rest: list[tuple[int, int]] = list(enumerate(myMove))[1:]
+            workers: int = min(self._workers, len(rest))
+            results += self._searchShares(board, [rest[i::workers] for i in range(workers)], depth, alpha, beta)
+        if self._team == PieceColor.WHITE:
+            best: tuple[int, int, int, int] = min(results, key=lambda result: (-result[2], result[0]))
+        else:
+            best: tuple[int, int, int, int] = min(results, key=lambda result: (result[2], result[0]))
+        return (best[1], best[2])
+
+    # one worker task per share, the node budget split evenly between them
+    def _searchShares(self, board: ChessBoard, shares: list[list[tuple[int, int]]], depth: int, alpha: Optional[int],
+                      beta: Optional[int]) -> list[tuple[int, int, int, int]]:
+        remainingNodes: Optional[int] = self._budget.remainingNodes()
+        nodeLimit: Optional[int] = max(1, remainingNodes // len(shares)) if remainingNodes is not None else None
+        snapshot: PositionSnapshot = board.snapshot()
+        futures: list[Future] = [self._pool.submit(searchRootMoves, snapshot, board.curNumOfMove, self._team, share, depth,
+                                                   self._tableMegabytes, self._moveOrdering, self._quiescence, self._searchId,
+                                                   self._budget.remainingTime(), nodeLimit, self._budget.isArmed(),
+                                                   alpha, beta)
+                                 for share in shares]
+        results: list[tuple[int, int, int, int]] = [future.result() for future in futures]
+        self._budget.nodes += sum(result[3] for result in results)
+        if any(result[0] == -1 for result in results):
+            raise SearchTimeout()
+        return results
+
+# Searches every position with the serial PruningAgent and with ParallelPruningAgent to the same
+# depth, for their nodes and wall time. The pool is started before the clock runs.
+def compareWithSerial(positions: list[tuple[str, str, list[int]]], depth: int, workers: Optional[int] = None,
+                      tableMegabytes: int = 16) -> list[dict]:
+    toRet: list[dict] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        warmUp: ParallelPruningAgent = ParallelPruningAgent(ChessBoard(), PieceColor.WHITE, workers=workers, maxDepth=1, pool=pool)
+        warmUp.analyze()
+        for name, fen, _ in positions:
+            board: ChessBoard = ChessBoard.fromFEN(fen)
+            result: dict = {"position": name, "workers": warmUp.getWorkerCount()}
+            for kind, agent in (("serial", PruningAgent(board, board.sideToMove, tableMegabytes=tableMegabytes, maxDepth=depth)),
+                                ("parallel", ParallelPruningAgent(board, board.sideToMove, workers=workers, pool=pool,
+                                                                  tableMegabytes=tableMegabytes, maxDepth=depth))):
+                start: float = time.perf_counter()
+                move, score = agent.analyze()
+                result[kind] = {"move": move, "score": score, "nodes": agent.getNodeCount(),
+                                "seconds": time.perf_counter() - start}
+            toRet.append(result)
+    return toRet
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compare the root-parallel search with the serial one")
+    parser.add_argument("--depth", type=int, default=4, help="search depth")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--fen", help="run a single position instead of the standard ones")
+    parser.add_argument("--table", type=int, default=16, help="transposition table megabytes per search")
+    args = parser.parse_args(argv)
+    positions: list[tuple[str, str, list[int]]] = STANDARD_POSITIONS if args.fen is None else [("fen", args.fen, [])]
+    for result in compareWithSerial(positions, args.depth, args.workers, args.table):
+        serial: dict = result["serial"]
+        parallel: dict = result["parallel"]
+        print(f"{result['position']:<12} serial {serial['nodes']:>9} nodes {serial['seconds']:8.2f}s   "
+              f"parallel x{result['workers']} {parallel['nodes']:>9} nodes {parallel['seconds']:8.2f}s   "
+              f"speedup {serial['seconds'] / parallel['seconds']:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
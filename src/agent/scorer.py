@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
-from chess.board import ChessBoard
+from chess.board import ChessBoard, MATERIAL_VALUES
 from chess.pieces import PieceColor, PieceType
 
 class BoardScorer(ABC):
+    # what a pawn is worth in the unit of the scores
+    pawnValue: int = 1
+
     def __init__(self):
         pass
     
@@ -12,16 +15,20 @@ class BoardScorer(ABC):
 
 
 class SimpleScorer(BoardScorer):
-    scores: dict[PieceType, int] = {PieceType.KING: 0, 
-                                    PieceType.PAWN: 1, 
-                                    PieceType.KNIGHT: 3, 
-                                    PieceType.BISHOP: 3, 
-                                    PieceType.ROOK: 5, 
-                                    PieceType.QUEEN: 9}
-    def __init__(self):
+    # the board keeps the material totals with the same values
+    scores: dict[PieceType, int] = {pieceType: MATERIAL_VALUES[pieceType.value] for pieceType in PieceType}
+    # verify, like ChessBoard.debug, rescans the board on every call and checks it against the incremental material
+    def __init__(self, verify: bool = False):
         super().__init__()
+        self._verify: bool = verify
     
     def score(self, board: ChessBoard, color: PieceColor) -> int:
+        toRet: int = board.material if color == PieceColor.WHITE else -board.material
+        if self._verify or board.debug:
+            assert toRet == self.rescan(board, color), "incremental material differs from a full rescan"
+        return toRet
+    
+    def rescan(self, board: ChessBoard, color: PieceColor) -> int:
         toRet: int = 0
         for piece in board._board:
             if piece is not None:
@@ -32,16 +39,18 @@ class SimpleScorer(BoardScorer):
         return toRet
 
 class PruningScorer(BoardScorer):
-    scores: dict[PieceType, int] = {PieceType.KING: 0, 
-                                    PieceType.PAWN: 1, 
-                                    PieceType.KNIGHT: 3, 
-                                    PieceType.BISHOP: 3, 
-                                    PieceType.ROOK: 5, 
-                                    PieceType.QUEEN: 9}
-    def __init__(self):
+    # the board keeps the material totals with the same values
+    scores: dict[PieceType, int] = {pieceType: MATERIAL_VALUES[pieceType.value] for pieceType in PieceType}
+    def __init__(self, verify: bool = False):
         super().__init__()
+        self._verify: bool = verify
+    
+    def score(self, board: ChessBoard, color: PieceColor) -> int:
+        if self._verify or board.debug:
+            assert board.material == self.rescan(board, color), "incremental material differs from a full rescan"
+        return board.material
     
-    def score(self, board: ChessBoard, _: PieceColor) -> int:
+    def rescan(self, board: ChessBoard, _: PieceColor) -> int:
         toRet: int = 0
         for piece in board._board:
             if piece is not None:
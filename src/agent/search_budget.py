@@ -0,0 +1,96 @@
+from chess.movement import NO_MOVE
+from typing import Callable, Optional
+import time
+
+MAX_SEARCH_DEPTH: int = 64
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchBudget():
+    # the clock is only read every CHECK_INTERVAL nodes
+    CHECK_INTERVAL: int = 32
+
+    # untilStopped deepens without limits until stop is called, for infinite and ponder searches
+    def __init__(self, timeLimit: Optional[float] = None, nodeLimit: Optional[int] = None, untilStopped: bool = False):
+        self._timeLimit: Optional[float] = timeLimit
+        self._nodeLimit: Optional[int] = nodeLimit
+        self._untilStopped: bool = untilStopped
+        self._deadline: Optional[float] = None
+        self._armed: bool = False
+        self._stopped: bool = False
+        self.nodes: int = 0
+    
+    def isLimited(self) -> bool:
+        return self._timeLimit is not None or self._nodeLimit is not None or self._untilStopped
+    
+    def start(self) -> None:
+        self.nodes = 0
+        self._armed = False
+        self._deadline = time.perf_counter() + self._timeLimit if self._timeLimit is not None else None
+    
+    # Ends the search from another thread at its next node, once the first iteration is done. A stop
+    # that comes in before the search starts still counts.
+    def stop(self) -> None:
+        self._stopped = True
+    
+    def isStopped(self) -> bool:
+        return self._stopped
+    
+    # gives the search timeLimit seconds from now, e.g. when a ponder search becomes the real one
+    def restartClock(self, timeLimit: Optional[float]) -> None:
+        self._timeLimit = timeLimit
+        self._deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+    
+    # nothing is aborted before arm, so that the first iteration always completes
+    def arm(self) -> None:
+        self._armed = True
+    
+    def isArmed(self) -> bool:
+        return self._armed
+    
+    # seconds left before the deadline, None without a time limit
+    def remainingTime(self) -> Optional[float]:
+        return max(0.0, self._deadline - time.perf_counter()) if self._deadline is not None else None
+    
+    def remainingNodes(self) -> Optional[int]:
+        return max(0, self._nodeLimit - self.nodes) if self._nodeLimit is not None else None
+    
+    def isExhausted(self) -> bool:
+        if self._stopped:
+            return True
+        if self._nodeLimit is not None and self.nodes >= self._nodeLimit:
+            return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+    
+    # called once per searched node, raises SearchTimeout once the budget is spent
+    def tick(self) -> None:
+        self.nodes += 1
+        if not self._armed:
+            return
+        if self._stopped:
+            raise SearchTimeout()
+        if self._nodeLimit is not None and self.nodes >= self._nodeLimit:
+            raise SearchTimeout()
+        if self._deadline is not None and self.nodes % SearchBudget.CHECK_INTERVAL == 0 and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+
+# Searches depth 1, 2, 3, ... and returns the result of the deepest iteration that completed. A
+# deeper iteration that comes back without a move never replaces one that found a move.
+def iterativeDeepening(search: Callable[[int], tuple[int, int]], budget: SearchBudget, maxDepth: int) -> tuple[int, int]:
+    budget.start()
+    if not budget.isLimited():
+        return search(maxDepth)
+    toRet: tuple[int, int] = search(1)
+    budget.arm()
+    for depth in range(2, maxDepth + 1):
+        if toRet[0] == NO_MOVE or budget.isExhausted():
+            break
+        try:
+            result: tuple[int, int] = search(depth)
+        except SearchTimeout:
+            break
+        if result[0] == NO_MOVE:
+            break
+        toRet = result
+    return toRet
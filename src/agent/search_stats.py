@@ -0,0 +1,172 @@
+from agent.scorer import BoardScorer
+from agent.search_budget import SearchBudget, iterativeDeepening
+from agent.transposition import TranspositionTable
+from chess.board import ChessBoard
+from typing import Any, Callable, Optional
+import logging
+import time
+
+logger: logging.Logger = logging.getLogger("agent.search")
+
+# Counters of one search, opt-in through the agents' stats argument. Nodes, move generation,
+# make/unmake and evaluation are measured by wrapping the methods of the searched board clone, the
+# scorer and the budget for the duration of the search, so a search without stats runs the plain
+# methods and only pays a None check where cutoffs are recorded.
+class SearchStats():
+    # nodes between two looks at the clock for the periodic log line
+    LOG_CHECK_INTERVAL: int = 1024
+
+    # logInterval is the number of seconds between progress lines, None logs one line per iteration only
+    def __init__(self, logInterval: Optional[float] = None):
+        self._logInterval: Optional[float] = logInterval
+        self.reset()
+
+    def reset(self) -> None:
+        self.nodes: int = 0
+        # nodes visited at each ply from the root, quiescence plies included
+        self.plyNodes: list[int] = []
+        # nodes of each completed iteration, indexed by depth - 1
+        self.iterationNodes: list[int] = []
+        # depth of the iteration running, or of the last one once the search is over
+        self.depth: int = 0
+        self.interiorNodes: int = 0
+        self.cutoffs: int = 0
+        self.firstMoveCutoffs: int = 0
+        self.generationTime: float = 0.0
+        self.makeUnmakeTime: float = 0.0
+        self.evaluationTime: float = 0.0
+        self.tableProbes: int = 0
+        self.tableHits: int = 0
+        self.elapsed: float = 0.0
+        self._startTime: float = time.perf_counter()
+        self._lastLog: float = self._startTime
+        self._table: Optional[TranspositionTable] = None
+        self._tableStart: tuple[int, int] = (0, 0)
+        self._wrapped: list[tuple[Any, str]] = []
+
+    # called by the search at each beta cutoff, firstMove when it came from the first move tried
+    def recordCutoff(self, firstMove: bool) -> None:
+        self.cutoffs += 1
+        if firstMove:
+            self.firstMoveCutoffs += 1
+
+    def cutoffRate(self) -> float:
+        return self.cutoffs / self.interiorNodes if self.interiorNodes > 0 else 0.0
+
+    def firstMoveCutoffRate(self) -> float:
+        return self.firstMoveCutoffs / self.cutoffs if self.cutoffs > 0 else 0.0
+
+    # nodes of each iteration over the nodes of the one before
+    def branchingFactors(self) -> list[float]:
+        return [self.iterationNodes[i] / self.iterationNodes[i - 1]
+                for i in range(1, len(self.iterationNodes)) if self.iterationNodes[i - 1] > 0]
+
+    def effectiveBranchingFactor(self) -> Optional[float]:
+        factors: list[float] = self.branchingFactors()
+        return factors[-1] if len(factors) > 0 else None
+
+    def tableHitRate(self) -> Optional[float]:
+        if self._table is None:
+            return None
+        return self.tableHits / self.tableProbes if self.tableProbes > 0 else 0.0
+
+    def asDict(self) -> dict:
+        self._updateTable()
+        return {"depth": self.depth,
+                "nodes": self.nodes,
+                "plyNodes": self.plyNodes.copy(),
+                "iterationNodes": self.iterationNodes.copy(),
+                "effectiveBranchingFactor": self.effectiveBranchingFactor(),
+                "cutoffRate": self.cutoffRate(),
+                "firstMoveCutoffRate": self.firstMoveCutoffRate(),
+                "generationTime": self.generationTime,
+                "makeUnmakeTime": self.makeUnmakeTime,
+                "evaluationTime": self.evaluationTime,
+                "tableProbes": self.tableProbes if self._table is not None else None,
+                "tableHitRate": self.tableHitRate(),
+                "elapsed": self.elapsed}
+
+    def logLine(self) -> str:
+        self._updateTable()
+        elapsed: float = time.perf_counter() - self._startTime if self._wrapped else self.elapsed
+        ebf: Optional[float] = self.effectiveBranchingFactor()
+        hitRate: Optional[float] = self.tableHitRate()
+        return (f"depth {self.depth} nodes {self.nodes} "
+                f"nps {self.nodes / elapsed if elapsed > 0 else 0.0:.0f} "
+                f"ebf {'-' if ebf is None else f'{ebf:.2f}'} "
+                f"cutoffs {self.cutoffRate():.1%} first {self.firstMoveCutoffRate():.1%} "
+                f"movegen {self.generationTime:.3f}s make {self.makeUnmakeTime:.3f}s eval {self.evaluationTime:.3f}s "
+                f"tt {'-' if hitRate is None else f'{hitRate:.1%}'}")
+
+    def _updateTable(self) -> None:
+        if self._table is not None:
+            self.tableHits = self._table.hits - self._tableStart[0]
+            self.tableProbes = self._table.hits + self._table.misses - self._tableStart[0] - self._tableStart[1]
+
+    def _timed(self, owner: Any, name: str, field: str) -> None:
+        method: Callable = getattr(owner, name)
+        perfCounter: Callable[[], float] = time.perf_counter
+        def timed(*args):
+            start: float = perfCounter()
+            toRet = method(*args)
+            setattr(self, field, getattr(self, field) + perfCounter() - start)
+            return toRet
+        setattr(owner, name, timed)
+        self._wrapped.append((owner, name))
+
+    def _countNodes(self, board: ChessBoard, budget: SearchBudget, rootMoveNumber: int) -> None:
+        tick: Callable[[], None] = budget.tick
+        plyNodes: list[int] = self.plyNodes
+        def countedTick() -> None:
+            self.nodes += 1
+            ply: int = board.curNumOfMove - rootMoveNumber
+            while len(plyNodes) <= ply:
+                plyNodes.append(0)
+            plyNodes[ply] += 1
+            if self._logInterval is not None and self.nodes % SearchStats.LOG_CHECK_INTERVAL == 0:
+                now: float = time.perf_counter()
+                if now - self._lastLog >= self._logInterval:
+                    self._lastLog = now
+                    logger.info(self.logLine())
+            tick()
+        budget.tick = countedTick
+        self._wrapped.append((budget, "tick"))
+
+    def _start(self, board: ChessBoard, scorer: BoardScorer, budget: SearchBudget,
+              table: Optional[TranspositionTable], rootMoveNumber: int) -> None:
+        self.reset()
+        self._table = table
+        if table is not None:
+            self._tableStart = (table.hits, table.misses)
+        self._countNodes(board, budget, rootMoveNumber)
+        for name in ("getLegalMoveCodes", "getCaptureMoveCodes"):
+            self._timed(board, name, "generationTime")
+        for name in ("makeMove", "unMove", "makeNullMove", "unMakeNullMove"):
+            self._timed(board, name, "makeUnmakeTime")
+        self._timed(scorer, "score", "evaluationTime")
+        if hasattr(scorer, "scoreBatch"):
+            self._timed(scorer, "scoreBatch", "evaluationTime")
+
+    def _finish(self) -> None:
+        self._updateTable()
+        self.elapsed = time.perf_counter() - self._startTime
+        for owner, name in self._wrapped:
+            delattr(owner, name)
+        self._wrapped = []
+
+    # iterativeDeepening with the counters running, board has to be the copy the search runs on.
+    # A line is logged after every completed iteration.
+    def deepen(self, search: Callable[[int], tuple[int, int]], board: ChessBoard, scorer: BoardScorer,
+               budget: SearchBudget, table: Optional[TranspositionTable], rootMoveNumber: int, maxDepth: int) -> tuple[int, int]:
+        def counted(depth: int) -> tuple[int, int]:
+            before: int = self.nodes
+            self.depth = depth
+            toRet: tuple[int, int] = search(depth)
+            self.iterationNodes.append(self.nodes - before)
+            logger.info(self.logLine())
+            return toRet
+        self._start(board, scorer, budget, table, rootMoveNumber)
+        try:
+            return iterativeDeepening(counted, budget, maxDepth)
+        finally:
+            self._finish()
@@ -0,0 +1,208 @@
+from agent.analysis import parsePosition
+from agent.minimax_agent import MinimaxAgent, PruningAgent, PVSAgent
+from chess.board import ChessBoard
+from chess.chessgame import gameResult
+from chess.movement import NO_MOVE, notationToMove
+from chess.pieces import PieceColor
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Optional
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+_AGENTS: dict[str, type] = {"minimax": MinimaxAgent, "pruning": PruningAgent, "pvs": PVSAgent}
+# option name in a configuration, keyword argument of the agents and its type
+_OPTIONS: dict[str, tuple[str, type]] = {"time": ("timeLimit", float),
+                                         "nodes": ("nodeLimit", int),
+                                         "depth": ("maxDepth", int),
+                                         "table": ("tableMegabytes", int),
+                                         "ordering": ("moveOrdering", bool),
+                                         "quiescence": ("quiescence", bool),
+                                         "nullmove": ("nullMove", bool)}
+# the options each kind of agent takes
+_AGENT_OPTIONS: dict[str, tuple[str, ...]] = {"minimax": ("time", "nodes", "depth"),
+                                              "pruning": ("time", "nodes", "depth", "table", "ordering", "quiescence"),
+                                              "pvs": ("time", "nodes", "depth", "table", "ordering", "quiescence", "nullmove")}
+
+# An agent configuration is its kind optionally followed by options, e.g. "pvs:depth=4,table=8"
+# or "pruning:time=0.2,quiescence=0". Returns the kind and the keyword arguments of the agent.
+def parseConfig(text: str) -> tuple[str, dict]:
+    kind, _, optionText = text.partition(":")
+    if kind not in _AGENTS:
+        raise ValueError(f"Unknown agent {kind}")
+    kwargs: dict = {}
+    for option in optionText.split(","):
+        if option == "":
+            continue
+        name, _, value = option.partition("=")
+        if name not in _OPTIONS:
+            raise ValueError(f"Unknown option {name}")
+        if name not in _AGENT_OPTIONS[kind]:
+            raise ValueError(f"Option {name} does not apply to {kind}")
+        keyword, valueType = _OPTIONS[name]
+        kwargs[keyword] = value not in ("0", "false", "no") if valueType is bool else valueType(value)
+    return (kind, kwargs)
+
+# Runs in a worker process. Plays one game from the opening and adjudicates it: mate, stalemate,
+# bare kings, the fifty-move rule and threefold repetition end it as usual, a game that reaches
+# maxPlies plies from the opening is a draw and an engine that answers with an illegal move loses
+# without it being played. The result is from the first engine's side.
+def playGame(gameIdx: int, opening: str, firstConfig: tuple[str, dict], secondConfig: tuple[str, dict],
+             firstIsWhite: bool, maxPlies: int) -> dict:
+    board: ChessBoard = parsePosition(opening)
+    engines: list[MinimaxAgent | PruningAgent] = []
+    for kind, kwargs in (firstConfig, secondConfig):
+        color: PieceColor = PieceColor.WHITE if (len(engines) == 0) == firstIsWhite else PieceColor.BLACK
+        engines.append(_AGENTS[kind](board, color, **kwargs))
+    nodes: list[int] = [0, 0]
+    seconds: list[float] = [0.0, 0.0]
+    moves: list[int] = [0, 0]
+    repetitions: dict[int, int] = {board.zobristKey: 1}
+    result: Optional[tuple[str, str]] = gameResult(board)
+    plies: int = 0
+    while result is None:
+        if plies >= maxPlies:
+            result = ("1/2-1/2", "move cap")
+            break
+        engine: int = 0 if (board.sideToMove == PieceColor.WHITE) == firstIsWhite else 1
+        start: float = time.perf_counter()
+        notation: str = engines[engine].getMove()
+        seconds[engine] += time.perf_counter() - start
+        nodes[engine] += engines[engine].getNodeCount()
+        moves[engine] += 1
+        try:
+            code: int = notationToMove(notation)
+        except ValueError:
+            code = NO_MOVE
+        if code not in board.getLegalMoveCodes(board.sideToMove):
+            result = ("0-1" if board.sideToMove == PieceColor.WHITE else "1-0", f"illegal move {notation}")
+            break
+        board.makeMove(code, board.sideToMove)
+        plies += 1
+        key: int = board.zobristKey
+        repetitions[key] = repetitions.get(key, 0) + 1
+        result = gameResult(board, repetitions[key])
+    if result[0] == "1/2-1/2":
+        score: float = 0.5
+    else:
+        score: float = 1.0 if (result[0] == "1-0") == firstIsWhite else 0.0
+    return {"game": gameIdx,
+            "opening": opening,
+            "firstIsWhite": firstIsWhite,
+            "result": result[0],
+            "reason": result[1],
+            "score": score,
+            "plies": plies,
+            "nodes": nodes,
+            "seconds": seconds,
+            "moves": moves}
+
+# Elo difference of a score fraction, None at 0 or 1 where it is unbounded
+def eloDifference(score: float) -> Optional[float]:
+    if score <= 0.0 or score >= 1.0:
+        return None
+    return 400 * math.log10(score / (1 - score))
+
+# Wins, draws and losses of the first engine, its Elo difference with the 95% interval around it
+# from the spread of the game scores, and each engine's nodes per second and time per move. The
+# interval is None when the games say nothing about the spread: a single game, or all scores equal.
+def summarize(games: list[dict]) -> dict:
+    count: int = len(games)
+    wins: int = sum(1 for game in games if game["score"] == 1.0)
+    draws: int = sum(1 for game in games if game["score"] == 0.5)
+    losses: int = count - wins - draws
+    score: float = (wins + draws / 2) / count if count > 0 else 0.5
+    elo: Optional[float] = eloDifference(score)
+    margin: Optional[float] = None
+    deviation: float = math.sqrt(sum((game["score"] - score) ** 2 for game in games) / count) if count > 0 else 0.0
+    if elo is not None and count > 1 and deviation > 0:
+        spread: float = 1.96 * deviation / math.sqrt(count)
+        low: Optional[float] = eloDifference(score - spread)
+        high: Optional[float] = eloDifference(score + spread)
+        margin = (high - low) / 2 if low is not None and high is not None else None
+    engines: list[dict] = []
+    for engine in (0, 1):
+        nodes: int = sum(game["nodes"][engine] for game in games)
+        seconds: float = sum(game["seconds"][engine] for game in games)
+        moves: int = sum(game["moves"][engine] for game in games)
+        engines.append({"nodes": nodes,
+                        "nodesPerSecond": nodes / seconds if seconds > 0 else 0.0,
+                        "secondsPerMove": seconds / moves if moves > 0 else 0.0})
+    return {"games": count, "wins": wins, "draws": draws, "losses": losses, "score": score,
+            "elo": elo, "eloMargin": margin, "engines": engines}
+
+# Every opening is played twice with the colors swapped, over and over until games games are played.
+def runMatch(openings: list[str], firstConfig: tuple[str, dict], secondConfig: tuple[str, dict], games: int,
+             workers: Optional[int] = None, maxPlies: int = 200, outputPath: Optional[str] = None) -> list[dict]:
+    workers = workers if workers is not None else os.cpu_count() or 1
+    toRet: list[dict] = []
+    output = open(outputPath, "w") if outputPath is not None else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inFlight: set[Future] = set()
+        nextGame: int = 0
+        while nextGame < games or len(inFlight) > 0:
+            while nextGame < games and len(inFlight) < 2 * workers:
+                opening: str = openings[(nextGame // 2) % len(openings)]
+                inFlight.add(pool.submit(playGame, nextGame, opening, firstConfig, secondConfig, nextGame % 2 == 0, maxPlies))
+                nextGame += 1
+            finished, inFlight = wait(inFlight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                game: dict = future.result()
+                toRet.append(game)
+                if output is not None:
+                    output.write(json.dumps(game) + "\n")
+                    output.flush()
+                print(f"game {game['game']}: {game['result']} {game['reason']} after {game['plies']} plies", file=sys.stderr)
+    if output is not None:
+        output.close()
+    return toRet
+
+# openings are FENs or move lists like the analysis input, blank lines and # comments are skipped
+def readOpenings(path: str) -> list[str]:
+    toRet: list[str] = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if len(line) > 0 and not line.startswith("#"):
+                parsePosition(line)
+                toRet.append(line)
+    return toRet
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Play two agent configurations against each other")
+    parser.add_argument("first", help="agent configuration, e.g. pvs:depth=3 or pruning:time=0.1,table=8")
+    parser.add_argument("second", help="agent configuration to compare against")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--openings", help="one FEN or move list per line, the starting position by default")
+    parser.add_argument("--workers", type=int, help="games played at once, defaults to the CPU count")
+    parser.add_argument("--max-plies", type=int, default=200, help="plies after which a game is drawn")
+    parser.add_argument("--output", help="write every game as a JSON line")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+    firstConfig: tuple[str, dict] = parseConfig(args.first)
+    secondConfig: tuple[str, dict] = parseConfig(args.second)
+    openings: list[str] = readOpenings(args.openings) if args.openings is not None else [""]
+
+    start: float = time.perf_counter()
+    games: list[dict] = runMatch(openings, firstConfig, secondConfig, args.games, args.workers, args.max_plies, args.output)
+    summary: dict = summarize(games)
+    summary["seconds"] = time.perf_counter() - start
+    if args.json:
+        print(json.dumps(summary))
+        return 0
+    elo: str = "n/a" if summary["elo"] is None else f"{summary['elo']:+.1f}"
+    if summary["eloMargin"] is not None:
+        margin: str = f" +/- {summary['eloMargin']:.1f}"
+    else:
+        margin: str = "" if summary["elo"] is None else " +/- n/a"
+    print(f"{args.first} vs {args.second}: +{summary['wins']} ={summary['draws']} -{summary['losses']} "
+          f"score {summary['score']:.3f} Elo {elo}{margin} in {summary['seconds']:.1f}s")
+    for name, engine in zip((args.first, args.second), summary["engines"]):
+        print(f"{name}: {engine['nodesPerSecond']:.0f} nps, {engine['secondsPerMove'] * 1000:.1f} ms per move")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,73 @@
+from enum import Enum
+from typing import Optional
+import sys
+
+class Bound(Enum):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+class TranspositionEntry():
+    __slots__ = ("key", "depth", "score", "bound", "bestMove", "age")
+
+    def __init__(self, key: int, depth: int, score: int, bound: Bound, bestMove: int, age: int):
+        self.key: int = key
+        self.depth: int = depth
+        self.score: int = score
+        self.bound: Bound = bound
+        self.bestMove: int = bestMove
+        self.age: int = age
+
+# rough cost of one stored entry: the entry itself, its key, its move and the slot in the table
+ENTRY_BYTES: int = sys.getsizeof(TranspositionEntry(0, 0, 0, Bound.EXACT, 0, 0)) + sys.getsizeof(1 << 63) + sys.getsizeof(1 << 14) + 8
+
+class TranspositionTable():
+    def __init__(self, maxBytes: int = 16 * 1024 * 1024):
+        size: int = 1
+        while size * 2 * ENTRY_BYTES <= maxBytes:
+            size *= 2
+        self._mask: int = size - 1
+        self._entries: list[Optional[TranspositionEntry]] = [None] * size
+        self._age: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stores: int = 0
+        self.overwrites: int = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    # entries from older searches are replaced first
+    def newSearch(self) -> None:
+        self._age += 1
+    
+    def clear(self) -> None:
+        self._entries = [None] * len(self._entries)
+        self._age = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+    
+    def probe(self, key: int) -> Optional[TranspositionEntry]:
+        entry: Optional[TranspositionEntry] = self._entries[key & self._mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+    
+    # depth-preferred replacement, unless the stored entry is left over from an older search
+    def store(self, key: int, depth: int, score: int, bound: Bound, bestMove: int) -> None:
+        idx: int = key & self._mask
+        entry: Optional[TranspositionEntry] = self._entries[idx]
+        if entry is not None:
+            if entry.age == self._age and depth < entry.depth:
+                return
+            if entry.key != key:
+                self.overwrites += 1
+        self.stores += 1
+        self._entries[idx] = TranspositionEntry(key, depth, score, bound, bestMove, self._age)
+    
+    def usage(self) -> float:
+        return sum(1 for entry in self._entries if entry is not None) / len(self._entries)
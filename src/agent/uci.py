@@ -0,0 +1,262 @@
+from agent.minimax_agent import PruningAgent, PVSAgent
+from agent.opening_book import OpeningBook
+from agent.search_budget import MAX_SEARCH_DEPTH, SearchBudget
+from agent.transposition import TranspositionEntry
+from chess.board import ChessBoard
+from chess.movement import NO_MOVE, moveToNotation, notationToMove
+from chess.pieces import PieceColor
+from chess.tablebase import MAX_PLIES, Tablebase
+from typing import Callable, Optional, TextIO
+import queue
+import sys
+import threading
+import time
+
+ENGINE_NAME: str = "playchess"
+ENGINE_AUTHOR: str = "rraharjo"
+
+# PVSAgent driven by UCI commands: the position and the budget change with every go, the
+# transposition table, killers and history stay until ucinewgame. Every completed iteration is
+# reported through info.
+class UCIAgent(PVSAgent):
+    def __init__(self, info: Callable[[str], None], tableMegabytes: int = 16, book: Optional[OpeningBook] = None,
+                 tablebase: Optional[Tablebase] = None):
+        super().__init__(ChessBoard(), PieceColor.WHITE, tableMegabytes=tableMegabytes, book=book, tablebase=tablebase)
+        self._info: Callable[[str], None] = info
+
+    def setSearch(self, board: ChessBoard, budget: SearchBudget, maxDepth: int) -> None:
+        self._board = board
+        self._team = board.sideToMove
+        self._budget = budget
+        self._maxDepth = maxDepth
+
+    def _deepen(self, search: Callable[[int], tuple[int, int]], board: ChessBoard) -> tuple[int, int]:
+        def reported(depth: int) -> tuple[int, int]:
+            toRet: tuple[int, int] = search(depth)
+            seconds: float = time.perf_counter() - start
+            nodes: int = self._budget.nodes
+            pv: list[int] = self.principalVariation(toRet[0], depth)
+            # negamax scores are already from the side to move's point of view
+            self._info(f"info depth {depth} score {self.scoreText(toRet[1])} nodes {nodes} time {int(seconds * 1000)} "
+                       f"nps {int(nodes / seconds) if seconds > 0 else 0} pv {' '.join(moveToNotation(move) for move in pv)}")
+            return toRet
+        start: float = time.perf_counter()
+        return super()._deepen(reported, board)
+
+    # a book or tablebase answer is reported like a search that took no time
+    def _knownMove(self) -> Optional[tuple[int, int]]:
+        toRet: Optional[tuple[int, int]] = super()._knownMove()
+        if toRet is not None:
+            score: int = toRet[1] if self._team == PieceColor.WHITE else -toRet[1]
+            self._info(f"info depth 0 score {self.scoreText(score)} nodes 0 time 0 pv {moveToNotation(toRet[0])}")
+        return toRet
+
+    # The UCI score of a score from the side to move's point of view: the tablebase scores count
+    # down from TABLEBASE_WIN by the plies to mate and come out as mate in moves, negative when the
+    # side to move gets mated, the rest in centipawns.
+    def scoreText(self, score: int) -> str:
+        plies: int = PruningAgent.TABLEBASE_WIN - abs(score) // self._pawnValue
+        if plies <= MAX_PLIES:
+            moves: int = (plies + 1) // 2
+            return f"mate {moves if score > 0 else -moves}"
+        return f"cp {score * 100 // self._pawnValue}"
+
+    # the best move followed by the best moves the table holds for the positions after it
+    def principalVariation(self, move: int, maxLength: int) -> list[int]:
+        toRet: list[int] = []
+        board: ChessBoard = self._board.clone()
+        seen: set[int] = set()
+        while move != NO_MOVE and len(toRet) < maxLength and move in board.getLegalMoveCodes(board.sideToMove):
+            toRet.append(move)
+            board.makeMove(move, board.sideToMove)
+            if self._table is None or board.zobristKey in seen:
+                break
+            seen.add(board.zobristKey)
+            entry: Optional[TranspositionEntry] = self._table.probe(board.zobristKey)
+            move = entry.bestMove if entry is not None else NO_MOVE
+        return toRet
+
+# Speaks UCI on the given streams. A reader thread feeds the input lines to the command loop so
+# that stop and ponderhit get through while a search thread is busy; the search notices stop at
+# its next node through its SearchBudget.
+class UCIEngine():
+    # a move gets the remaining time over this many moves when the GUI does not say
+    MOVES_TO_GO: int = 30
+    # kept back on every move for the GUI and the pipes
+    MOVE_OVERHEAD: float = 0.05
+
+    def __init__(self, inputStream: TextIO = sys.stdin, outputStream: TextIO = sys.stdout):
+        self._input: TextIO = inputStream
+        self._output: TextIO = outputStream
+        self._outputLock: threading.Lock = threading.Lock()
+        self._lines: queue.Queue = queue.Queue()
+        self._tableMegabytes: int = 16
+        self._book: Optional[OpeningBook] = None
+        self._tablebase: Optional[Tablebase] = None
+        self._agent: Optional[UCIAgent] = None
+        self._board: ChessBoard = ChessBoard()
+        self._searchThread: Optional[threading.Thread] = None
+        self._budget: Optional[SearchBudget] = None
+        self._pondering: bool = False
+        self._ponderTime: Optional[float] = None
+        # infinite and ponder searches hold their best move back until stop, or ponderhit for the latter
+        self._mayReport: threading.Event = threading.Event()
+
+    def send(self, line: str) -> None:
+        with self._outputLock:
+            self._output.write(line + "\n")
+            self._output.flush()
+
+    def _read(self) -> None:
+        for line in self._input:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def run(self) -> None:
+        threading.Thread(target=self._read, daemon=True).start()
+        while True:
+            line: Optional[str] = self._lines.get()
+            if line is None or not self.handle(line):
+                break
+        self._stopSearch()
+
+    # handles one command line, False once the engine should quit
+    def handle(self, line: str) -> bool:
+        fields: list[str] = line.split()
+        if len(fields) == 0:
+            return True
+        command: str = fields[0]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Hash type spin default 16 min 0 max 4096")
+            self.send("option name Ponder type check default false")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name TablebaseDir type string default <empty>")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self._setOption(fields[1:])
+        elif command == "ucinewgame":
+            self._stopSearch()
+            self._agent = None
+        elif command == "position":
+            self._stopSearch()
+            try:
+                self._board = self._position(fields[1:])
+            except ValueError as e:
+                self.send(f"info string {e}")
+        elif command == "go":
+            self._stopSearch()
+            self._go(fields[1:])
+        elif command == "stop":
+            self._stopSearch()
+        elif command == "ponderhit":
+            self._ponderHit()
+        elif command == "quit":
+            return False
+        return True
+
+    def _setOption(self, fields: list[str]) -> None:
+        if "name" not in fields:
+            return
+        valueIdx: int = fields.index("value") if "value" in fields else len(fields)
+        name: str = " ".join(fields[fields.index("name") + 1:valueIdx]).lower()
+        value: str = " ".join(fields[valueIdx + 1:])
+        if name == "hash" and value.isdigit():
+            self._tableMegabytes = int(value)
+            self._agent = None
+        elif name == "bookfile":
+            self._book = OpeningBook(value) if value not in ("", "<empty>") else None
+            self._agent = None
+        elif name == "tablebasedir":
+            self._tablebase = Tablebase(value) if value not in ("", "<empty>") else None
+            self._agent = None
+
+    # position startpos|fen FEN [moves MOVE...]
+    def _position(self, fields: list[str]) -> ChessBoard:
+        movesIdx: int = fields.index("moves") if "moves" in fields else len(fields)
+        if len(fields) > 0 and fields[0] == "startpos":
+            toRet: ChessBoard = ChessBoard()
+        elif len(fields) > 0 and fields[0] == "fen":
+            toRet: ChessBoard = ChessBoard.fromFEN(" ".join(fields[1:movesIdx]))
+        else:
+            raise ValueError("position needs startpos or fen")
+        for notation in fields[movesIdx + 1:]:
+            code: int = notationToMove(notation)
+            if code not in toRet.getLegalMoveCodes(toRet.sideToMove):
+                raise ValueError(f"illegal move {notation}")
+            toRet.makeMove(code, toRet.sideToMove)
+        return toRet
+
+    # seconds for this move out of the clock, None when the GUI gives no clock
+    def _moveTime(self, options: dict[str, int]) -> Optional[float]:
+        if "movetime" in options:
+            return max(0.0, options["movetime"] / 1000 - UCIEngine.MOVE_OVERHEAD)
+        side: str = "w" if self._board.sideToMove == PieceColor.WHITE else "b"
+        if f"{side}time" not in options:
+            return None
+        remaining: float = options[f"{side}time"] / 1000
+        increment: float = options.get(f"{side}inc", 0) / 1000
+        movesToGo: int = options.get("movestogo", UCIEngine.MOVES_TO_GO)
+        toRet: float = remaining / max(1, movesToGo) + increment * 0.8
+        return max(0.0, min(toRet, remaining / 2) - UCIEngine.MOVE_OVERHEAD)
+
+    # go [ponder] [infinite] [depth D] [nodes N] [movetime MS] [wtime MS] [btime MS] [winc MS] [binc MS] [movestogo N]
+    def _go(self, fields: list[str]) -> None:
+        options: dict[str, int] = {}
+        for idx in range(len(fields) - 1):
+            if fields[idx] in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo") and fields[idx + 1].isdigit():
+                options[fields[idx]] = int(fields[idx + 1])
+        timeLimit: Optional[float] = self._moveTime(options)
+        self._pondering = "ponder" in fields
+        infinite: bool = "infinite" in fields or self._pondering
+        self._ponderTime = timeLimit
+        # every search can be stopped, so every search deepens iteratively
+        self._budget = SearchBudget(None if infinite else timeLimit, options.get("nodes"), untilStopped=True)
+        if self._agent is None:
+            self._agent = UCIAgent(self.send, self._tableMegabytes, self._book, self._tablebase)
+        self._agent.setSearch(self._board.clone(), self._budget, options.get("depth", MAX_SEARCH_DEPTH))
+        self._mayReport.clear()
+        if not infinite:
+            self._mayReport.set()
+        self._searchThread = threading.Thread(target=self._search, args=(self._agent, self._board), daemon=True)
+        self._searchThread.start()
+
+    def _search(self, agent: UCIAgent, board: ChessBoard) -> None:
+        move, _ = agent.analyze()
+        self._mayReport.wait()
+        pv: list[int] = agent.principalVariation(move, 2)
+        if len(pv) == 0:
+            # the null move only when there is nothing else to play, GUIs take it as a forfeit
+            legalMoves: list[int] = board.getLegalMoveCodes(board.sideToMove)
+            self.send(f"bestmove {moveToNotation(legalMoves[0]) if len(legalMoves) > 0 else '0000'}")
+        elif len(pv) == 1:
+            self.send(f"bestmove {moveToNotation(pv[0])}")
+        else:
+            self.send(f"bestmove {moveToNotation(pv[0])} ponder {moveToNotation(pv[1])}")
+
+    # the ponder move was played, the search goes on as the real one with the clock it was given
+    def _ponderHit(self) -> None:
+        if self._searchThread is None or not self._pondering:
+            return
+        self._pondering = False
+        self._budget.restartClock(self._ponderTime)
+        self._mayReport.set()
+
+    def _stopSearch(self) -> None:
+        if self._searchThread is None:
+            return
+        self._budget.stop()
+        self._pondering = False
+        self._mayReport.set()
+        self._searchThread.join()
+        self._searchThread = None
+
+def main(argv: list[str]) -> int:
+    UCIEngine().run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+from agent.batch_scorer import BatchScorer, np
+from agent.minimax_agent import PruningAgent
+from agent.scorer import BoardScorer, PruningScorer, SimpleScorer
+from chess.board import ChessBoard
+from chess.perft import STANDARD_POSITIONS
+from chess.pieces import ChessPiece, PieceColor, PieceType
+from chess.movement import Move
+from typing import Callable, Optional
+import argparse
+import cProfile
+import json
+import platform
+import pstats
+import sys
+import time
+import timeit
+import tracemalloc
+
+# Each benchmark builds, for one position, a function doing a batch of calls of the primitive and
+# the number of calls in the batch, or None when the position has nothing to call it on.
+Benchmark = Callable[[ChessBoard], Optional[tuple[Callable[[], None], int]]]
+
+def _legalMoves(pieceType: PieceType) -> Benchmark:
+    def setup(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+        pieces: list[ChessPiece] = [piece for piece in board.whitePieces + board.blackPieces if piece._type == pieceType]
+        if len(pieces) == 0:
+            return None
+        def run() -> None:
+            for piece in pieces:
+                piece.legal_moves()
+        return (run, len(pieces))
+    return setup
+
+# every legal move of the side to move played and taken back
+def _moveUnMove(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+    color: PieceColor = board.sideToMove
+    codes: list[int] = board.getLegalMoveCodes(color)
+    if len(codes) == 0:
+        return None
+    def run() -> None:
+        for code in codes:
+            curMove: Move = board.makeMove(code, color)
+            board.unMove(curMove)
+    return (run, len(codes))
+
+def _isCheck(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+    def run() -> None:
+        board.isCheck(PieceColor.WHITE)
+        board.isCheck(PieceColor.BLACK)
+    return (run, 2)
+
+def _getPiecesMoves(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+    return (lambda: board.getPiecesMoves(board.sideToMove), 1)
+
+def _legalMoveCodes(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+    return (lambda: board.getLegalMoveCodes(board.sideToMove), 1)
+
+def _clone(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+    return (board.clone, 1)
+
+def _scorer(scorer: BoardScorer, rescan: bool) -> Benchmark:
+    def setup(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+        method: Callable[[ChessBoard, PieceColor], int] = scorer.rescan if rescan else scorer.score
+        return (lambda: method(board, board.sideToMove), 1)
+    return setup
+
+# a depth 3 search scoring its leaves with a BatchScorer, in batches or one at a time
+def _batchedSearch(batchLeaves: bool) -> Benchmark:
+    def setup(board: ChessBoard) -> Optional[tuple[Callable[[], None], int]]:
+        scorer: BatchScorer = BatchScorer()
+        def run() -> None:
+            PruningAgent(board, board.sideToMove, tableMegabytes=1, maxDepth=3, batchScorer=scorer,
+                         batchLeaves=batchLeaves).analyze()
+        return (run, 1)
+    return setup
+
+BENCHMARKS: dict[str, Benchmark] = {
+    **{f"legal_moves.{pieceType.name.lower()}": _legalMoves(pieceType) for pieceType in PieceType},
+    "makeMove/unMove": _moveUnMove,
+    "isCheck": _isCheck,
+    "getPiecesMoves": _getPiecesMoves,
+    "getLegalMoveCodes": _legalMoveCodes,
+    "clone": _clone,
+    "SimpleScorer.score": _scorer(SimpleScorer(), False),
+    "SimpleScorer.rescan": _scorer(SimpleScorer(), True),
+    "PruningScorer.score": _scorer(PruningScorer(), False),
+    "PruningScorer.rescan": _scorer(PruningScorer(), True),
+}
+# numpy is optional, without it the batch scoring benchmarks are left out
+if np is not None:
+    BENCHMARKS["search.batchedLeaves"] = _batchedSearch(True)
+    BENCHMARKS["search.perLeaf"] = _batchedSearch(False)
+
+# Times every selected benchmark on every position. A batch is repeated until it runs for about
+# 0.2 seconds, that measurement is repeated and the fastest one kept, as timeit recommends.
+# With memory, each batch is run once more under tracemalloc for its peak allocation.
+def runBenchmarks(names: list[str], positions: list[tuple[str, str, list[int]]] = STANDARD_POSITIONS,
+                  repeat: int = 5, memory: bool = False) -> list[dict]:
+    toRet: list[dict] = []
+    for name in names:
+        for positionName, fen, _ in positions:
+            board: ChessBoard = ChessBoard.fromFEN(fen)
+            setup: Optional[tuple[Callable[[], None], int]] = BENCHMARKS[name](board)
+            if setup is None:
+                continue
+            run, calls = setup
+            timer: timeit.Timer = timeit.Timer(run)
+            number: int = timer.autorange()[0]
+            best: float = min(timer.repeat(repeat, number)) / number
+            result: dict = {"benchmark": name,
+                            "position": positionName,
+                            "calls": calls,
+                            "secondsPerCall": best / calls}
+            if memory:
+                tracemalloc.start()
+                run()
+                result["peakBytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            toRet.append(result)
+    return toRet
+
+# Benchmarks that got slower than the baseline by more than threshold, a fraction of the baseline
+# time, as (benchmark, position, baseline seconds, current seconds). Entries missing on either side are skipped.
+def compareResults(results: list[dict], baseline: list[dict], threshold: float) -> list[tuple[str, str, float, float]]:
+    previous: dict[tuple[str, str], float] = {(result["benchmark"], result["position"]): result["secondsPerCall"]
+                                              for result in baseline}
+    toRet: list[tuple[str, str, float, float]] = []
+    for result in results:
+        before: Optional[float] = previous.get((result["benchmark"], result["position"]))
+        if before is not None and result["secondsPerCall"] > before * (1 + threshold):
+            toRet.append((result["benchmark"], result["position"], before, result["secondsPerCall"]))
+    return toRet
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Time the move generation, board and scoring primitives")
+    parser.add_argument("--filter", help="only run the benchmarks whose name contains this")
+    parser.add_argument("--fen", help="run a single position instead of the standard ones")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements per benchmark, the fastest is kept")
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    parser.add_argument("--save", help="write the JSON document to this file, to use as a baseline later")
+    parser.add_argument("--baseline", help="compare against a document written by --save")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown over the baseline that counts as a regression")
+    parser.add_argument("--profile", help="run under cProfile and write the stats to this file, the timings are inflated by it")
+    parser.add_argument("--memory", action="store_true", help="record the peak allocation of each benchmark with tracemalloc")
+    args = parser.parse_args(argv)
+
+    names: list[str] = [name for name in BENCHMARKS if args.filter is None or args.filter in name]
+    positions: list[tuple[str, str, list[int]]] = STANDARD_POSITIONS if args.fen is None else [("fen", args.fen, [])]
+    profiler: Optional[cProfile.Profile] = cProfile.Profile() if args.profile is not None else None
+    if profiler is not None:
+        profiler.enable()
+    results: list[dict] = runBenchmarks(names, positions, args.repeat, args.memory)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(20)
+
+    document: dict = {"timestamp": time.time(),
+                      "python": platform.python_version(),
+                      "machine": platform.machine(),
+                      "results": results}
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(document, file, indent=1)
+    if args.json:
+        print(json.dumps(document))
+    else:
+        for result in results:
+            memory: str = f" {result['peakBytes']:>9} B peak" if "peakBytes" in result else ""
+            print(f"{result['benchmark']:<22} {result['position']:<12} {result['secondsPerCall'] * 1e6:10.2f} us{memory}")
+
+    regressions: list[tuple[str, str, float, float]] = []
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = compareResults(results, json.load(file)["results"], args.threshold)
+        for name, position, before, after in regressions:
+            print(f"REGRESSION {name} {position}: {before * 1e6:.2f} us -> {after * 1e6:.2f} us "
+                  f"({after / before - 1:+.0%})", file=sys.stderr)
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
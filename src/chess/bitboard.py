@@ -0,0 +1,132 @@
+FULL: int = (1 << 64) - 1
+RANK_3: int = 0xFF << 16
+RANK_6: int = 0xFF << 40
+FILE_A: int = 0x0101010101010101
+FILE_H: int = FILE_A << 7
+
+def _onBoard(row: int, col: int) -> bool:
+    return 0 <= row < 8 and 0 <= col < 8
+
+def _stepTable(deltas: list[tuple[int, int]]) -> list[int]:
+    toRet: list[int] = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        attacks: int = 0
+        for dr, dc in deltas:
+            if _onBoard(row + dr, col + dc):
+                attacks |= 1 << ((row + dr) * 8 + col + dc)
+        toRet.append(attacks)
+    return toRet
+
+def _rayTable(dr: int, dc: int) -> list[int]:
+    toRet: list[int] = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        ray: int = 0
+        r, c = row + dr, col + dc
+        while _onBoard(r, c):
+            ray |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
+        toRet.append(ray)
+    return toRet
+
+KNIGHT_ATTACKS: list[int] = _stepTable([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS: list[int] = _stepTable([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+# indexed by color value, the squares a pawn of that color attacks from a square
+PAWN_ATTACKS: list[list[int]] = [_stepTable([(1, -1), (1, 1)]), _stepTable([(-1, -1), (-1, 1)])]
+
+# rays going towards higher indexes stop at their lowest blocker, the others at their highest
+NORTH_RAYS: list[int] = _rayTable(1, 0)
+EAST_RAYS: list[int] = _rayTable(0, 1)
+NORTHEAST_RAYS: list[int] = _rayTable(1, 1)
+NORTHWEST_RAYS: list[int] = _rayTable(1, -1)
+SOUTH_RAYS: list[int] = _rayTable(-1, 0)
+WEST_RAYS: list[int] = _rayTable(0, -1)
+SOUTHEAST_RAYS: list[int] = _rayTable(-1, 1)
+SOUTHWEST_RAYS: list[int] = _rayTable(-1, -1)
+
+def _lineTables() -> tuple[list[list[int]], list[list[int]]]:
+    between: list[list[int]] = [[0] * 64 for _ in range(64)]
+    line: list[list[int]] = [[0] * 64 for _ in range(64)]
+    for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1)]:
+        forward: list[int] = _rayTable(dr, dc)
+        backward: list[int] = _rayTable(-dr, -dc)
+        for sq in range(64):
+            fullLine: int = forward[sq] | backward[sq] | (1 << sq)
+            row, col = divmod(sq, 8)
+            passed: int = 0
+            r, c = row + dr, col + dc
+            while _onBoard(r, c):
+                target: int = r * 8 + c
+                between[sq][target] = passed
+                line[sq][target] = fullLine
+                passed |= 1 << target
+                r += dr
+                c += dc
+    return between, line
+
+# BETWEEN[a][b] holds the squares strictly between two aligned squares, LINE[a][b] the whole line through them
+BETWEEN, LINE = _lineTables()
+
+def rookAttacks(sq: int, occupied: int) -> int:
+    toRet: int = 0
+    ray: int = NORTH_RAYS[sq]
+    blockers: int = ray & occupied
+    if blockers:
+        ray ^= NORTH_RAYS[(blockers & -blockers).bit_length() - 1]
+    toRet |= ray
+    ray = EAST_RAYS[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= EAST_RAYS[(blockers & -blockers).bit_length() - 1]
+    toRet |= ray
+    ray = SOUTH_RAYS[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= SOUTH_RAYS[blockers.bit_length() - 1]
+    toRet |= ray
+    ray = WEST_RAYS[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= WEST_RAYS[blockers.bit_length() - 1]
+    return toRet | ray
+
+def bishopAttacks(sq: int, occupied: int) -> int:
+    toRet: int = 0
+    ray: int = NORTHEAST_RAYS[sq]
+    blockers: int = ray & occupied
+    if blockers:
+        ray ^= NORTHEAST_RAYS[(blockers & -blockers).bit_length() - 1]
+    toRet |= ray
+    ray = NORTHWEST_RAYS[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= NORTHWEST_RAYS[(blockers & -blockers).bit_length() - 1]
+    toRet |= ray
+    ray = SOUTHEAST_RAYS[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= SOUTHEAST_RAYS[blockers.bit_length() - 1]
+    toRet |= ray
+    ray = SOUTHWEST_RAYS[sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= SOUTHWEST_RAYS[blockers.bit_length() - 1]
+    return toRet | ray
+
+def queenAttacks(sq: int, occupied: int) -> int:
+    return rookAttacks(sq, occupied) | bishopAttacks(sq, occupied)
+
+def pawnAttacks(pawns: int, color: int) -> int:
+    if color == 0:
+        return (((pawns & ~FILE_A) << 7) | ((pawns & ~FILE_H) << 9)) & FULL
+    return ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7)
+
+def squares(bitboard: int) -> list[int]:
+    toRet: list[int] = []
+    while bitboard:
+        lsb: int = bitboard & -bitboard
+        toRet.append(lsb.bit_length() - 1)
+        bitboard ^= lsb
+    return toRet
@@ -1,16 +1,56 @@
 from typing import Optional
-from copy import deepcopy
 from chess.pieces import *
 from chess.movement import Move
-from chess.utils import idxToChessNotation
+from chess.snapshot import PositionSnapshot
+from chess.utils import idxToChessNotation, chessNotationToIdx
+from chess.zobrist import PIECE_KEYS, BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, WHITE_SHORT, WHITE_LONG, BLACK_SHORT, BLACK_LONG, CASTLING_SQUARES
+from chess.bitboard import FULL, RANK_3, RANK_6, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE, rookAttacks, bishopAttacks, pawnAttacks
 
 BOARD_W = 8
+# bitboards are indexed by color.value * 6 + type.value
+_PAWN: int = PieceType.PAWN.value
+_ROOK: int = PieceType.ROOK.value
+_KNIGHT: int = PieceType.KNIGHT.value
+_BISHOP: int = PieceType.BISHOP.value
+_QUEEN: int = PieceType.QUEEN.value
+_KING: int = PieceType.KING.value
+_NOTATION: list[str] = [idxToChessNotation(i) for i in range(BOARD_W * BOARD_W)]
+# indexed by type.value
+_PIECE_CLASSES: list[type] = [Pawn, Rook, Knight, Bishop, Queen, King]
+_FEN_LETTERS: str = "prnbqk"
+_FEN_CASTLING: list[tuple[str, int]] = [("K", WHITE_SHORT), ("Q", WHITE_LONG), ("k", BLACK_SHORT), ("q", BLACK_LONG)]
+STARTING_FEN: str = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+# material value indexed by type.value, and the same signed for white and black by bitboard index
+MATERIAL_VALUES: list[int] = [1, 5, 3, 3, 9, 0]
+_SIGNED_MATERIAL: list[int] = MATERIAL_VALUES + [-value for value in MATERIAL_VALUES]
+_PROMOTIONS: list[int] = [PieceType.QUEEN.value << 12, PieceType.ROOK.value << 12, PieceType.BISHOP.value << 12, PieceType.KNIGHT.value << 12]
+
 class ChessBoard:
+    # cross-check the fast paths against their slow reference implementations
+    debug: bool = False
+
     def __init__(self):
         self.curNumOfMove: int = 0
         self.whitePieces: list[ChessPiece] = []
         self.blackPieces: list[ChessPiece] = []
         self._board: list[Optional[ChessPiece]] = [None] * (BOARD_W * BOARD_W)
+        self._pieceBB: list[int] = [0] * 12
+        self._colorBB: list[int] = [0, 0]
+        self.sideToMove: PieceColor = PieceColor.WHITE
+        # moves since the last capture or pawn move, and the move number that goes up after black moves
+        self.halfMoveClock: int = 0
+        self.fullMoveNumber: int = 1
+        # the pawn that can currently be taken en passant, the castling rights mask and the
+        # en passant file that is part of the hash, all restored on unMove from _stateHistory
+        self._enPassantPawn: Optional[Pawn] = None
+        self._castlingRights: int = 0
+        self._enPassantFile: int = -1
+        self._zobristKey: int = 0
+        # white material minus black material
+        self._material: int = 0
+        # squares attacked by each color in the current position, -1 until computed, dropped whenever a piece moves
+        self._attacks: list[int] = [-1, -1]
+        self._stateHistory: list[tuple[Optional[Pawn], int, int, PieceColor, int, int, int]] = []
 
         # White back rank (row 0)
         self._board[0] = Rook(self, PieceColor.WHITE, 0)
@@ -42,129 +82,645 @@ class ChessBoard:
         
         for i in range(0, 16):
             if self._board[i] is not None:
-                self.whitePieces.append(self._board[i])
+                self._addPiece(self._board[i])
         for i in range(48, 64):
             if self._board[i] is not None:
-                self.blackPieces.append(self._board[i])
+                self._addPiece(self._board[i])
+        self._syncPositionState()
+    
+    # rebuilds everything that is otherwise kept up to date incrementally from _board and the pieces
+    def _syncPositionState(self) -> None:
+        self._pieceBB = [0] * 12
+        self._colorBB = [0, 0]
+        self._zobristKey = 0
+        self._material = 0
+        self._attacks = [-1, -1]
+        for i in range(64):
+            if self._board[i] is not None:
+                self._toggleBitboard(self._board[i], i)
+        self._castlingRights = self._computeCastlingRights()
+        self._enPassantFile = self._computeEnPassantFile()
+        self._zobristKey = self.computeZobristKey()
+    
+    # The piece lists are unordered, a piece knows its index so that taking it out swaps the last
+    # piece into its place instead of searching and shifting the list.
+    def _addPiece(self, piece: ChessPiece) -> None:
+        pieces: list[ChessPiece] = self.whitePieces if piece._color == PieceColor.WHITE else self.blackPieces
+        piece._listIdx = len(pieces)
+        pieces.append(piece)
+    
+    def _removePiece(self, piece: ChessPiece) -> None:
+        pieces: list[ChessPiece] = self.whitePieces if piece._color == PieceColor.WHITE else self.blackPieces
+        last: ChessPiece = pieces.pop()
+        if last is not piece:
+            pieces[piece._listIdx] = last
+            last._listIdx = piece._listIdx
+        piece._listIdx = -1
+    
+    # adds the piece to the bitboards, the hash and the material if it is not there, removes it otherwise
+    def _toggleBitboard(self, piece: ChessPiece, idx: int) -> None:
+        bit: int = 1 << idx
+        pieceIdx: int = piece._color.value * 6 + piece._type.value
+        self._pieceBB[pieceIdx] ^= bit
+        self._colorBB[piece._color.value] ^= bit
+        self._zobristKey ^= PIECE_KEYS[pieceIdx][idx]
+        if self._pieceBB[pieceIdx] & bit:
+            self._material += _SIGNED_MATERIAL[pieceIdx]
+        else:
+            self._material -= _SIGNED_MATERIAL[pieceIdx]
+    
+    def _computeCastlingRights(self) -> int:
+        toRet: int = 0
+        for color, kingPos, shortRight, longRight in ((PieceColor.WHITE, 4, WHITE_SHORT, WHITE_LONG),
+                                                      (PieceColor.BLACK, 60, BLACK_SHORT, BLACK_LONG)):
+            king: Optional[ChessPiece] = self._board[kingPos]
+            if not isinstance(king, King) or king._color != color or king._numOfMove != 0:
+                continue
+            for rookPos, right in ((kingPos + 3, shortRight), (kingPos - 4, longRight)):
+                rook: Optional[ChessPiece] = self._board[rookPos]
+                if isinstance(rook, Rook) and rook._color == color and rook._numOfMove == 0:
+                    toRet |= right
+        return toRet
+    
+    # the file only counts when a pawn is actually able to take en passant
+    def _computeEnPassantFile(self) -> int:
+        pawn: Optional[Pawn] = self._enPassantPawn
+        if pawn is None:
+            return -1
+        color: int = pawn._color.value
+        target: int = pawn._position - 8 if color == 0 else pawn._position + 8
+        if PAWN_ATTACKS[color][target] & self._pieceBB[(1 - color) * 6 + _PAWN]:
+            return target & 7
+        return -1
+    
+    def computeZobristKey(self) -> int:
+        toRet: int = 0
+        for i in range(64):
+            piece: Optional[ChessPiece] = self._board[i]
+            if piece is not None:
+                toRet ^= PIECE_KEYS[piece._color.value * 6 + piece._type.value][i]
+        if self.sideToMove == PieceColor.BLACK:
+            toRet ^= BLACK_TO_MOVE_KEY
+        toRet ^= CASTLING_KEYS[self._computeCastlingRights()]
+        enPassantFile: int = self._computeEnPassantFile()
+        if enPassantFile >= 0:
+            toRet ^= EN_PASSANT_KEYS[enPassantFile]
+        return toRet
+    
+    @property
+    def zobristKey(self) -> int:
+        return self._zobristKey
+    
+    def computeMaterial(self) -> int:
+        toRet: int = 0
+        for piece in self._board:
+            if piece is not None:
+                toRet += _SIGNED_MATERIAL[piece._color.value * 6 + piece._type.value]
+        return toRet
+    
+    # white material minus black material, kept up to date by move, promote and unMove
+    @property
+    def material(self) -> int:
+        return self._material
     
     def move(self, move: Move) -> None:
         self.curNumOfMove += 1
-        move.piece = self._board[move.src]
-        moveType: MoveType = move.piece.move(move.dst)
+        self._attacks = [-1, -1]
+        self._stateHistory.append((self._enPassantPawn, self._castlingRights, self._enPassantFile, self.sideToMove,
+                                   self._zobristKey, self.halfMoveClock, self.fullMoveNumber))
+        piece: ChessPiece = self._board[move.src]
+        move.piece = piece
+        moveType: MoveType = piece.move(move.dst)
         move.moveType = moveType
-        opponentPieces: list[ChessPiece] = self.blackPieces if move.color == PieceColor.WHITE else self.whitePieces
         
-        if moveType == MoveType.REGULAR or moveType == MoveType.ROOKFIRSTMOVE or moveType == MoveType.KINGFIRSTMOVE or moveType == MoveType.PROMOTION:
-            move.captured = self._board[move.dst]
-        elif moveType == MoveType.PAWNFIRSTMOVE:
-            move.captured = self._board[move.dst]
-            definitelyPawn: Pawn = move.piece
-            if definitelyPawn.enPassable:
-                definitelyPawn.enPassableAt = self.curNumOfMove + 1
-        elif moveType == MoveType.ENPASSANT:
-            if move.piece._color == PieceColor.WHITE:
+        if moveType == MoveType.ENPASSANT:
+            if piece._color == PieceColor.WHITE:
                 move.captured = self._board[move.dst - 8]
                 self._board[move.dst - 8] = None
             else:
                 move.captured = self._board[move.dst + 8]
                 self._board[move.dst + 8] = None
-        elif moveType == MoveType.CASTLESHORT:
-            self._board[move.src + 3].move(move.src + 1)
-            self._board[move.src + 1] = self._board[move.src + 3]
-            self._board[move.src + 3] = None
-        elif moveType == MoveType.CASTLELONG:
-            self._board[move.src - 4].move(move.src - 1)
-            self._board[move.src - 1] = self._board[move.src - 4]
-            self._board[move.src - 4] = None
+        else:
+            move.captured = self._board[move.dst]
+            if moveType == MoveType.CASTLESHORT:
+                rook: Rook = self._board[move.src + 3]
+                rook.move(move.src + 1)
+                self._toggleBitboard(rook, move.src + 3)
+                self._toggleBitboard(rook, move.src + 1)
+                self._board[move.src + 1] = rook
+                self._board[move.src + 3] = None
+            elif moveType == MoveType.CASTLELONG:
+                rook: Rook = self._board[move.src - 4]
+                rook.move(move.src - 1)
+                self._toggleBitboard(rook, move.src - 4)
+                self._toggleBitboard(rook, move.src - 1)
+                self._board[move.src - 1] = rook
+                self._board[move.src - 4] = None
         
         if move.captured is not None:
-            opponentPieces.remove(move.captured)
+            self._removePiece(move.captured)
+            self._toggleBitboard(move.captured, move.captured._position)
 
-        self._board[move.dst] = self._board[move.src]
+        self._toggleBitboard(piece, move.src)
+        self._toggleBitboard(piece, move.dst)
+        self._board[move.dst] = piece
         self._board[move.src] = None
         
-        for piece in opponentPieces:
-            if piece._type == PieceType.PAWN:
-                pawn: Pawn = piece
-                pawn.enPassable = False
+        if self._enPassantPawn is not None:
+            self._enPassantPawn.enPassable = False
+            self._enPassantPawn = None
+        if moveType == MoveType.PAWNFIRSTMOVE and piece.enPassable:
+            self._enPassantPawn = piece
+        
+        key: int = self._zobristKey
+        if self._enPassantFile >= 0:
+            key ^= EN_PASSANT_KEYS[self._enPassantFile]
+        self._enPassantFile = self._computeEnPassantFile()
+        if self._enPassantFile >= 0:
+            key ^= EN_PASSANT_KEYS[self._enPassantFile]
+        if ((1 << move.src) | (1 << move.dst)) & CASTLING_SQUARES:
+            castlingRights: int = self._computeCastlingRights()
+            key ^= CASTLING_KEYS[self._castlingRights] ^ CASTLING_KEYS[castlingRights]
+            self._castlingRights = castlingRights
+        if piece._type == PieceType.PAWN or move.captured is not None:
+            self.halfMoveClock = 0
+        else:
+            self.halfMoveClock += 1
+        if move.color == PieceColor.BLACK:
+            self.fullMoveNumber += 1
+        nextSide: PieceColor = PieceColor.BLACK if move.color == PieceColor.WHITE else PieceColor.WHITE
+        if nextSide != self.sideToMove:
+            key ^= BLACK_TO_MOVE_KEY
+            self.sideToMove = nextSide
+        self._zobristKey = key
+        if self.debug:
+            assert key == self.computeZobristKey(), "incremental zobrist key is out of sync after move"
+            assert self._material == self.computeMaterial(), "incremental material is out of sync after move"
             
+
     def promote(self, move: Move) -> None:
-        curTeam: list[ChessPiece] = self.whitePieces if move.color == PieceColor.WHITE else self.blackPieces
-        curTeam.append(move.promotion)
-        curTeam.remove(move.piece)
+        self._addPiece(move.promotion)
+        self._removePiece(move.piece)
+        self._attacks = [-1, -1]
+        self._toggleBitboard(move.piece, move.piece._position)
+        self._toggleBitboard(move.promotion, move.piece._position)
         self._board[move.piece._position] = move.promotion
+        if self.debug:
+            assert self._zobristKey == self.computeZobristKey(), "incremental zobrist key is out of sync after promote"
+            assert self._material == self.computeMaterial(), "incremental material is out of sync after promote"
     
     def unMove(self, move: Move) -> None:
-        if self.curNumOfMove == 0:
+        # a restored or cloned board keeps its move number but not the moves before it
+        if len(self._stateHistory) == 0:
             raise ValueError("No movements have been made")
-        opponentPieces: list[ChessPiece] = self.blackPieces if move.color == PieceColor.WHITE else self.whitePieces
-        playerPieces: list[ChessPiece] = self.blackPieces if move.color == PieceColor.BLACK else self.whitePieces
-        if move.moveType == MoveType.PROMOTION:
-            self._board[move.dst] = move.piece
-            if move.promotion is not None:
-                playerPieces.append(move.piece)
-                playerPieces.remove(move.promotion)
-        self._board[move.dst].unMove(move.src)
+        self._attacks = [-1, -1]
+        piece: ChessPiece = move.piece
+        if move.moveType == MoveType.PROMOTION and move.promotion is not None:
+            self._addPiece(piece)
+            self._removePiece(move.promotion)
+            self._toggleBitboard(move.promotion, move.dst)
+            self._toggleBitboard(piece, move.dst)
+        piece.unMove(move.src)
         if move.moveType == MoveType.CASTLESHORT:
             definitelyRook: Rook = self._board[move.dst - 1]
             definitelyRook.unMove(definitelyRook._position + 2)
+            self._toggleBitboard(definitelyRook, move.dst - 1)
+            self._toggleBitboard(definitelyRook, definitelyRook._position)
             self._board[definitelyRook._position] = definitelyRook
             self._board[move.dst - 1] = None
         elif move.moveType == MoveType.CASTLELONG:
             definitelyRook: Rook = self._board[move.dst + 1]
             definitelyRook.unMove(definitelyRook._position - 3)
+            self._toggleBitboard(definitelyRook, move.dst + 1)
+            self._toggleBitboard(definitelyRook, definitelyRook._position)
             self._board[definitelyRook._position] = definitelyRook
             self._board[move.dst + 1] = None
             
-        self._board[move.src] = self._board[move.dst]
+        self._toggleBitboard(piece, move.dst)
+        self._toggleBitboard(piece, move.src)
+        self._board[move.src] = piece
         self._board[move.dst] = None
         if move.captured is not None:
             self._board[move.captured._position] = move.captured
-            if move.captured._color == PieceColor.WHITE:
-                self.whitePieces.append(move.captured)
-            else:
-                self.blackPieces.append(move.captured)
-                
-        for piece in opponentPieces:
-            if piece._type == PieceType.PAWN:
-                definitelyPawn: Pawn = piece
-                if definitelyPawn.enPassableAt == self.curNumOfMove:
-                    definitelyPawn.enPassable = True
+            self._toggleBitboard(move.captured, move.captured._position)
+            self._addPiece(move.captured)
                 
-        for piece in playerPieces:
-            if piece._type == PieceType.PAWN:
-                definitelyPawn: Pawn = piece
-                if definitelyPawn.enPassable == self.curNumOfMove:
-                    definitelyPawn.enPassableAt = -1
+        if self._enPassantPawn is not None:
+            self._enPassantPawn.enPassable = False
+        (self._enPassantPawn, self._castlingRights, self._enPassantFile, self.sideToMove,
+         self._zobristKey, self.halfMoveClock, self.fullMoveNumber) = self._stateHistory.pop()
+        if self._enPassantPawn is not None:
+            self._enPassantPawn.enPassable = True
         self.curNumOfMove -= 1
-        
-        
+        if self.debug:
+            assert self._zobristKey == self.computeZobristKey(), "incremental zobrist key is out of sync after unMove"
+            assert self._material == self.computeMaterial(), "incremental material is out of sync after unMove"
+    
+    # passes the turn without moving, for null-move pruning; undone by unMakeNullMove
+    def makeNullMove(self) -> None:
+        self.curNumOfMove += 1
+        self._stateHistory.append((self._enPassantPawn, self._castlingRights, self._enPassantFile, self.sideToMove,
+                                   self._zobristKey, self.halfMoveClock, self.fullMoveNumber))
+        key: int = self._zobristKey ^ BLACK_TO_MOVE_KEY
+        if self._enPassantPawn is not None:
+            self._enPassantPawn.enPassable = False
+            self._enPassantPawn = None
+        if self._enPassantFile >= 0:
+            key ^= EN_PASSANT_KEYS[self._enPassantFile]
+            self._enPassantFile = -1
+        self.halfMoveClock += 1
+        if self.sideToMove == PieceColor.BLACK:
+            self.fullMoveNumber += 1
+        self.sideToMove = PieceColor.BLACK if self.sideToMove == PieceColor.WHITE else PieceColor.WHITE
+        self._zobristKey = key
+        if self.debug:
+            assert key == self.computeZobristKey(), "incremental zobrist key is out of sync after a null move"
+    
+    def unMakeNullMove(self) -> None:
+        if len(self._stateHistory) == 0:
+            raise ValueError("No movements have been made")
+        (self._enPassantPawn, self._castlingRights, self._enPassantFile, self.sideToMove,
+         self._zobristKey, self.halfMoveClock, self.fullMoveNumber) = self._stateHistory.pop()
+        if self._enPassantPawn is not None:
+            self._enPassantPawn.enPassable = True
+        self.curNumOfMove -= 1
+    
+    # whether the color has anything besides its king and pawns, positions without are prone to zugzwang
+    def hasNonPawnMaterial(self, color: PieceColor) -> bool:
+        base: int = color.value * 6
+        return (self._pieceBB[base + _ROOK] | self._pieceBB[base + _KNIGHT] | self._pieceBB[base + _BISHOP]
+                | self._pieceBB[base + _QUEEN]) != 0
+    
+    # check if a square is attacked by any piece of the given color
+    def isAttacked(self, idx: int, byColor: PieceColor) -> bool:
+        return self._isAttacked(idx, byColor.value, self._colorBB[0] | self._colorBB[1])
+    
+    def _isAttacked(self, idx: int, byColor: int, occupied: int) -> bool:
+        base: int = byColor * 6
+        pieceBB: list[int] = self._pieceBB
+        if PAWN_ATTACKS[1 - byColor][idx] & pieceBB[base + _PAWN]:
+            return True
+        if KNIGHT_ATTACKS[idx] & pieceBB[base + _KNIGHT]:
+            return True
+        if KING_ATTACKS[idx] & pieceBB[base + _KING]:
+            return True
+        queens: int = pieceBB[base + _QUEEN]
+        if bishopAttacks(idx, occupied) & (pieceBB[base + _BISHOP] | queens):
+            return True
+        if rookAttacks(idx, occupied) & (pieceBB[base + _ROOK] | queens):
+            return True
+        return False
+    
+    # every square the color attacks in the current position, computed once per position
+    def attackMap(self, color: PieceColor) -> int:
+        toRet: int = self._attacks[color.value]
+        if toRet < 0:
+            toRet = self._attackMap(color.value, self._colorBB[0] | self._colorBB[1])
+            self._attacks[color.value] = toRet
+        elif self.debug:
+            assert toRet == self._attackMap(color.value, self._colorBB[0] | self._colorBB[1]), "cached attack map is stale"
+        return toRet
+    
+    # square of the color's king, -1 without one
+    def kingSquare(self, color: PieceColor) -> int:
+        return self._pieceBB[color.value * 6 + _KING].bit_length() - 1
     
     # check if the color is in check
     def isCheck(self, color: PieceColor) -> bool:
-        opponentColor: PieceColor = PieceColor.BLACK if color == PieceColor.WHITE else PieceColor.WHITE
-        oppMoves: set[int] = self.getPiecesMoves(opponentColor)
-        kingPos: int
-        for i in range(64):
-            if isinstance(self._board[i], King) and self._board[i]._color == color:
-                kingPos = i
-                break
-        if kingPos in oppMoves:
+        kingBB: int = self._pieceBB[color.value * 6 + _KING]
+        if kingBB == 0:
+            return False
+        attacks: int = self._attacks[1 - color.value]
+        if attacks >= 0 and not self.debug:
+            return attacks & kingBB != 0
+        # a single square is cheaper to test than building the whole map
+        return self._isAttacked(kingBB.bit_length() - 1, 1 - color.value, self._colorBB[0] | self._colorBB[1])
+    
+    def _enPassantTarget(self, color: int) -> int:
+        pawn: Optional[Pawn] = self._enPassantPawn
+        if pawn is None or pawn._color.value == color:
+            return -1
+        return pawn._position - 8 if pawn._color == PieceColor.WHITE else pawn._position + 8
+    
+    def _canCastle(self, color: int, short: bool, occupied: int) -> bool:
+        if not self._castlingRights & ((WHITE_SHORT if short else WHITE_LONG) << (2 * color)):
+            return False
+        kingPos: int = 4 if color == 0 else 60
+        if short:
+            if occupied & (0b11 << (kingPos + 1)):
+                return False
+            path: int = 0b111 << kingPos
+        else:
+            if occupied & (0b111 << (kingPos - 3)):
+                return False
+            path: int = 0b111 << (kingPos - 2)
+        return not path & self.attackMap(PieceColor(1 - color))
+    
+    # moves that follow the piece movement rules but may leave the own king in check
+    def _pseudoLegalMoves(self, color: int) -> list[int]:
+        toRet: list[int] = []
+        base: int = color * 6
+        pieceBB: list[int] = self._pieceBB
+        own: int = self._colorBB[color]
+        enemy: int = self._colorBB[1 - color]
+        occupied: int = own | enemy
+        empty: int = ~occupied & FULL
+        notOwn: int = ~own & FULL
+
+        pawns: int = pieceBB[base + _PAWN]
+        if color == 0:
+            single: int = (pawns << 8) & empty
+            double: int = ((single & RANK_3) << 8) & empty
+            step: int = 8
+        else:
+            single: int = (pawns >> 8) & empty
+            double: int = ((single & RANK_6) >> 8) & empty
+            step: int = -8
+        while single:
+            lsb: int = single & -single
+            dst: int = lsb.bit_length() - 1
+            if dst >= 56 or dst < 8:
+                toRet.extend((dst - step) | (dst << 6) | promotion for promotion in _PROMOTIONS)
+            else:
+                toRet.append((dst - step) | (dst << 6))
+            single ^= lsb
+        while double:
+            lsb: int = double & -double
+            dst: int = lsb.bit_length() - 1
+            toRet.append((dst - 2 * step) | (dst << 6))
+            double ^= lsb
+        targets: int = enemy
+        epTarget: int = self._enPassantTarget(color)
+        if epTarget >= 0:
+            targets |= 1 << epTarget
+        pawnAttacks: list[int] = PAWN_ATTACKS[color]
+        while pawns:
+            lsb: int = pawns & -pawns
+            src: int = lsb.bit_length() - 1
+            pawns ^= lsb
+            attacks: int = pawnAttacks[src] & targets
+            while attacks:
+                dstBit: int = attacks & -attacks
+                dst: int = dstBit.bit_length() - 1
+                if dst >= 56 or dst < 8:
+                    toRet.extend(src | (dst << 6) | promotion for promotion in _PROMOTIONS)
+                else:
+                    toRet.append(src | (dst << 6))
+                attacks ^= dstBit
+
+        knights: int = pieceBB[base + _KNIGHT]
+        while knights:
+            lsb: int = knights & -knights
+            src: int = lsb.bit_length() - 1
+            knights ^= lsb
+            attacks: int = KNIGHT_ATTACKS[src] & notOwn
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+
+        queens: int = pieceBB[base + _QUEEN]
+        diagonals: int = pieceBB[base + _BISHOP] | queens
+        while diagonals:
+            lsb: int = diagonals & -diagonals
+            src: int = lsb.bit_length() - 1
+            diagonals ^= lsb
+            attacks: int = bishopAttacks(src, occupied) & notOwn
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+        straights: int = pieceBB[base + _ROOK] | queens
+        while straights:
+            lsb: int = straights & -straights
+            src: int = lsb.bit_length() - 1
+            straights ^= lsb
+            attacks: int = rookAttacks(src, occupied) & notOwn
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+
+        kings: int = pieceBB[base + _KING]
+        if kings:
+            src: int = kings.bit_length() - 1
+            attacks: int = KING_ATTACKS[src] & notOwn
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+            if self._canCastle(color, True, occupied):
+                toRet.append(src | ((src + 2) << 6))
+            if self._canCastle(color, False, occupied):
+                toRet.append(src | ((src - 2) << 6))
+        return toRet
+    
+    # every square attacked by the color for the given occupancy
+    def _attackMap(self, color: int, occupied: int) -> int:
+        base: int = color * 6
+        pieceBB: list[int] = self._pieceBB
+        toRet: int = pawnAttacks(pieceBB[base + _PAWN], color)
+        knights: int = pieceBB[base + _KNIGHT]
+        while knights:
+            lsb: int = knights & -knights
+            toRet |= KNIGHT_ATTACKS[lsb.bit_length() - 1]
+            knights ^= lsb
+        queens: int = pieceBB[base + _QUEEN]
+        diagonals: int = pieceBB[base + _BISHOP] | queens
+        while diagonals:
+            lsb: int = diagonals & -diagonals
+            toRet |= bishopAttacks(lsb.bit_length() - 1, occupied)
+            diagonals ^= lsb
+        straights: int = pieceBB[base + _ROOK] | queens
+        while straights:
+            lsb: int = straights & -straights
+            toRet |= rookAttacks(lsb.bit_length() - 1, occupied)
+            straights ^= lsb
+        kings: int = pieceBB[base + _KING]
+        if kings:
+            toRet |= KING_ATTACKS[kings.bit_length() - 1]
+        return toRet
+    
+    # legal moves from checkers, pins and king danger squares computed once for the position,
+    # capturesOnly keeps captures, en passant and promotions
+    def _legalMoves(self, color: int, capturesOnly: bool = False) -> list[int]:
+        base: int = color * 6
+        enemyBase: int = (1 - color) * 6
+        pieceBB: list[int] = self._pieceBB
+        kings: int = pieceBB[base + _KING]
+        if kings == 0:
+            if capturesOnly:
+                return [code for code in self._pseudoLegalMoves(color) if self._isCapture(code)]
+            return self._pseudoLegalMoves(color)
+        kingPos: int = kings.bit_length() - 1
+        own: int = self._colorBB[color]
+        enemy: int = self._colorBB[1 - color]
+        occupied: int = own | enemy
+        targets: int = enemy if capturesOnly else ~own & FULL
+        enemyQueens: int = pieceBB[enemyBase + _QUEEN]
+        enemyStraights: int = pieceBB[enemyBase + _ROOK] | enemyQueens
+        enemyDiagonals: int = pieceBB[enemyBase + _BISHOP] | enemyQueens
+        enemyLeapers: int = pieceBB[enemyBase + _PAWN] | pieceBB[enemyBase + _KNIGHT]
+        checkers: int = ((PAWN_ATTACKS[color][kingPos] & pieceBB[enemyBase + _PAWN])
+                         | (KNIGHT_ATTACKS[kingPos] & pieceBB[enemyBase + _KNIGHT])
+                         | (bishopAttacks(kingPos, occupied) & enemyDiagonals)
+                         | (rookAttacks(kingPos, occupied) & enemyStraights))
+        # the king is taken off the board so that it cannot step back along a checking ray
+        kingDanger: int = self._attackMap(1 - color, occupied ^ kings)
+        if not checkers:
+            # nothing attacks the king, so nothing sees through its square and the map is the position's one
+            self._attacks[1 - color] = kingDanger
+        
+        toRet: list[int] = []
+        attacks: int = KING_ATTACKS[kingPos] & targets & ~kingDanger
+        while attacks:
+            dstBit: int = attacks & -attacks
+            toRet.append(kingPos | ((dstBit.bit_length() - 1) << 6))
+            attacks ^= dstBit
+        if checkers & (checkers - 1):
+            return toRet
+        if checkers:
+            checkMask: int = checkers | BETWEEN[kingPos][checkers.bit_length() - 1]
+        else:
+            checkMask: int = FULL
+        if not checkers and not capturesOnly:
+            if self._canCastle(color, True, occupied):
+                toRet.append(kingPos | ((kingPos + 2) << 6))
+            if self._canCastle(color, False, occupied):
+                toRet.append(kingPos | ((kingPos - 2) << 6))
+        
+        pinned: int = 0
+        pinRays: dict[int, int] = {}
+        snipers: int = (rookAttacks(kingPos, enemy) & enemyStraights) | (bishopAttacks(kingPos, enemy) & enemyDiagonals)
+        while snipers:
+            lsb: int = snipers & -snipers
+            sniper: int = lsb.bit_length() - 1
+            snipers ^= lsb
+            blockers: int = BETWEEN[kingPos][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+                pinRays[blockers.bit_length() - 1] = LINE[kingPos][sniper]
+        
+        pawns: int = pieceBB[base + _PAWN]
+        step: int = 8 if color == 0 else -8
+        startRow: int = 1 if color == 0 else 6
+        epTarget: int = self._enPassantTarget(color)
+        pawnAttackTable: list[int] = PAWN_ATTACKS[color]
+        while pawns:
+            lsb: int = pawns & -pawns
+            src: int = lsb.bit_length() - 1
+            pawns ^= lsb
+            mask: int = checkMask & pinRays[src] if pinned & lsb else checkMask
+            dst: int = src + step
+            if 0 <= dst < 64 and not (occupied >> dst) & 1:
+                if (mask >> dst) & 1:
+                    if dst >= 56 or dst < 8:
+                        toRet.extend(src | (dst << 6) | promotion for promotion in _PROMOTIONS)
+                    elif not capturesOnly:
+                        toRet.append(src | (dst << 6))
+                if not capturesOnly and src >> 3 == startRow and not (occupied >> (dst + step)) & 1 and (mask >> (dst + step)) & 1:
+                    toRet.append(src | ((dst + step) << 6))
+            attacks = pawnAttackTable[src] & enemy & mask
+            while attacks:
+                dstBit: int = attacks & -attacks
+                dst = dstBit.bit_length() - 1
+                if dst >= 56 or dst < 8:
+                    toRet.extend(src | (dst << 6) | promotion for promotion in _PROMOTIONS)
+                else:
+                    toRet.append(src | (dst << 6))
+                attacks ^= dstBit
+            if epTarget >= 0 and (pawnAttackTable[src] >> epTarget) & 1:
+                capturedBit: int = 1 << (epTarget - step)
+                # replay the capture on the occupancy, this also covers the pawns leaving a rank shared with the king
+                after: int = (occupied ^ lsb ^ capturedBit) | (1 << epTarget)
+                if (not (rookAttacks(kingPos, after) & enemyStraights)
+                    and not (bishopAttacks(kingPos, after) & enemyDiagonals)
+                    and not (checkers & enemyLeapers & ~capturedBit)):
+                    toRet.append(src | (epTarget << 6))
+        
+        knights: int = pieceBB[base + _KNIGHT] & ~pinned
+        while knights:
+            lsb: int = knights & -knights
+            src: int = lsb.bit_length() - 1
+            knights ^= lsb
+            attacks = KNIGHT_ATTACKS[src] & targets & checkMask
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+        
+        queens: int = pieceBB[base + _QUEEN]
+        diagonals: int = pieceBB[base + _BISHOP] | queens
+        while diagonals:
+            lsb: int = diagonals & -diagonals
+            src: int = lsb.bit_length() - 1
+            diagonals ^= lsb
+            attacks = bishopAttacks(src, occupied) & targets & checkMask
+            if pinned & lsb:
+                attacks &= pinRays[src]
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+        straights: int = pieceBB[base + _ROOK] | queens
+        while straights:
+            lsb: int = straights & -straights
+            src: int = lsb.bit_length() - 1
+            straights ^= lsb
+            attacks = rookAttacks(src, occupied) & targets & checkMask
+            if pinned & lsb:
+                attacks &= pinRays[src]
+            while attacks:
+                dstBit: int = attacks & -attacks
+                toRet.append(src | ((dstBit.bit_length() - 1) << 6))
+                attacks ^= dstBit
+        return toRet
+    
+    # plays every candidate and looks for check, only used to verify _legalMoves
+    def _legalMovesByMakeUnmake(self, color: PieceColor) -> set[int]:
+        toRet: set[int] = set()
+        for code in self._pseudoLegalMoves(color.value):
+            curMove: Move = self.makeMove(code, color)
+            if not self.isCheck(color):
+                toRet.add(code)
+            self.unMove(curMove)
+        return toRet
+    
+    def _isCapture(self, code: int) -> bool:
+        dst: int = (code >> 6) & 63
+        if code >> 12 or self._board[dst] is not None:
             return True
-        return False
+        # a pawn moving diagonally to an empty square takes en passant
+        return self._board[code & 63]._type == PieceType.PAWN and ((code & 63) - dst) & 7 != 0
+    
+    # the legal captures and promotions, for searches that only look at the noisy moves
+    def getCaptureMoveCodes(self, color: PieceColor) -> list[int]:
+        toRet: list[int] = self._legalMoves(color.value, True)
+        if self.debug:
+            expected: set[int] = {code for code in self._legalMoves(color.value) if self._isCapture(code)}
+            assert set(toRet) == expected, f"captures {sorted(toRet)} differ from {sorted(expected)}"
+        return toRet
+    
+    # legal moves as move codes, see chess.movement, with one code per promotion piece
+    def getLegalMoveCodes(self, color: PieceColor) -> list[int]:
+        toRet: list[int] = self._legalMoves(color.value)
+        if self.debug:
+            expected: set[int] = self._legalMovesByMakeUnmake(color)
+            assert set(toRet) == expected, f"legal moves {sorted(toRet)} differ from {sorted(expected)}"
+        return toRet
     
     def getLegalMoves(self, color: PieceColor) -> set[str]:
-        toRet: set[str] = set()
-        currentPieces: list[ChessPiece] = self.whitePieces if color == PieceColor.WHITE else self.blackPieces
-        for piece in currentPieces:
-            src: int = piece._position
-            pieceMoves: list[int] = piece.legal_moves()
-            for dst in pieceMoves:
-                curMove = Move(src, dst, piece._color)
-                self.move(curMove)
-                if not self.isCheck(piece._color):
-                    toRet.add(f"{idxToChessNotation(src)}{idxToChessNotation(dst)}")
-                self.unMove(curMove)
+        return {_NOTATION[code & 63] + _NOTATION[(code >> 6) & 63] for code in self.getLegalMoveCodes(color)}
+    
+    # plays a move code, including its promotion, the returned Move is what unMove takes back
+    def makeMove(self, code: int, color: PieceColor) -> Move:
+        toRet: Move = Move(code & 63, (code >> 6) & 63, color)
+        self.move(toRet)
+        promotion: int = code >> 12
+        if promotion:
+            definitelyPawn: Pawn = toRet.piece
+            toRet.promotion = definitelyPawn.promoteTo(PieceType(promotion))
+            self.promote(toRet)
         return toRet
     
     def getPiecesMoves(self, color: PieceColor, pieceType: list[PieceType] = [PieceType.PAWN,
@@ -173,11 +729,11 @@ class ChessBoard:
                                                                              PieceType.BISHOP,
                                                                              PieceType.QUEEN,
                                                                              PieceType.KING]) -> set[int]:
-        toRet: list[int] = []
-        for i in range(64):
-            if self._board[i] is not None and self._board[i]._color == color and self._board[i]._type in pieceType:
-                toRet.extend(self._board[i].legal_moves())
-        return set(toRet)
+        toRet: set[int] = set()
+        for code in self._pseudoLegalMoves(color.value):
+            if self._board[code & 63]._type in pieceType:
+                toRet.add((code >> 6) & 63)
+        return toRet
     
     def printAllMoves(self, color: PieceColor) -> None:
         for i in range(64):
@@ -214,21 +770,133 @@ class ChessBoard:
     def __setitem__(self, idx: int, value: Optional[ChessPiece]) -> None:
         if idx < 0 or idx >= BOARD_W ** 2:
             raise ValueError("Invalid position")
+        self._attacks = [-1, -1]
+        if self._board[idx] is not None:
+            self._toggleBitboard(self._board[idx], idx)
+        if value is not None:
+            self._toggleBitboard(value, idx)
         self._board[idx] = value
         
-    def clone(self) -> "ChessBoard":
+    def snapshot(self) -> PositionSnapshot:
+        squares: bytes = bytes(0 if piece is None else 1 + piece._color.value * 6 + piece._type.value for piece in self._board)
+        return PositionSnapshot(squares, self.sideToMove, self._castlingRights, self._enPassantTarget(self.sideToMove.value),
+                                self.halfMoveClock, self.fullMoveNumber)
+    
+    @staticmethod
+    def fromSnapshot(snapshot: PositionSnapshot) -> "ChessBoard":
         toRet: ChessBoard = ChessBoard.__new__(ChessBoard)
-        toRet.whitePieces = []
-        toRet.blackPieces = []
+        toRet.restore(snapshot)
+        return toRet
+    
+    # replaces the position, the move history is dropped so earlier moves can't be taken back
+    def restore(self, snapshot: PositionSnapshot) -> None:
+        self.curNumOfMove = 0
+        self.whitePieces = []
+        self.blackPieces = []
+        self._board = [None] * (BOARD_W * BOARD_W)
+        self._stateHistory = []
+        self.sideToMove = snapshot.sideToMove
+        self.halfMoveClock = snapshot.halfMoveClock
+        self.fullMoveNumber = snapshot.fullMoveNumber
+        self._enPassantPawn = None
+        # move counts only matter for castling and the pawns' first move, so they are rebuilt from the rights
+        unmoved: set[int] = set()
+        for right, squares in ((WHITE_SHORT, (4, 7)), (WHITE_LONG, (4, 0)), (BLACK_SHORT, (60, 63)), (BLACK_LONG, (60, 56))):
+            if snapshot.castlingRights & right:
+                unmoved.update(squares)
+        for idx, code in enumerate(snapshot.squares):
+            if code == 0:
+                continue
+            color: PieceColor = PieceColor((code - 1) // 6)
+            piece: ChessPiece = _PIECE_CLASSES[(code - 1) % 6](self, color, idx)
+            if piece._type == PieceType.PAWN:
+                if idx >> 3 != (1 if color == PieceColor.WHITE else 6):
+                    piece._numOfMove = 1
+            elif piece._type == PieceType.KING or piece._type == PieceType.ROOK:
+                if idx not in unmoved:
+                    piece._numOfMove = 1
+            self._board[idx] = piece
+            self._addPiece(piece)
+        if snapshot.enPassantSquare >= 0:
+            pawn: Pawn = self._board[snapshot.enPassantSquare + 8 if snapshot.enPassantSquare < 32 else snapshot.enPassantSquare - 8]
+            pawn.enPassable = True
+            self._enPassantPawn = pawn
+        self._syncPositionState()
+    
+    @staticmethod
+    def fromFEN(fen: str) -> "ChessBoard":
+        fields: list[str] = fen.split()
+        if len(fields) not in (4, 6):
+            raise ValueError("Invalid FEN")
+        rows: list[str] = fields[0].split("/")
+        if len(rows) != 8:
+            raise ValueError("Invalid FEN")
+        squares: bytearray = bytearray(BOARD_W * BOARD_W)
+        for rowIdx, rowText in enumerate(rows):
+            col: int = 0
+            for letter in rowText:
+                if letter.isdigit():
+                    col += int(letter)
+                    continue
+                if letter.lower() not in _FEN_LETTERS or col >= 8:
+                    raise ValueError("Invalid FEN")
+                color: int = 0 if letter.isupper() else 1
+                squares[(7 - rowIdx) * 8 + col] = 1 + color * 6 + _FEN_LETTERS.index(letter.lower())
+                col += 1
+            if col != 8:
+                raise ValueError("Invalid FEN")
+        if fields[1] not in ("w", "b"):
+            raise ValueError("Invalid FEN")
+        sideToMove: PieceColor = PieceColor.WHITE if fields[1] == "w" else PieceColor.BLACK
+        castlingRights: int = 0
+        if fields[2] != "-":
+            for letter in fields[2]:
+                rights: list[int] = [right for castlingLetter, right in _FEN_CASTLING if castlingLetter == letter]
+                if len(rights) == 0:
+                    raise ValueError("Invalid FEN")
+                castlingRights |= rights[0]
+        enPassantSquare: int = -1
+        if fields[3] != "-":
+            enPassantSquare = chessNotationToIdx(fields[3])
+            # the pawn that just moved two squares has to be right in front of the target
+            pawnIdx: int = enPassantSquare - 8 if sideToMove == PieceColor.WHITE else enPassantSquare + 8
+            if enPassantSquare >> 3 != (5 if sideToMove == PieceColor.WHITE else 2) or squares[pawnIdx] != 1 + (1 - sideToMove.value) * 6 + _PAWN:
+                raise ValueError("Invalid FEN")
+        halfMoveClock: int = int(fields[4]) if len(fields) == 6 else 0
+        fullMoveNumber: int = int(fields[5]) if len(fields) == 6 else 1
+        return ChessBoard.fromSnapshot(PositionSnapshot(bytes(squares), sideToMove, castlingRights, enPassantSquare, halfMoveClock, fullMoveNumber))
+    
+    # castling rights come from the unmoved kings and rooks, the en passant square from the last double pawn push
+    def toFEN(self) -> str:
+        rows: list[str] = []
+        for row in range(BOARD_W - 1, -1, -1):
+            rowText: str = ""
+            empty: int = 0
+            for col in range(BOARD_W):
+                piece: Optional[ChessPiece] = self._board[row * BOARD_W + col]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty > 0:
+                    rowText += str(empty)
+                    empty = 0
+                rowText += piece.letter()
+            if empty > 0:
+                rowText += str(empty)
+            rows.append(rowText)
+        castlingRights: int = self._computeCastlingRights()
+        castling: str = "".join(letter for letter, right in _FEN_CASTLING if castlingRights & right)
+        enPassant: str = "-"
+        pawn: Optional[Pawn] = self._enPassantPawn
+        if pawn is not None:
+            enPassant = _NOTATION[pawn._position - 8 if pawn._color == PieceColor.WHITE else pawn._position + 8]
+        side: str = "w" if self.sideToMove == PieceColor.WHITE else "b"
+        return f"{'/'.join(rows)} {side} {castling if castling else '-'} {enPassant} {self.halfMoveClock} {self.fullMoveNumber}"
+    
+    # the copy keeps the move number, but like restore none of the moves, they can't be taken back on it
+    def clone(self) -> "ChessBoard":
+        toRet: ChessBoard = ChessBoard.fromSnapshot(self.snapshot())
         toRet.curNumOfMove = self.curNumOfMove
-        toRet._board = deepcopy(self._board)
-        for piece in toRet._board:
-            if piece is not None:
-                piece._board = toRet
-                if piece._color == PieceColor.WHITE:
-                    toRet.whitePieces.append(piece)
-                else:
-                    toRet.blackPieces.append(piece)
         return toRet
         
 
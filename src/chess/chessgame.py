@@ -1,10 +1,28 @@
 from chess.board import ChessBoard
 from chess.pieces import PieceColor, PieceType, ChessPiece, Pawn
-from chess.movement import Move, MoveType
-from chess.utils import chessNotationToIdx
+from chess.movement import Move, MoveType, NO_MOVE, notationToMove
 from agent.abstract_agent import Agent
 from agent.player_agent import PlayerAgent
 from collections import deque
+from typing import Optional
+
+# promotion letters as entered by players
+_PROMOTIONS: dict[str, PieceType] = {"r": PieceType.ROOK, "k": PieceType.KNIGHT, "b": PieceType.BISHOP, "q": PieceType.QUEEN}
+
+# The result and the reason once the game is over with the side to move, None while it goes on.
+# repetitions is how often the current position has been on the board, this time included.
+def gameResult(board: ChessBoard, repetitions: int = 1) -> Optional[tuple[str, str]]:
+    if len(board.getLegalMoveCodes(board.sideToMove)) == 0:
+        if board.isCheck(board.sideToMove):
+            return ("0-1" if board.sideToMove == PieceColor.WHITE else "1-0", "checkmate")
+        return ("1/2-1/2", "stalemate")
+    if len(board.whitePieces) + len(board.blackPieces) == 2:
+        return ("1/2-1/2", "insufficient material")
+    if board.halfMoveClock >= 100:
+        return ("1/2-1/2", "fifty moves")
+    if repetitions >= 3:
+        return ("1/2-1/2", "repetition")
+    return None
 
 class Game():
     def __init__(self, board: ChessBoard, player1: Agent, player2: Agent):
@@ -21,10 +39,22 @@ class Game():
             self._currentPlayer = self._player2
         else:
             self._currentPlayer = self._player1
+    
+    # notation only lives at the player boundary, a pawn reaching the last rank without
+    # a promotion suffix asks the player which piece it becomes
+    def __parseMove(self, moveIn: str, availableMoves: set[int]) -> int:
+        try:
+            toRet: int = notationToMove(moveIn)
+        except ValueError:
+            return NO_MOVE
+        if toRet >> 12 == 0 and toRet | (PieceType.QUEEN.value << 12) in availableMoves:
+            to: str = self._currentPlayer.getPawnPromotion()
+            toRet |= _PROMOTIONS[to.lower()].value << 12
+        return toRet
         
     def play(self) -> None:
         while True:
-            availableMoves: set[str] = self._board.getLegalMoves(self._currentPlayer.getTeam())
+            availableMoves: set[int] = set(self._board.getLegalMoveCodes(self._currentPlayer.getTeam()))
             self._board.printBoard()
             if len(availableMoves) == 0:
                 opponent: Agent = self._player1 if self._currentPlayer == self._player2 else self._player2
@@ -37,16 +67,9 @@ class Game():
             
             while True:
                 moveIn: str = self._currentPlayer.getMove()
-                if moveIn in availableMoves:
-                    src: int = chessNotationToIdx(moveIn[:2])
-                    dst: int = chessNotationToIdx(moveIn[2:])
-                    curMove = Move(src, dst, self._currentPlayer.getTeam())
-                    self._board.move(curMove)
-                    if curMove.moveType == MoveType.PROMOTION:
-                        to:str = self._currentPlayer.getPawnPromotion()
-                        definitelyPawn: Pawn = curMove.piece
-                        curMove.promotion = definitelyPawn.promote(to)
-                        self._board.promote(curMove)
+                code: int = self.__parseMove(moveIn, availableMoves)
+                if code in availableMoves:
+                    curMove: Move = self._board.makeMove(code, self._currentPlayer.getTeam())
                     self._moveHistory.append(curMove)
                     print(curMove)
                     break
@@ -1,8 +1,50 @@
 from __future__ import annotations
 
-from chess.utils import idxToChessNotation
-from chess.pieces import ChessPiece, PieceColor, MoveType
+from chess.utils import idxToChessNotation, chessNotationToIdx
+from chess.pieces import ChessPiece, PieceColor, PieceType, MoveType
+
+# A move code packs a move into an int: bits 0-5 hold the source square, bits 6-11 the
+# destination square and bits 12-14 the PieceType value of the promotion, 0 for none.
+# Codes are what the board and the agents pass around, notation is only for players.
+NO_MOVE: int = 0
+_PROMOTION_LETTERS: dict[int, str] = {PieceType.ROOK.value: "r",
+                                      PieceType.KNIGHT.value: "n",
+                                      PieceType.BISHOP.value: "b",
+                                      PieceType.QUEEN.value: "q"}
+
+def encodeMove(src: int, dst: int, promotion: PieceType = None) -> int:
+    return src | (dst << 6) | ((promotion.value if promotion is not None else 0) << 12)
+
+def moveSrc(code: int) -> int:
+    return code & 63
+
+def moveDst(code: int) -> int:
+    return (code >> 6) & 63
+
+def movePromotion(code: int) -> PieceType:
+    return PieceType(code >> 12) if code >> 12 else None
+
+# e2e4, with a trailing r/n/b/q for promotions
+def moveToNotation(code: int) -> str:
+    toRet: str = idxToChessNotation(code & 63) + idxToChessNotation((code >> 6) & 63)
+    if code >> 12:
+        toRet += _PROMOTION_LETTERS[code >> 12]
+    return toRet
+
+def notationToMove(notation: str) -> int:
+    if len(notation) != 4 and len(notation) != 5:
+        raise ValueError("Invalid Move")
+    toRet: int = chessNotationToIdx(notation[:2]) | (chessNotationToIdx(notation[2:4]) << 6)
+    if len(notation) == 5:
+        for promotion, letter in _PROMOTION_LETTERS.items():
+            if notation[4].lower() == letter:
+                return toRet | (promotion << 12)
+        raise ValueError("Invalid Move")
+    return toRet
+
 class Move():
+    __slots__ = ("color", "src", "dst", "piece", "captured", "promotion", "moveType")
+
     def __init__(self, src: int, dst: int, color: PieceColor):
         self.color: PieceColor = color
         self.src: int = src
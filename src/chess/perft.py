@@ -0,0 +1,107 @@
+from chess.board import ChessBoard
+from chess.pieces import PieceColor
+from chess.movement import Move, moveToNotation
+from typing import Optional
+import argparse
+import json
+import platform
+import sys
+import time
+
+# name, FEN and the known node counts from depth 1 up, empty when unknown
+STANDARD_POSITIONS: list[tuple[str, str, list[int]]] = [
+    ("startpos", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     [20, 400, 8902, 197281, 4865609, 119060324]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603, 193690690]),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624, 11030083]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333, 15833292]),
+    ("talkchess", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487, 89941194]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594, 164075551]),
+]
+
+def perft(board: ChessBoard, depth: int) -> int:
+    color: PieceColor = board.sideToMove
+    moves: list[int] = board.getLegalMoveCodes(color)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    toRet: int = 0
+    for code in moves:
+        curMove: Move = board.makeMove(code, color)
+        toRet += perft(board, depth - 1)
+        board.unMove(curMove)
+    return toRet
+
+# node count below each root move
+def divide(board: ChessBoard, depth: int) -> dict[str, int]:
+    toRet: dict[str, int] = {}
+    color: PieceColor = board.sideToMove
+    for code in board.getLegalMoveCodes(color):
+        curMove: Move = board.makeMove(code, color)
+        toRet[moveToNotation(code)] = perft(board, depth - 1)
+        board.unMove(curMove)
+    return toRet
+
+def runSuite(maxDepth: int, positions: list[tuple[str, str, list[int]]] = STANDARD_POSITIONS) -> list[dict]:
+    toRet: list[dict] = []
+    for name, fen, counts in positions:
+        for depth in range(1, (min(maxDepth, len(counts)) if counts else maxDepth) + 1):
+            board: ChessBoard = ChessBoard.fromFEN(fen)
+            start: float = time.perf_counter()
+            nodes: int = perft(board, depth)
+            seconds: float = time.perf_counter() - start
+            expected: Optional[int] = counts[depth - 1] if counts else None
+            toRet.append({"position": name,
+                          "depth": depth,
+                          "nodes": nodes,
+                          "expected": expected,
+                          "ok": expected is None or nodes == expected,
+                          "seconds": seconds,
+                          "nodesPerSecond": nodes / seconds if seconds > 0 else 0.0})
+    return toRet
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Count leaf nodes of the move generator and time it")
+    parser.add_argument("--depth", type=int, default=3, help="deepest depth to run")
+    parser.add_argument("--fen", help="run a single position instead of the standard suite")
+    parser.add_argument("--divide", action="store_true", help="with --fen, print the count below each root move")
+    parser.add_argument("--json", action="store_true", help="benchmark mode, print one JSON document")
+    parser.add_argument("--debug", action="store_true", help="cross-check the fast move generator and hashing")
+    args = parser.parse_args(argv)
+    ChessBoard.debug = args.debug
+
+    if args.fen is not None:
+        board: ChessBoard = ChessBoard.fromFEN(args.fen)
+        if args.divide:
+            counts: dict[str, int] = divide(board, args.depth)
+            for move in sorted(counts):
+                print(f"{move}: {counts[move]}")
+            print(f"total: {sum(counts.values())}")
+            return 0
+        results: list[dict] = runSuite(args.depth, [("fen", args.fen, [])])
+    else:
+        results: list[dict] = runSuite(args.depth)
+
+    if args.json:
+        print(json.dumps({"timestamp": time.time(),
+                          "python": platform.python_version(),
+                          "machine": platform.machine(),
+                          "totalNodes": sum(result["nodes"] for result in results),
+                          "totalSeconds": sum(result["seconds"] for result in results),
+                          "results": results}))
+    else:
+        for result in results:
+            if result["expected"] is None:
+                status: str = ""
+            else:
+                status: str = "ok" if result["ok"] else f"FAILED, expected {result['expected']}"
+            print(f"{result['position']:<12} depth {result['depth']}: {result['nodes']:>10} nodes "
+                  f"{result['seconds']:8.3f}s {result['nodesPerSecond']:>10.0f} nps {status}")
+    return 0 if all(result["ok"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -33,13 +33,18 @@ class MoveType(Enum):
     ROOKFIRSTMOVE = 6
     KINGFIRSTMOVE = 7
     
+# Pieces are slotted, a board holds 32 of them and the engines keep thousands of boards alive.
 class ChessPiece(ABC):
+    __slots__ = ("_board", "_type", "_color", "_position", "_numOfMove", "_listIdx")
+
     def __init__(self, board: ChessBoard, type: PieceType, color: PieceColor, position: int):
         self._board: ChessBoard = board
         self._type: PieceType = type
         self._color: PieceColor = color
         self._position: int = position
         self._numOfMove: int = 0
+        # index in the board's piece list of its color, -1 while off the board
+        self._listIdx: int = -1
     
     def move(self, dest: int) -> MoveType:
         self._numOfMove += 1
@@ -62,10 +67,11 @@ class ChessPiece(ABC):
         pass
 
 class Pawn(ChessPiece): 
+    __slots__ = ("enPassable",)
+
     def __init__(self, board: ChessBoard, color: PieceColor, position: int): 
         super().__init__(board, PieceType.PAWN, color, position)
         self.enPassable: bool = False
-        self.enPassableAt: int = -1
     
     def move(self, dest: int) -> ChessPiece:
         self._numOfMove += 1
@@ -99,11 +105,6 @@ class Pawn(ChessPiece):
         self._position = dest
         return toRet
         
-    def unMove(self, src: int) -> None: 
-        super().unMove(src)
-        if self._numOfMove == 1 and 24 <= src < 40:
-            self.enPassable = True
-    
     def legal_moves(self) -> list[int]:
         toRet: list[int] = []
         multiplier: int
@@ -158,8 +159,22 @@ class Pawn(ChessPiece):
             return Queen(self._board, self._color, self._position)
         else:
             raise ValueError("Can't evolve to " + to)
+    
+    def promoteTo(self, pieceType: PieceType) -> ChessPiece:
+        if pieceType == PieceType.ROOK:
+            return self.promote('r')
+        elif pieceType == PieceType.KNIGHT:
+            return self.promote('k')
+        elif pieceType == PieceType.BISHOP:
+            return self.promote('b')
+        elif pieceType == PieceType.QUEEN:
+            return self.promote('q')
+        else:
+            raise ValueError("Can't evolve to " + str(pieceType))
 
 class Rook(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, board: ChessBoard, color: PieceColor, position: int):
         super().__init__(board, PieceType.ROOK, color, position)
 
@@ -202,6 +217,8 @@ class Rook(ChessPiece):
 
 
 class Knight(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, board: ChessBoard, color: PieceColor, position: int):
         super().__init__(board, PieceType.KNIGHT, color, position)
     
@@ -241,6 +258,8 @@ class Knight(ChessPiece):
 
 
 class Bishop(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, board: ChessBoard, color: PieceColor, position: int):
         super().__init__(board, PieceType.BISHOP, color, position)
 
@@ -274,6 +293,8 @@ class Bishop(ChessPiece):
 
 
 class Queen(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, board: ChessBoard, color: PieceColor, position: int):
         super().__init__(board, PieceType.QUEEN, color, position)
 
@@ -307,6 +328,8 @@ class Queen(ChessPiece):
 
 
 class King(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, board: ChessBoard, color: PieceColor, position: int):
         super().__init__(board, PieceType.KING, color, position)
 
@@ -322,13 +345,10 @@ class King(ChessPiece):
         if not isinstance(maybeRook, Rook) or maybeRook._numOfMove != 0 or maybeRook._color != self._color:
             return False
         opponentColor: PieceColor = PieceColor.BLACK if self._color == PieceColor.WHITE else PieceColor.WHITE
-        opponentMoves: set[int] = self._board.getPiecesMoves(opponentColor, [PieceType.PAWN,
-                                                                             PieceType.ROOK,
-                                                                             PieceType.KNIGHT,
-                                                                             PieceType.BISHOP,
-                                                                             PieceType.QUEEN])
-        if self._position in opponentMoves or self._position + 1 * multiplier in opponentMoves or self._position + 2 * multiplier in opponentMoves:
-            return False
+        attacked: int = self._board.attackMap(opponentColor)
+        for idx in (self._position, self._position + 1 * multiplier, self._position + 2 * multiplier):
+            if (attacked >> idx) & 1:
+                return False
         return True
 
     def legal_moves(self):
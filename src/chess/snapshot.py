@@ -0,0 +1,13 @@
+from typing import NamedTuple
+from chess.pieces import PieceColor
+
+# Immutable, hashable and picklable copy of a position. squares holds one byte per square,
+# 0 for empty and 1 + color.value * 6 + type.value otherwise. castlingRights uses the
+# masks from chess.zobrist and enPassantSquare is the target square or -1.
+class PositionSnapshot(NamedTuple):
+    squares: bytes
+    sideToMove: PieceColor
+    castlingRights: int
+    enPassantSquare: int
+    halfMoveClock: int
+    fullMoveNumber: int
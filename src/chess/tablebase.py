@@ -0,0 +1,507 @@
+from chess.board import ChessBoard
+from chess.pieces import ChessPiece, PieceColor, PieceType
+from chess.movement import NO_MOVE, moveToNotation
+from chess.bitboard import BETWEEN, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rookAttacks, bishopAttacks, queenAttacks
+from typing import Callable, Optional
+from array import array
+import argparse
+import mmap
+import os
+import sys
+import time
+
+# A table holds one byte per position of one material signature such as "KQK" or "KRKP": the
+# white pieces starting with their king, then the black ones. The byte is from the side to move's
+# point of view, 0 for a draw, 1 to 127 for a win with mate in that many plies, 128 + n for a loss
+# that gets mated in n plies, 128 being checkmate. A position is indexed by
+# sideToMove.value + 2 * (sq0 + 64 * sq1 + 64 ** 2 * sq2 ...) with the squares in signature order,
+# so a table of n pieces is 2 * 64 ** n bytes and can be memory-mapped and read in place.
+# Castling and en passant are left out, positions with either are not in the tables. Without en
+# passant the value of a double push next to an enemy pawn would be wrong, so there are no tables
+# with pawns on both sides.
+DRAW: int = 0
+LOSS: int = 128
+MAX_PLIES: int = 127
+MAX_PIECES: int = 4
+_LETTERS: str = "PRNBQK"
+# order of the pieces within a side of a signature, kings first
+_SIGNATURE_ORDER: str = "KQRBNP"
+_PIECE_VALUES: dict[str, int] = {"K": 0, "Q": 9, "R": 5, "B": 3, "N": 3, "P": 1}
+_PAWN: int = PieceType.PAWN.value
+_ROOK: int = PieceType.ROOK.value
+_KNIGHT: int = PieceType.KNIGHT.value
+_BISHOP: int = PieceType.BISHOP.value
+_QUEEN: int = PieceType.QUEEN.value
+_KING: int = PieceType.KING.value
+_SLIDERS: tuple[int, ...] = (_ROOK, _BISHOP, _QUEEN)
+_PROMOTION_TYPES: list[int] = [_QUEEN, _ROOK, _BISHOP, _KNIGHT]
+# flags of a position in the generator's state buffer
+_LEGAL: int = 1
+_SETTLED: int = 2
+_PENDING_WIN: int = 4
+
+def isWin(value: int) -> bool:
+    return 0 < value < LOSS
+
+def isLoss(value: int) -> bool:
+    return value >= LOSS
+
+# plies to mate for wins and losses, 0 for draws
+def distance(value: int) -> int:
+    return value - LOSS if value >= LOSS else value
+
+def _sideSignature(types: list[int]) -> str:
+    return "".join(sorted((_LETTERS[pieceType] for pieceType in types), key=_SIGNATURE_ORDER.index))
+
+def _sideValue(side: str) -> tuple[int, str]:
+    return (sum(_PIECE_VALUES[letter] for letter in side), "".join(chr(ord("Z") - _SIGNATURE_ORDER.index(letter)) for letter in side))
+
+# "KQKR" -> ("KQ", "KR"), the signature is normalized so that each side is in signature order
+def splitSignature(signature: str) -> tuple[str, str]:
+    signature = signature.upper()
+    second: int = signature.find("K", 1)
+    if not signature.startswith("K") or second < 0 or any(letter not in _SIGNATURE_ORDER for letter in signature):
+        raise ValueError(f"Invalid signature {signature}")
+    white: str = signature[:second]
+    black: str = signature[second:]
+    if white.count("K") != 1 or black.count("K") != 1:
+        raise ValueError(f"Invalid signature {signature}")
+    return (_sideSignature([_LETTERS.index(letter) for letter in white]),
+            _sideSignature([_LETTERS.index(letter) for letter in black]))
+
+# tables are only stored with the stronger side as white
+def isCanonical(white: str, black: str) -> bool:
+    return _sideValue(white) >= _sideValue(black)
+
+# nothing can be mated with a lone minor piece or less
+def _alwaysDrawn(white: str, black: str) -> bool:
+    return len(white) + len(black) <= 3 and not any(letter in white + black for letter in "QRP")
+
+def _pawnsOnBothSides(white: str, black: str) -> bool:
+    return "P" in white and "P" in black
+
+def _attacks(pieceType: int, color: int, sq: int, occupied: int) -> int:
+    if pieceType == _KING:
+        return KING_ATTACKS[sq]
+    if pieceType == _KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if pieceType == _BISHOP:
+        return bishopAttacks(sq, occupied)
+    if pieceType == _ROOK:
+        return rookAttacks(sq, occupied)
+    if pieceType == _QUEEN:
+        return queenAttacks(sq, occupied)
+    return PAWN_ATTACKS[color][sq]
+
+def _isAttacked(target: int, byColor: int, colors: list[int], types: list[int], squares: list[int], skip: int = -1) -> bool:
+    occupied: int = 0
+    for i, sq in enumerate(squares):
+        if i != skip:
+            occupied |= 1 << sq
+    for i, sq in enumerate(squares):
+        if i != skip and colors[i] == byColor and (_attacks(types[i], byColor, sq, occupied) >> target) & 1:
+            return True
+    return False
+
+# Looks a position up in whichever table holds it, turning the board around when the stronger side
+# is black. getTable returns the table of a canonical signature; the result is None when it is missing.
+def _lookup(colors: list[int], types: list[int], squares: list[int], sideToMove: int,
+            getTable: Callable[[str], Optional[bytes]]) -> Optional[int]:
+    pieces: list[tuple[int, int, int]] = list(zip(colors, types, squares))
+    white: str = _sideSignature([pieceType for color, pieceType, _ in pieces if color == 0])
+    black: str = _sideSignature([pieceType for color, pieceType, _ in pieces if color == 1])
+    if _alwaysDrawn(white, black):
+        return DRAW
+    if _pawnsOnBothSides(white, black):
+        return None
+    if not isCanonical(white, black):
+        pieces = [(1 - color, pieceType, sq ^ 56) for color, pieceType, sq in pieces]
+        sideToMove = 1 - sideToMove
+        white, black = black, white
+    table: Optional[bytes] = getTable(white + black)
+    if table is None:
+        return None
+    pieces.sort(key=lambda piece: (piece[0], _SIGNATURE_ORDER.index(_LETTERS[piece[1]])))
+    idx: int = sideToMove
+    factor: int = 2
+    for _, _, sq in pieces:
+        idx += sq * factor
+        factor *= 64
+    return table[idx]
+
+# Retrograde analysis of one signature. Every position is first generated forward once: mates and
+# stalemates are found, moves that capture or promote are looked up in the smaller tables, and the
+# moves that stay inside the table are counted. Positions are then settled by increasing distance to
+# mate; walking the moves backwards from each settled position, a position the opponent loses makes
+# its predecessors wins, and a predecessor whose every move reaches an opponent's win is a loss.
+# The moves are generated here from squares and piece types rather than with ChessBoard, which would
+# need a board of piece objects and a make and unmake for each of the millions of positions. They
+# use the attack tables of chess.bitboard like the board does, and the tests check them against
+# ChessBoard.getLegalMoveCodes. Three-piece tables take five to ten seconds; four-piece ones are
+# within reach but slow, KQKR takes about twenty minutes and peaks near 200 MB.
+class _Generator():
+    def __init__(self, signature: str, getTable: Callable[[str], Optional[bytes]]):
+        white, black = splitSignature(signature)
+        self._colors: list[int] = [0] * len(white) + [1] * len(black)
+        self._types: list[int] = [_LETTERS.index(letter) for letter in white + black]
+        self._kings: list[int] = [0, len(white)]
+        self._count: int = len(self._colors)
+        self._size: int = 2 * 64 ** self._count
+        # how much the index moves when a piece goes one square up
+        self._factors: list[int] = [2 * 64 ** i for i in range(self._count)]
+        self._getTable: Callable[[str], Optional[bytes]] = getTable
+
+    def _decode(self, idx: int) -> tuple[int, list[int]]:
+        return (idx & 1, [(idx >> (1 + 6 * i)) & 63 for i in range(self._count)])
+
+    def _encode(self, sideToMove: int, squares: list[int]) -> int:
+        idx: int = 0
+        for sq in reversed(squares):
+            idx = idx * 64 + sq
+        return idx * 2 + sideToMove
+
+    def _isLegal(self, sideToMove: int, squares: list[int]) -> bool:
+        if len(set(squares)) != self._count:
+            return False
+        for i, sq in enumerate(squares):
+            if self._types[i] == _PAWN and (sq < 8 or sq >= 56):
+                return False
+        other: int = 1 - sideToMove
+        return not _isAttacked(squares[self._kings[other]], sideToMove, self._colors, self._types, squares)
+
+    # (piece index, destination, captured piece index or -1, promotion type or -1) of the legal moves
+    def _moves(self, sideToMove: int, squares: list[int]) -> list[tuple[int, int, int, int]]:
+        toRet: list[tuple[int, int, int, int]] = []
+        own: int = 0
+        enemy: int = 0
+        for i, sq in enumerate(squares):
+            if self._colors[i] == sideToMove:
+                own |= 1 << sq
+            else:
+                enemy |= 1 << sq
+        occupied: int = own | enemy
+        king: int = self._kings[sideToMove]
+        kingSq: int = squares[king]
+        # Squares the king must not step on, with the king itself out of the way so that it cannot
+        # retreat along a checking line. Other pieces only need the full test when the king is in
+        # check or they stand between it and an enemy slider.
+        guarded: int = 0
+        check: bool = False
+        pinned: int = 0
+        for i, sq in enumerate(squares):
+            if self._colors[i] == sideToMove:
+                continue
+            attacks: int = _attacks(self._types[i], 1 - sideToMove, sq, occupied ^ (1 << kingSq))
+            guarded |= attacks
+            if (attacks >> kingSq) & 1:
+                check = True
+            if self._types[i] in _SLIDERS:
+                pinned |= BETWEEN[sq][kingSq]
+        for i, sq in enumerate(squares):
+            if self._colors[i] != sideToMove:
+                continue
+            fullTest: bool = i != king and (check or (pinned >> sq) & 1)
+            pieceType: int = self._types[i]
+            if pieceType == _PAWN:
+                step: int = 8 if sideToMove == 0 else -8
+                targets: int = PAWN_ATTACKS[sideToMove][sq] & enemy
+                if not (occupied >> (sq + step)) & 1:
+                    targets |= 1 << (sq + step)
+                    startRow: int = 1 if sideToMove == 0 else 6
+                    if sq >> 3 == startRow and not (occupied >> (sq + 2 * step)) & 1:
+                        targets |= 1 << (sq + 2 * step)
+            else:
+                targets: int = _attacks(pieceType, sideToMove, sq, occupied) & ~own
+            while targets:
+                dstBit: int = targets & -targets
+                targets ^= dstBit
+                dst: int = dstBit.bit_length() - 1
+                captured: int = squares.index(dst) if enemy & dstBit else -1
+                if i == king:
+                    if guarded & dstBit:
+                        continue
+                elif fullTest:
+                    after: list[int] = squares.copy()
+                    after[i] = dst
+                    if _isAttacked(kingSq, 1 - sideToMove, self._colors, self._types, after, captured):
+                        continue
+                if pieceType == _PAWN and (dst >= 56 or dst < 8):
+                    for promotion in _PROMOTION_TYPES:
+                        toRet.append((i, dst, captured, promotion))
+                else:
+                    toRet.append((i, dst, captured, -1))
+        return toRet
+
+    # the value of a capture or promotion, from the point of view of the side that moves next
+    def _exitValue(self, sideToMove: int, squares: list[int], move: tuple[int, int, int, int]) -> Optional[int]:
+        piece, dst, captured, promotion = move
+        colors: list[int] = []
+        types: list[int] = []
+        after: list[int] = []
+        for i in range(self._count):
+            if i == captured:
+                continue
+            colors.append(self._colors[i])
+            types.append(promotion if i == piece and promotion >= 0 else self._types[i])
+            after.append(dst if i == piece else squares[i])
+        return _lookup(colors, types, after, 1 - sideToMove, self._getTable)
+
+    # squares the piece could have come from by a quiet move
+    def _origins(self, piece: int, squares: list[int], occupied: int) -> list[int]:
+        sq: int = squares[piece]
+        color: int = self._colors[piece]
+        if self._types[piece] == _PAWN:
+            step: int = 8 if color == 0 else -8
+            origin: int = sq - step
+            if origin < 8 or origin >= 56 or (occupied >> origin) & 1:
+                return []
+            toRet: list[int] = [origin]
+            if sq >> 3 == (3 if color == 0 else 4) and not (occupied >> (origin - step)) & 1:
+                toRet.append(origin - step)
+            return toRet
+        origins: int = _attacks(self._types[piece], color, sq, occupied) & ~occupied
+        toRet: list[int] = []
+        while origins:
+            lsb: int = origins & -origins
+            toRet.append(lsb.bit_length() - 1)
+            origins ^= lsb
+        return toRet
+
+    def generate(self) -> bytearray:
+        values: bytearray = bytearray(self._size)
+        # _LEGAL, _SETTLED and _PENDING_WIN flags
+        state: bytearray = bytearray(self._size)
+        # moves not yet known to lose, a move into a draw is never taken off
+        remaining: bytearray = bytearray(self._size)
+        longestLoss: bytearray = bytearray(self._size)
+        # buckets[d] holds 2 * index + 1 for a win and 2 * index for a loss of the positions to settle
+        # at d plies from mate
+        buckets: list[array] = [array("q") for _ in range(MAX_PLIES + 2)]
+
+        for idx in range(self._size):
+            sideToMove, squares = self._decode(idx)
+            if not self._isLegal(sideToMove, squares):
+                continue
+            state[idx] = _LEGAL
+            moves: list[tuple[int, int, int, int]] = self._moves(sideToMove, squares)
+            if len(moves) == 0:
+                king: int = squares[self._kings[sideToMove]]
+                if _isAttacked(king, 1 - sideToMove, self._colors, self._types, squares):
+                    buckets[0].append(2 * idx)
+                continue
+            count: int = 0
+            shortestWin: int = MAX_PLIES + 1
+            for move in moves:
+                if move[2] < 0 and move[3] < 0:
+                    count += 1
+                    continue
+                value: Optional[int] = self._exitValue(sideToMove, squares, move)
+                if value is None:
+                    raise ValueError(f"A table needed by {self._signature()} is missing")
+                if isLoss(value):
+                    shortestWin = min(shortestWin, distance(value) + 1)
+                elif isWin(value):
+                    longestLoss[idx] = max(longestLoss[idx], distance(value))
+                else:
+                    count += 1
+            if shortestWin <= MAX_PLIES:
+                state[idx] |= _PENDING_WIN
+                buckets[shortestWin].append(2 * idx + 1)
+            elif count == 0:
+                self._pushLoss(buckets, idx, longestLoss[idx] + 1)
+            remaining[idx] = count
+
+        for plies in range(MAX_PLIES + 1):
+            for entry in buckets[plies]:
+                idx: int = entry >> 1
+                win: int = entry & 1
+                if state[idx] & _SETTLED:
+                    continue
+                state[idx] |= _SETTLED
+                values[idx] = plies if win else LOSS + plies
+                sideToMove, squares = self._decode(idx)
+                mover: int = 1 - sideToMove
+                occupied: int = 0
+                for sq in squares:
+                    occupied |= 1 << sq
+                for piece in range(self._count):
+                    if self._colors[piece] != mover:
+                        continue
+                    # the index of the position before the move, with the mover to move
+                    base: int = (idx ^ 1) - squares[piece] * self._factors[piece]
+                    for origin in self._origins(piece, squares, occupied):
+                        previous: int = base + origin * self._factors[piece]
+                        flags: int = state[previous]
+                        if flags & (_LEGAL | _SETTLED) != _LEGAL:
+                            continue
+                        if not win:
+                            if plies + 1 > MAX_PLIES:
+                                raise ValueError(f"{self._signature()} has mates longer than {MAX_PLIES} plies")
+                            state[previous] = flags | _PENDING_WIN
+                            buckets[plies + 1].append(2 * previous + 1)
+                        elif not flags & _PENDING_WIN:
+                            remaining[previous] -= 1
+                            longestLoss[previous] = max(longestLoss[previous], plies)
+                            if remaining[previous] == 0:
+                                # the longest way out may be a capture or promotion counted at the start
+                                self._pushLoss(buckets, previous, longestLoss[previous] + 1)
+            # settled positions are not looked at again
+            buckets[plies] = array("q")
+        return values
+
+    def _pushLoss(self, buckets: list[array], idx: int, plies: int) -> None:
+        if plies > MAX_PLIES:
+            raise ValueError(f"{self._signature()} has mates longer than {MAX_PLIES} plies")
+        buckets[plies].append(2 * idx)
+
+    def _signature(self) -> str:
+        return _sideSignature(self._types[:self._kings[1]]) + _sideSignature(self._types[self._kings[1]:])
+
+# the canonical signatures that captures and promotions from a signature lead to
+def _dependencies(white: str, black: str) -> list[str]:
+    toRet: list[str] = []
+    sides: list[str] = [white, black]
+    for side in range(2):
+        for i, letter in enumerate(sides[side]):
+            changes: list[str] = []
+            if letter != "K":
+                changes.append(sides[side][:i] + sides[side][i + 1:])
+            if letter == "P":
+                changes.extend(sides[side][:i] + promotion + sides[side][i + 1:] for promotion in "QRBN")
+            for changed in changes:
+                after: list[str] = sides.copy()
+                after[side] = _sideSignature([_LETTERS.index(piece) for piece in changed])
+                if _alwaysDrawn(after[0], after[1]):
+                    continue
+                name: str = after[0] + after[1] if isCanonical(after[0], after[1]) else after[1] + after[0]
+                if name not in toRet:
+                    toRet.append(name)
+    return toRet
+
+def tablePath(directory: str, signature: str) -> str:
+    return os.path.join(directory, f"{signature}.tb")
+
+# Generates the table of a signature into directory, along with the smaller tables it depends on
+# that are not there yet. Returns the canonical signature that was written.
+def generateTable(signature: str, directory: str, verbose: bool = False) -> str:
+    white, black = splitSignature(signature)
+    if len(white) + len(black) > MAX_PIECES:
+        raise ValueError(f"Tables go up to {MAX_PIECES} pieces")
+    if _pawnsOnBothSides(white, black):
+        raise ValueError("Tables with pawns on both sides would need en passant")
+    if not isCanonical(white, black):
+        white, black = black, white
+    name: str = white + black
+    if os.path.exists(tablePath(directory, name)) or _alwaysDrawn(white, black):
+        return name
+    for dependency in _dependencies(white, black):
+        generateTable(dependency, directory, verbose)
+    loaded: dict[str, bytes] = {}
+    def getTable(tableName: str) -> Optional[bytes]:
+        if tableName not in loaded:
+            path: str = tablePath(directory, tableName)
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as file:
+                loaded[tableName] = file.read()
+        return loaded[tableName]
+    start: float = time.perf_counter()
+    values: bytearray = _Generator(name, getTable).generate()
+    os.makedirs(directory, exist_ok=True)
+    # written aside and renamed so that an interrupted run never leaves a partial table behind
+    with open(tablePath(directory, name) + ".tmp", "wb") as file:
+        file.write(values)
+    os.replace(tablePath(directory, name) + ".tmp", tablePath(directory, name))
+    if verbose:
+        print(f"{name}: {len(values)} positions in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return name
+
+# Probes memory-mapped tables from a directory, opening each file the first time it is needed
+class Tablebase():
+    def __init__(self, directory: str):
+        self._directory: str = directory
+        self._tables: dict[str, Optional[mmap.mmap]] = {}
+
+    def close(self) -> None:
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables = {}
+
+    def _table(self, signature: str) -> Optional[mmap.mmap]:
+        if signature not in self._tables:
+            path: str = tablePath(self._directory, signature)
+            table: Optional[mmap.mmap] = None
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._tables[signature] = table
+        return self._tables[signature]
+
+    # whether the position could be in a table at all
+    def covers(self, board: ChessBoard) -> bool:
+        return (len(board.whitePieces) + len(board.blackPieces) <= MAX_PIECES
+                and board._castlingRights == 0 and board._enPassantFile < 0)
+
+    # the table byte of the position for the side to move, None when it is not covered
+    def probe(self, board: ChessBoard) -> Optional[int]:
+        if not self.covers(board):
+            return None
+        pieces: list[ChessPiece] = board.whitePieces + board.blackPieces
+        return _lookup([piece._color.value for piece in pieces], [piece._type.value for piece in pieces],
+                       [piece._position for piece in pieces], board.sideToMove.value, self._table)
+
+    # The move that mates fastest, holds the draw, or gets mated slowest, with the table byte of the
+    # position. (NO_MOVE, None) when some position after a move is not covered.
+    def bestMove(self, board: ChessBoard) -> tuple[int, Optional[int]]:
+        value: Optional[int] = self.probe(board)
+        if value is None:
+            return (NO_MOVE, None)
+        color: PieceColor = board.sideToMove
+        toRet: int = NO_MOVE
+        bestRank: Optional[tuple[int, int]] = None
+        for code in board.getLegalMoveCodes(color):
+            curMove = board.makeMove(code, color)
+            childValue: Optional[int] = self.probe(board)
+            board.unMove(curMove)
+            if childValue is None:
+                return (NO_MOVE, None)
+            if isLoss(childValue):
+                rank: tuple[int, int] = (2, -distance(childValue))
+            elif isWin(childValue):
+                rank: tuple[int, int] = (0, distance(childValue))
+            else:
+                rank: tuple[int, int] = (1, 0)
+            if bestRank is None or rank > bestRank:
+                bestRank = rank
+                toRet = code
+        return (toRet, value)
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Generate and probe endgame tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="build tables and the smaller ones they need")
+    generate.add_argument("signatures", nargs="+", help="material such as KQK, KRK, KPK or KQKR")
+    generate.add_argument("--dir", default="tables", help="directory of the table files")
+    probe = commands.add_parser("probe", help="look a position up")
+    probe.add_argument("fen")
+    probe.add_argument("--dir", default="tables", help="directory of the table files")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        for signature in args.signatures:
+            generateTable(signature, args.dir, verbose=True)
+        return 0
+    board: ChessBoard = ChessBoard.fromFEN(args.fen)
+    tablebase: Tablebase = Tablebase(args.dir)
+    move, value = tablebase.bestMove(board)
+    tablebase.close()
+    if value is None:
+        print("not in the tables")
+        return 1
+    result: str = "win" if isWin(value) else "loss" if isLoss(value) else "draw"
+    print(f"{result} in {distance(value)} plies, best move {moveToNotation(move) if move != NO_MOVE else '-'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
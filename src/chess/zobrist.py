@@ -0,0 +1,19 @@
+from random import Random
+
+# fixed seed so that keys are stable across processes and runs
+_random: Random = Random(0x5EED)
+
+# indexed by color.value * 6 + type.value, then by square
+PIECE_KEYS: list[list[int]] = [[_random.getrandbits(64) for _ in range(64)] for _ in range(12)]
+BLACK_TO_MOVE_KEY: int = _random.getrandbits(64)
+# indexed by the castling rights mask
+CASTLING_KEYS: list[int] = [0] + [_random.getrandbits(64) for _ in range(15)]
+# indexed by the file of the en passant target square
+EN_PASSANT_KEYS: list[int] = [_random.getrandbits(64) for _ in range(8)]
+
+WHITE_SHORT: int = 1
+WHITE_LONG: int = 2
+BLACK_SHORT: int = 4
+BLACK_LONG: int = 8
+# squares whose king or rook decide the castling rights
+CASTLING_SQUARES: int = (1 << 0) | (1 << 4) | (1 << 7) | (1 << 56) | (1 << 60) | (1 << 63)
@@ -0,0 +1,84 @@
+from agent.minimax_agent import PruningAgent, PVSAgent
+from agent.scorer import PruningScorer
+from agent.search_stats import SearchStats
+from chess.board import ChessBoard
+from chess.perft import STANDARD_POSITIONS
+from chess.pieces import PieceColor
+import pytest
+
+pytest.importorskip("numpy")
+
+from agent.batch_scorer import BatchScorer, LeafCollector, encodePositions, frontierSearch
+
+BOARDS: list[ChessBoard] = [ChessBoard.fromFEN(fen) for _, fen, _ in STANDARD_POSITIONS]
+
+def test_materialMatchesPruningScorer():
+    scores: list[int] = BatchScorer.material().scoreBatch(encodePositions(BOARDS)).tolist()
+    assert scores == [PruningScorer().score(board, PieceColor.WHITE) for board in BOARDS]
+
+def test_batchMatchesSingleScores():
+    scorer: BatchScorer = BatchScorer()
+    assert scorer.score(ChessBoard(), PieceColor.WHITE) == 0
+    assert scorer.scoreBatch(encodePositions(BOARDS)).tolist() == [scorer.score(board, PieceColor.WHITE) for board in BOARDS]
+
+@pytest.mark.parametrize("agentType", [PruningAgent, PVSAgent])
+@pytest.mark.parametrize("fen", [fen for _, fen, _ in STANDARD_POSITIONS[:3]])
+def test_batchedSearchMatchesPlain(agentType: type, fen: str):
+    # with the same values the batched leaves change nothing but where the scores come from
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    plain: tuple[int, int] = agentType(board, board.sideToMove, maxDepth=2).analyze()
+    batched: tuple[int, int] = agentType(board, board.sideToMove, maxDepth=2, batchScorer=BatchScorer.material()).analyze()
+    assert batched == plain
+
+def test_childrenMatchPlayedMoves():
+    # the standard positions hold castling, en passant and promotions
+    for board in BOARDS:
+        for move in board.getLegalMoveCodes(board.sideToMove):
+            collector: LeafCollector = LeafCollector()
+            collector.addChild(board, move)
+            curMove = board.makeMove(move, board.sideToMove)
+            assert collector._bitboards == board._pieceBB, (board.toFEN(), move)
+            board.unMove(curMove)
+
+@pytest.mark.parametrize("agentType", [PruningAgent, PVSAgent])
+def test_marginsScaleWithPawnValue(agentType: type):
+    # the same search in centipawns, every score a hundred times the one in pawns
+    board: ChessBoard = ChessBoard.fromFEN(STANDARD_POSITIONS[1][1])
+    pawns: tuple[int, int] = agentType(board, board.sideToMove, maxDepth=3, batchScorer=BatchScorer.material()).analyze()
+    centipawns: tuple[int, int] = agentType(board, board.sideToMove, maxDepth=3,
+                                            batchScorer=BatchScorer([[0] * 64 for _ in range(6)], pawnValue=100)).analyze()
+    assert centipawns == (pawns[0], pawns[1] * 100)
+
+class CountingScorer(BatchScorer):
+    def __init__(self):
+        super().__init__()
+        self.calls: int = 0
+
+    def scoreBatch(self, positions):
+        self.calls += 1
+        return super().scoreBatch(positions)
+
+@pytest.mark.parametrize("agentType", [PruningAgent, PVSAgent])
+def test_batchedLeavesMatchPerLeaf(agentType: type):
+    board: ChessBoard = ChessBoard.fromFEN(STANDARD_POSITIONS[1][1])
+    perLeafScorer: CountingScorer = CountingScorer()
+    perLeaf: tuple[int, int] = agentType(board, board.sideToMove, maxDepth=3, batchScorer=perLeafScorer,
+                                         batchLeaves=False).analyze()
+    batchedScorer: CountingScorer = CountingScorer()
+    batched: tuple[int, int] = agentType(board, board.sideToMove, maxDepth=3, batchScorer=batchedScorer).analyze()
+    assert batched == perLeaf
+    # a batch goes through numpy once for all of its positions
+    assert batchedScorer.calls * 2 < perLeafScorer.calls
+
+def test_frontierSearchMatchesPruning():
+    board: ChessBoard = ChessBoard.fromFEN(STANDARD_POSITIONS[2][1])
+    scorer: BatchScorer = BatchScorer()
+    agent: PruningAgent = PruningAgent(board, board.sideToMove, maxDepth=2, quiescence=False, tableMegabytes=0,
+                                       batchScorer=scorer)
+    assert frontierSearch(board, 2, scorer)[1] == agent.analyze()[1]
+
+def test_batchesAreTimed():
+    stats: SearchStats = SearchStats()
+    board: ChessBoard = ChessBoard()
+    PruningAgent(board, PieceColor.WHITE, maxDepth=2, batchScorer=BatchScorer.material(), stats=stats).analyze()
+    assert stats.evaluationTime > 0
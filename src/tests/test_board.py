@@ -0,0 +1,204 @@
+from chess.board import STARTING_FEN, ChessBoard
+from chess.movement import Move, notationToMove
+from chess.perft import STANDARD_POSITIONS
+from chess.pieces import ChessPiece, PieceColor
+from chess.snapshot import PositionSnapshot
+import pytest
+import random
+
+def _play(board: ChessBoard, notations: list[str]) -> list[Move]:
+    return [board.makeMove(notationToMove(notation), board.sideToMove) for notation in notations]
+
+@pytest.mark.parametrize("fen", [fen for _, fen, _ in STANDARD_POSITIONS])
+def test_snapshotRestoreClone(fen: str):
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    snapshot: PositionSnapshot = board.snapshot()
+    assert ChessBoard.fromSnapshot(snapshot).toFEN() == board.toFEN()
+    clone: ChessBoard = board.clone()
+    assert clone.toFEN() == board.toFEN()
+    assert clone.zobristKey == board.zobristKey
+    # moves on the clone leave the original alone, and restore brings the clone back
+    code: int = clone.getLegalMoveCodes(clone.sideToMove)[0]
+    clone.makeMove(code, clone.sideToMove)
+    assert board.toFEN() == fen
+    clone.restore(snapshot)
+    assert clone.toFEN() == fen
+    assert clone.zobristKey == board.zobristKey
+    assert sorted(clone.getLegalMoveCodes(clone.sideToMove)) == sorted(board.getLegalMoveCodes(board.sideToMove))
+
+def test_cloneTakesBackItsOwnMovesOnly():
+    board: ChessBoard = ChessBoard()
+    _play(board, ["e2e4", "e7e5"])
+    clone: ChessBoard = board.clone()
+    assert clone.curNumOfMove == board.curNumOfMove
+    moves: list[Move] = _play(clone, ["g1f3", "b8c6"])
+    for move in reversed(moves):
+        clone.unMove(move)
+    assert clone.toFEN() == board.toFEN()
+    with pytest.raises(ValueError):
+        clone.unMove(moves[0])
+    restored: ChessBoard = ChessBoard.fromFEN(STARTING_FEN)
+    with pytest.raises(ValueError):
+        restored.unMove(moves[0])
+
+# a random walk through the position, checking the key after every move and every take back
+@pytest.mark.parametrize("fen", [fen for _, fen, _ in STANDARD_POSITIONS])
+def test_zobristKeyAfterMakeAndUnmake(fen: str):
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    rng: random.Random = random.Random(fen)
+    for _ in range(20):
+        keys: list[int] = []
+        moves: list[Move] = []
+        for _ in range(8):
+            codes: list[int] = board.getLegalMoveCodes(board.sideToMove)
+            if len(codes) == 0:
+                break
+            keys.append(board.zobristKey)
+            moves.append(board.makeMove(rng.choice(codes), board.sideToMove))
+            assert board.zobristKey == board.computeZobristKey()
+            assert ChessBoard.fromFEN(board.toFEN()).zobristKey == board.zobristKey
+        for move in reversed(moves):
+            board.unMove(move)
+            assert board.zobristKey == keys.pop()
+    assert board.zobristKey == ChessBoard.fromFEN(fen).zobristKey
+
+def test_zobristKeyTellsPositionsApart():
+    assert ChessBoard().zobristKey == ChessBoard.fromFEN(STARTING_FEN).zobristKey
+    board: ChessBoard = ChessBoard()
+    _play(board, ["e2e4"])
+    # the same placement with the other side to move, or without the castling rights, is another position
+    assert board.zobristKey != ChessBoard.fromFEN("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 1").zobristKey
+    assert board.zobristKey != ChessBoard.fromFEN("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b - - 0 1").zobristKey
+    # e4 can't be taken en passant, so the target square does not change the key
+    assert board.zobristKey == ChessBoard.fromFEN("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1").zobristKey
+
+@pytest.mark.parametrize("fen", [fen for _, fen, _ in STANDARD_POSITIONS])
+def test_fenRoundTrip(fen: str):
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    assert board.toFEN() == fen
+    # and after moves, castling, captures and double pushes included
+    rng: random.Random = random.Random(fen)
+    for _ in range(12):
+        codes: list[int] = board.getLegalMoveCodes(board.sideToMove)
+        if len(codes) == 0:
+            break
+        board.makeMove(rng.choice(codes), board.sideToMove)
+        reloaded: ChessBoard = ChessBoard.fromFEN(board.toFEN())
+        assert reloaded.toFEN() == board.toFEN()
+        assert sorted(reloaded.getLegalMoveCodes(reloaded.sideToMove)) == sorted(board.getLegalMoveCodes(board.sideToMove))
+
+def test_fenOfPlayedMoves():
+    board: ChessBoard = ChessBoard()
+    assert board.toFEN() == STARTING_FEN
+    _play(board, ["e2e4", "c7c5", "g1f3"])
+    assert board.toFEN() == "rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2"
+    _play(board, ["d7d5", "e4d5", "e8d7"])
+    assert board.toFEN() == "rnbq1bnr/pp1kpppp/8/2pP4/8/5N2/PPPP1PPP/RNBQKB1R w KQ - 1 4"
+    # without the clocks a FEN starts them over
+    assert ChessBoard.fromFEN("8/8/8/3k4/8/8/8/3K4 b - -").toFEN() == "8/8/8/3k4/8/8/8/3K4 b - - 0 1"
+
+@pytest.mark.parametrize("fen", [
+    "",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0",
+    "rnbqkbnr/pppppppp/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/ppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPXPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQxq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e9 0 1",
+    # en passant targets without the pawn that just moved, or on the wrong rank
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b KQkq e3 0 1",
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e4 0 1",
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e3 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - zero 1",
+])
+def test_fenRejected(fen: str):
+    with pytest.raises(ValueError):
+        ChessBoard.fromFEN(fen)
+
+# the attack map square by square, through the single-square test instead of the map code
+def _rescanAttacks(board: ChessBoard, color: PieceColor) -> int:
+    toRet: int = 0
+    for idx in range(64):
+        if board.isAttacked(idx, color):
+            toRet |= 1 << idx
+    return toRet
+
+def _checkAttacks(board: ChessBoard) -> None:
+    for color in (PieceColor.WHITE, PieceColor.BLACK):
+        assert board.attackMap(color) == _rescanAttacks(board, color)
+        kingSquare: int = board.kingSquare(color)
+        assert board.isCheck(color) == board.isAttacked(kingSquare, PieceColor(1 - color.value))
+
+# move generation fills the cached maps, so every move and take back must leave none of them stale
+@pytest.mark.parametrize("fen", [fen for _, fen, _ in STANDARD_POSITIONS])
+def test_attackMapMatchesRescan(fen: str):
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    rng: random.Random = random.Random(fen)
+    for _ in range(10):
+        moves: list[Move] = []
+        for _ in range(8):
+            codes: list[int] = board.getLegalMoveCodes(board.sideToMove)
+            _checkAttacks(board)
+            if len(codes) == 0:
+                break
+            moves.append(board.makeMove(rng.choice(codes), board.sideToMove))
+            _checkAttacks(board)
+        for move in reversed(moves):
+            board.getLegalMoveCodes(board.sideToMove)
+            board.unMove(move)
+            _checkAttacks(board)
+
+def test_attackMapAfterNullMove():
+    board: ChessBoard = ChessBoard.fromFEN(STANDARD_POSITIONS[1][1])
+    board.getLegalMoveCodes(board.sideToMove)
+    board.makeNullMove()
+    _checkAttacks(board)
+    board.getLegalMoveCodes(board.sideToMove)
+    board.unMakeNullMove()
+    _checkAttacks(board)
+
+# every piece on the board is in its color's list exactly once, at the index it remembers
+def _checkPieceLists(board: ChessBoard) -> None:
+    for color, pieces in ((PieceColor.WHITE, board.whitePieces), (PieceColor.BLACK, board.blackPieces)):
+        onBoard: list[int] = [idx for idx in range(64) if board[idx] is not None and board[idx]._color == color]
+        assert sorted(piece._position for piece in pieces) == onBoard
+        for idx, piece in enumerate(pieces):
+            assert piece._listIdx == idx
+            assert board[piece._position] is piece
+
+@pytest.mark.parametrize("fen", [fen for _, fen, _ in STANDARD_POSITIONS])
+def test_pieceListsAfterCapturesAndTakeBacks(fen: str):
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    _checkPieceLists(board)
+    rng: random.Random = random.Random(fen)
+    for _ in range(10):
+        moves: list[Move] = []
+        for _ in range(8):
+            codes: list[int] = board.getLegalMoveCodes(board.sideToMove)
+            if len(codes) == 0:
+                break
+            # captures first where there are any, they are what takes pieces out of the lists
+            captures: list[int] = [code for code in codes if board[(code >> 6) & 63] is not None]
+            moves.append(board.makeMove(rng.choice(captures if captures else codes), board.sideToMove))
+            _checkPieceLists(board)
+        for move in reversed(moves):
+            board.unMove(move)
+            _checkPieceLists(board)
+
+def test_removePieceSwapsTheLastPieceIn():
+    board: ChessBoard = ChessBoard()
+    first: ChessPiece = board.whitePieces[0]
+    last: ChessPiece = board.whitePieces[-1]
+    count: int = len(board.whitePieces)
+    board._removePiece(first)
+    assert first._listIdx == -1
+    assert len(board.whitePieces) == count - 1
+    assert board.whitePieces[0] is last and last._listIdx == 0
+    # the piece that was swapped in can be taken out in turn
+    board._removePiece(last)
+    assert board.whitePieces[0] is not last and last._listIdx == -1
+    assert all(piece._listIdx == idx for idx, piece in enumerate(board.whitePieces))
@@ -0,0 +1,78 @@
+from agent.game_server import GameServer
+from chess.board import ChessBoard
+from chess.movement import notationToMove
+import asyncio
+import os
+
+STALEMATED_OPPONENT: str = "7k/5Q2/8/8/8/8/8/K7 w - - 0 1"
+# seconds any step of a test may take
+TIMEOUT: float = 30.0
+
+# Starts a server on a unix socket in directory, runs the client coroutine against it and shuts it
+# down. Every step has a deadline, so a server that does not let go of its connections fails the test.
+def _withServer(directory: str, client, **kwargs) -> None:
+    async def run() -> None:
+        path: str = os.path.join(directory, "server.sock")
+        server: GameServer = GameServer(workers=1, **kwargs)
+        serving: asyncio.Task = asyncio.create_task(server.serve(unixPath=path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(path)
+        try:
+            await asyncio.wait_for(client(reader, writer), TIMEOUT)
+            writer.write(b"quit\n")
+            await writer.drain()
+            # the server closes its side on quit, the rest of its replies run up to the end of the stream
+            await asyncio.wait_for(reader.read(), TIMEOUT)
+        finally:
+            writer.close()
+            serving.cancel()
+            try:
+                await asyncio.wait_for(serving, TIMEOUT)
+            except asyncio.CancelledError:
+                pass
+    asyncio.run(run())
+
+async def _ask(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, line: str) -> str:
+    writer.write((line + "\n").encode())
+    await writer.drain()
+    return (await reader.readline()).decode().strip()
+
+def test_playsAGame(tmp_path):
+    async def client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        assert await _ask(reader, writer, "isready") == "readyok"
+        assert await _ask(reader, writer, "move e2e4") == "error no game, send newgame first"
+        assert await _ask(reader, writer, "newgame white depth 1") == "game 1"
+        assert await _ask(reader, writer, "move e2e5") == "illegal e2e5"
+        assert (await _ask(reader, writer, "move e2e4")).startswith("info nodes ")
+        reply: str = (await reader.readline()).decode().strip()
+        assert reply.startswith("bestmove ")
+        board: ChessBoard = ChessBoard()
+        board.makeMove(notationToMove("e2e4"), board.sideToMove)
+        code: int = notationToMove(reply.split()[1])
+        assert code in board.getLegalMoveCodes(board.sideToMove)
+        board.makeMove(code, board.sideToMove)
+        assert await _ask(reader, writer, "fen") == f"fen {board.toFEN()}"
+        assert await _ask(reader, writer, "bogus") == "error unknown command bogus"
+    _withServer(str(tmp_path), client)
+
+def test_engineMovesFirstWithALegalMove(tmp_path):
+    async def client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        assert await _ask(reader, writer, f"newgame black depth 2 fen {STALEMATED_OPPONENT}") == "game 1"
+        assert (await reader.readline()).decode().startswith("info ")
+        reply: str = (await reader.readline()).decode().strip()
+        code: int = notationToMove(reply.split()[1])
+        board: ChessBoard = ChessBoard.fromFEN(STALEMATED_OPPONENT)
+        assert code in board.getLegalMoveCodes(board.sideToMove)
+    _withServer(str(tmp_path), client)
+
+def test_busy(tmp_path):
+    async def client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # the engine would have to search before the game starts
+        assert await _ask(reader, writer, "newgame black") == "busy"
+        assert await _ask(reader, writer, "fen") == "error no game, send newgame first"
+        reply: str = await _ask(reader, writer, "newgame white")
+        assert reply.startswith("game ")
+        assert await _ask(reader, writer, "move e2e4") == "busy"
+        assert await _ask(reader, writer, "fen") == f"fen {ChessBoard().toFEN()}"
+    _withServer(str(tmp_path), client, maxPending=0)
@@ -0,0 +1,59 @@
+from agent.minimax_agent import PruningAgent
+from agent.opening_book import ENTRY_BYTES, OpeningBook, buildBook
+from chess.board import ChessBoard
+from chess.movement import NO_MOVE, moveToNotation, notationToMove
+from chess.pieces import PieceColor
+from typing import Iterator
+import pytest
+import random
+
+GAMES: list[list[str]] = [["e2e4", "e7e5", "g1f3"],
+                          ["e2e4", "c7c5"],
+                          ["e2e4", "e7e5", "f1c4"],
+                          ["d2d4", "d7d5"],
+                          ["e2e4", "e7e5", "e1e3"]]
+
+@pytest.fixture
+def book(tmp_path) -> Iterator[OpeningBook]:
+    path: str = str(tmp_path / "book.bin")
+    buildBook(GAMES, path)
+    toRet: OpeningBook = OpeningBook(path)
+    yield toRet
+    toRet.close()
+
+def _play(moves: list[str]) -> ChessBoard:
+    board: ChessBoard = ChessBoard()
+    for notation in moves:
+        board.makeMove(notationToMove(notation), board.sideToMove)
+    return board
+
+def test_weightsBestFirst(book: OpeningBook):
+    entries: list[tuple[int, int]] = book.probe(ChessBoard().zobristKey)
+    assert [(moveToNotation(move), weight) for move, weight in entries] == [("e2e4", 4), ("d2d4", 1)]
+    assert moveToNotation(book.choose(ChessBoard())) == "e2e4"
+
+def test_illegalMovesEndTheGame(book: OpeningBook):
+    # e1e3 is not a move, nothing after e7e5 comes from the last game
+    entries: list[tuple[int, int]] = book.probe(_play(["e2e4", "e7e5"]).zobristKey)
+    assert sorted(moveToNotation(move) for move, _ in entries) == ["f1c4", "g1f3"]
+    assert len(book) == 7
+
+def test_outOfBook(book: OpeningBook):
+    assert book.choose(_play(["a2a3"])) == NO_MOVE
+
+def test_randomChoiceStaysInBook(book: OpeningBook):
+    rng: random.Random = random.Random(1)
+    choices: set[str] = {moveToNotation(book.choose(ChessBoard(), rng)) for _ in range(50)}
+    assert choices == {"e2e4", "d2d4"}
+
+def test_rejectsOtherFiles(tmp_path):
+    path = tmp_path / "not_a_book.bin"
+    path.write_bytes(b"x" * (ENTRY_BYTES + 1))
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+
+def test_agentPlaysFromBook(book: OpeningBook):
+    board: ChessBoard = _play(["e2e4"])
+    agent: PruningAgent = PruningAgent(board, PieceColor.BLACK, book=book)
+    assert agent.getMove() == "e7e5"
+    assert agent.getNodeCount() == 0
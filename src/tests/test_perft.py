@@ -0,0 +1,19 @@
+from chess.board import ChessBoard
+from chess.perft import STANDARD_POSITIONS, divide, perft
+import pytest
+
+# the published counts of every standard position up to depth 3
+@pytest.mark.parametrize("name,fen,counts", STANDARD_POSITIONS, ids=[name for name, _, _ in STANDARD_POSITIONS])
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_perftMatchesPublishedCounts(name: str, fen: str, counts: list[int], depth: int):
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    assert perft(board, depth) == counts[depth - 1]
+    # and every move was taken back
+    assert board.toFEN() == fen
+    assert board.zobristKey == ChessBoard.fromFEN(fen).zobristKey
+
+@pytest.mark.parametrize("name,fen,counts", STANDARD_POSITIONS, ids=[name for name, _, _ in STANDARD_POSITIONS])
+def test_divideAddsUpToPerft(name: str, fen: str, counts: list[int]):
+    split: dict[str, int] = divide(ChessBoard.fromFEN(fen), 2)
+    assert len(split) == counts[0]
+    assert sum(split.values()) == counts[1]
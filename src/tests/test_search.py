@@ -0,0 +1,82 @@
+from agent.minimax_agent import MinimaxAgent, PruningAgent, PVSAgent
+from agent.parallel_search import ParallelPruningAgent
+from chess.board import ChessBoard
+from chess.perft import STANDARD_POSITIONS
+from chess.movement import moveToNotation, notationToMove
+from chess.pieces import PieceColor
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+
+# black has no legal move before white plays, white has 26
+STALEMATED_OPPONENT: str = "7k/5Q2/8/8/8/8/8/K7 w - - 0 1"
+HANGING_QUEEN: str = "4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1"
+
+def _isLegal(board: ChessBoard, notation: str) -> bool:
+    return notationToMove(notation) in board.getLegalMoveCodes(board.sideToMove)
+
+@pytest.mark.parametrize("kwargs", [{}, {"nodeLimit": 2000}])
+def test_minimaxRootMoveIsLegal(kwargs: dict):
+    board: ChessBoard = ChessBoard.fromFEN(STALEMATED_OPPONENT)
+    assert _isLegal(board, MinimaxAgent(board, PieceColor.WHITE, **kwargs).getMove())
+
+@pytest.mark.parametrize("kwargs", [{}, {"nodeLimit": 2000}, {"tableMegabytes": 0}, {"quiescence": False}])
+def test_pruningRootMoveIsLegal(kwargs: dict):
+    board: ChessBoard = ChessBoard.fromFEN(STALEMATED_OPPONENT)
+    agent: PruningAgent = PruningAgent(board, PieceColor.WHITE, **kwargs)
+    assert _isLegal(board, agent.getMove())
+    # a second search starts from the table the first one filled
+    assert _isLegal(board, agent.getMove())
+
+def test_pruningTakesHangingQueen():
+    board: ChessBoard = ChessBoard.fromFEN(HANGING_QUEEN)
+    move, score = PruningAgent(board, PieceColor.WHITE).analyze()
+    assert moveToNotation(move) == "d2d5"
+    assert score > 0
+
+def test_blackTakesHangingQueen():
+    board: ChessBoard = ChessBoard.fromFEN("4k3/3r4/8/8/3Q4/8/8/4K3 b - - 0 1")
+    move, score = PruningAgent(board, PieceColor.BLACK).analyze()
+    assert moveToNotation(move) == "d7d4"
+    assert score < 0
+
+def test_iterativeDeepeningMatchesFixedDepth():
+    board: ChessBoard = ChessBoard.fromFEN("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+    fixed: tuple[int, int] = PruningAgent(board, PieceColor.WHITE, maxDepth=3).analyze()
+    deepened: tuple[int, int] = PruningAgent(board, PieceColor.WHITE, nodeLimit=10 ** 9, maxDepth=3).analyze()
+    assert fixed[1] == deepened[1]
+
+@pytest.mark.parametrize("kwargs", [{}, {"nodeLimit": 2000}, {"nullMove": False}])
+def test_pvsRootMoveIsLegal(kwargs: dict):
+    board: ChessBoard = ChessBoard.fromFEN(STALEMATED_OPPONENT)
+    agent: PVSAgent = PVSAgent(board, PieceColor.WHITE, **kwargs)
+    assert _isLegal(board, agent.getMove())
+    assert _isLegal(board, agent.getMove())
+
+@pytest.mark.parametrize("fen", [HANGING_QUEEN, "4k3/3r4/8/8/3Q4/8/8/4K3 b - - 0 1",
+                                 "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"])
+def test_pvsMatchesPruning(fen: str):
+    # without null moves, which may prune differently, both searches back up the same minimax score
+    board: ChessBoard = ChessBoard.fromFEN(fen)
+    pruning: tuple[int, int] = PruningAgent(board, board.sideToMove, maxDepth=3).analyze()
+    pvs: tuple[int, int] = PVSAgent(board, board.sideToMove, maxDepth=3, nullMove=False).analyze()
+    assert pvs[1] == pruning[1]
+
+def test_parallelRootMoveIsLegal():
+    board: ChessBoard = ChessBoard.fromFEN(STALEMATED_OPPONENT)
+    agent: ParallelPruningAgent = ParallelPruningAgent(board, PieceColor.WHITE, workers=1)
+    try:
+        assert _isLegal(board, agent.getMove())
+    finally:
+        agent.close()
+
+@pytest.mark.parametrize("kwargs", [{}, {"timeLimit": 60.0}, {"timeLimit": 60.0, "quiescence": False}])
+def test_parallelMatchesPruning(kwargs: dict):
+    # deepening, the later iterations start from an aspiration window, which the scores without
+    # quiescence fall out of on both sides. Without tables both searches back up the same minimax score
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for _, fen, _ in STANDARD_POSITIONS[:4]:
+            board: ChessBoard = ChessBoard.fromFEN(fen)
+            serial: tuple[int, int] = PruningAgent(board, board.sideToMove, tableMegabytes=0, maxDepth=3, **kwargs).analyze()
+            parallel: tuple[int, int] = ParallelPruningAgent(board, board.sideToMove, workers=2, pool=pool, tableMegabytes=0,
+                                                             maxDepth=3, **kwargs).analyze()
+            assert parallel[1] == serial[1], fen
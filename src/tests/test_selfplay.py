@@ -0,0 +1,52 @@
+from agent import selfplay
+from agent.minimax_agent import PruningAgent
+from agent.selfplay import parseConfig, playGame, summarize
+from chess.board import ChessBoard
+from chess.pieces import PieceColor
+import pytest
+
+STALEMATED_OPPONENT: str = "7k/5Q2/8/8/8/8/8/K7 w - - 0 1"
+
+class _IllegalAgent(PruningAgent):
+    def getMove(self) -> str:
+        return "a1a1"
+
+def _game(score: float) -> dict:
+    return {"score": score, "nodes": [10, 10], "seconds": [1.0, 1.0], "moves": [1, 1]}
+
+def test_parseConfig():
+    assert parseConfig("pvs:depth=3,table=8,nullmove=0") == ("pvs", {"maxDepth": 3, "tableMegabytes": 8, "nullMove": False})
+    with pytest.raises(ValueError):
+        parseConfig("pvs:speed=3")
+
+@pytest.mark.parametrize("config", ["pruning:nullmove=0", "minimax:quiescence=1", "minimax:table=4"])
+def test_parseConfigRejectsOptionsOfOtherAgents(config: str):
+    with pytest.raises(ValueError):
+        parseConfig(config)
+
+def test_parseConfigOptionsAreAccepted():
+    # every option an agent is allowed takes effect in its constructor
+    for kind, names in selfplay._AGENT_OPTIONS.items():
+        board: ChessBoard = ChessBoard()
+        config: tuple[str, dict] = parseConfig(kind + ":" + ",".join(f"{name}=1" for name in names))
+        selfplay._AGENTS[kind](board, PieceColor.WHITE, **config[1])
+
+def test_playsLegalMoves():
+    # the engines score material only, keeping black stalemated is as good as any other move
+    game: dict = playGame(0, STALEMATED_OPPONENT, ("pvs", {"maxDepth": 2}), ("pvs", {"maxDepth": 2}), True, 4)
+    assert game["plies"] >= 1
+    assert not game["reason"].startswith("illegal")
+
+def test_illegalMoveLoses(monkeypatch: pytest.MonkeyPatch):
+    # the second engine plays white and loses on its first move
+    monkeypatch.setitem(selfplay._AGENTS, "illegal", _IllegalAgent)
+    game: dict = playGame(0, "", ("pruning", {"maxDepth": 1}), ("illegal", {}), False, 10)
+    assert (game["result"], game["reason"], game["score"], game["plies"]) == ("0-1", "illegal move a1a1", 1.0, 0)
+
+def test_summary():
+    summary: dict = summarize([_game(1.0), _game(0.5), _game(0.5), _game(0.0), _game(1.0)])
+    assert (summary["wins"], summary["draws"], summary["losses"]) == (2, 2, 1)
+    assert summary["elo"] > 0 and summary["eloMargin"] > 0
+    # equal scores tell nothing about the spread
+    assert summarize([_game(0.5), _game(0.5)])["eloMargin"] is None
+    assert summarize([_game(1.0)])["elo"] is None
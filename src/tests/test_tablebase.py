@@ -0,0 +1,143 @@
+from chess.board import ChessBoard
+from chess.movement import moveToNotation
+from chess.tablebase import DRAW, LOSS, _LETTERS, Tablebase, _Generator, distance, generateTable, isLoss, isWin, tablePath
+from typing import Iterator, Optional
+import random
+import pytest
+
+# everything that reads the KQK table waits for it to be generated, which takes a while
+
+@pytest.fixture(scope="module")
+def tableDir(tmp_path_factory: pytest.TempPathFactory) -> str:
+    directory: str = str(tmp_path_factory.mktemp("tables"))
+    generateTable("KQK", directory)
+    return directory
+
+@pytest.fixture
+def tablebase(tableDir: str) -> Iterator[Tablebase]:
+    toRet: Tablebase = Tablebase(tableDir)
+    yield toRet
+    toRet.close()
+
+@pytest.mark.slow
+def test_mateInOne(tablebase: Tablebase):
+    board: ChessBoard = ChessBoard.fromFEN("k7/8/1K6/8/8/8/8/6Q1 w - - 0 1")
+    move, value = tablebase.bestMove(board)
+    assert value == 1
+    assert moveToNotation(move) == "g1g8"
+
+@pytest.mark.slow
+def test_checkmateAndStalemate(tablebase: Tablebase):
+    assert tablebase.probe(ChessBoard.fromFEN("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")) == LOSS
+    assert tablebase.probe(ChessBoard.fromFEN("k7/8/1QK5/8/8/8/8/8 b - - 0 1")) == DRAW
+
+@pytest.mark.slow
+def test_colorsSwapped(tablebase: Tablebase):
+    # the same mate in one with black as the stronger side is read from the KQK table upside down
+    board: ChessBoard = ChessBoard.fromFEN("6q1/8/8/8/8/1k6/8/K7 b - - 0 1")
+    assert tablebase.probe(board) == 1
+
+@pytest.mark.slow
+def test_longestMate(tableDir: str):
+    # the longest KQK win is mate in 10 moves
+    with open(tablePath(tableDir, "KQK"), "rb") as file:
+        table: bytes = file.read()
+    assert max(distance(value) for value in table[0::2] if isWin(value)) == 19
+
+def test_pawnsOnBothSidesLeftOut(tmp_path):
+    with pytest.raises(ValueError):
+        generateTable("KPKP", str(tmp_path))
+    tablebase: Tablebase = Tablebase(str(tmp_path))
+    assert tablebase.probe(ChessBoard.fromFEN("8/8/8/3k4/3p4/8/3P4/3K4 w - - 0 1")) is None
+
+# Every value of a generated table must follow from its moves: a win is one ply longer than the
+# fastest loss it can reach, a loss one ply longer than the slowest win of the opponent.
+def _checkTable(generator: _Generator, values: bytearray) -> None:
+    for idx in range(len(values)):
+        sideToMove, squares = generator._decode(idx)
+        if not generator._isLegal(sideToMove, squares):
+            continue
+        children: list[int] = []
+        for move in generator._moves(sideToMove, squares):
+            piece, dst, captured, promotion = move
+            if captured >= 0 or promotion >= 0:
+                child: Optional[int] = generator._exitValue(sideToMove, squares, move)
+            else:
+                after: list[int] = squares.copy()
+                after[piece] = dst
+                child = values[generator._encode(1 - sideToMove, after)]
+            children.append(child)
+        value: int = values[idx]
+        if isWin(value):
+            assert distance(value) == 1 + min(distance(child) for child in children if isLoss(child)), idx
+        elif isLoss(value) and len(children) > 0:
+            assert all(isWin(child) for child in children), idx
+            assert distance(value) == 1 + max(distance(child) for child in children), idx
+        elif value == DRAW:
+            assert not any(isLoss(child) for child in children), idx
+            assert len(children) == 0 or not all(isWin(child) for child in children), idx
+
+@pytest.mark.slow
+def test_consistent(tableDir: str):
+    with open(tablePath(tableDir, "KQK"), "rb") as file:
+        values: bytearray = bytearray(file.read())
+    _checkTable(_Generator("KQK", lambda signature: None), values)
+
+def _fen(generator: _Generator, sideToMove: int, squares: list[int]) -> str:
+    letters: list[str] = ["."] * 64
+    for i, sq in enumerate(squares):
+        letter: str = _LETTERS[generator._types[i]]
+        letters[sq] = letter if generator._colors[i] == 0 else letter.lower()
+    rows: list[str] = []
+    for row in range(7, -1, -1):
+        text: str = "".join(letters[row * 8:row * 8 + 8])
+        for empty in range(8, 0, -1):
+            text = text.replace("." * empty, str(empty))
+        rows.append(text)
+    return "/".join(rows) + (" w" if sideToMove == 0 else " b") + " - - 0 1"
+
+# the generator's own move generation against the board's, on random legal positions
+@pytest.mark.parametrize("signature", ["KQK", "KRKB", "KQKN", "KPKR", "KRKP", "KBNK"])
+def test_movesMatchBoard(signature: str):
+    generator: _Generator = _Generator(signature, lambda name: None)
+    rng: random.Random = random.Random(signature)
+    checked: int = 0
+    while checked < 300:
+        sideToMove, squares = generator._decode(rng.randrange(generator._size))
+        if not generator._isLegal(sideToMove, squares):
+            continue
+        checked += 1
+        board: ChessBoard = ChessBoard.fromFEN(_fen(generator, sideToMove, squares))
+        moves: list[int] = [squares[piece] | dst << 6 | max(promotion, 0) << 12
+                            for piece, dst, _, promotion in generator._moves(sideToMove, squares)]
+        assert sorted(moves) == sorted(board.getLegalMoveCodes(board.sideToMove)), board.toFEN()
+
+# A KPK generator over a made-up graph of three positions: in W white can step its king to B or
+# promote into a position black wins in 20 plies, in B black takes the pawn into a mate.
+class _GraphGenerator(_Generator):
+    W: tuple[int, list[int]] = (0, [4, 8, 60])
+    B: tuple[int, list[int]] = (1, [12, 8, 60])
+
+    def __init__(self):
+        super().__init__("KPK", lambda signature: None)
+
+    def _isLegal(self, sideToMove: int, squares: list[int]) -> bool:
+        return (sideToMove, squares) in (_GraphGenerator.W, _GraphGenerator.B)
+
+    def _moves(self, sideToMove: int, squares: list[int]) -> list[tuple[int, int, int, int]]:
+        if sideToMove == 0:
+            return [(0, 12, -1, -1), (1, 16, -1, 4)]
+        return [(2, 8, 1, -1)]
+
+    def _exitValue(self, sideToMove: int, squares: list[int], move: tuple[int, int, int, int]) -> Optional[int]:
+        return 20 if sideToMove == 0 else LOSS
+
+    def _origins(self, piece: int, squares: list[int], occupied: int) -> list[int]:
+        return [4] if piece == 0 and squares == _GraphGenerator.B[1] else []
+
+def test_lossTakesSlowestExit():
+    generator: _GraphGenerator = _GraphGenerator()
+    values: bytearray = generator.generate()
+    assert values[generator._encode(*_GraphGenerator.B)] == 1
+    # the quiet move loses in 2 plies but the promotion holds out for 21
+    assert values[generator._encode(*_GraphGenerator.W)] == LOSS + 21
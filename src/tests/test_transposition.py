@@ -0,0 +1,35 @@
+from agent.transposition import ENTRY_BYTES, Bound, TranspositionEntry, TranspositionTable
+from typing import Optional
+
+def _table() -> TranspositionTable:
+    return TranspositionTable(4 * ENTRY_BYTES)
+
+def test_probeChecksTheKey():
+    table: TranspositionTable = _table()
+    table.store(1, 3, 5, Bound.EXACT, 42)
+    entry: Optional[TranspositionEntry] = table.probe(1)
+    assert entry is not None and (entry.depth, entry.score, entry.bound, entry.bestMove) == (3, 5, Bound.EXACT, 42)
+    # same slot, different key
+    assert table.probe(1 + len(table)) is None
+    assert (table.hits, table.misses) == (1, 1)
+
+def test_deeperEntriesAreKept():
+    table: TranspositionTable = _table()
+    table.store(1, 4, 5, Bound.EXACT, 42)
+    table.store(1 + len(table), 2, 7, Bound.LOWER, 43)
+    assert table.probe(1).depth == 4
+    table.store(1 + len(table), 4, 7, Bound.LOWER, 43)
+    assert table.probe(1 + len(table)).score == 7
+    assert table.overwrites == 1
+
+def test_olderSearchesAreReplaced():
+    table: TranspositionTable = _table()
+    table.store(1, 6, 5, Bound.EXACT, 42)
+    table.newSearch()
+    table.store(1 + len(table), 1, 7, Bound.UPPER, 43)
+    assert table.probe(1) is None
+    assert table.probe(1 + len(table)).depth == 1
+
+def test_sizeFollowsMemory():
+    assert len(TranspositionTable(1024 * 1024)) * ENTRY_BYTES <= 1024 * 1024
+    assert len(TranspositionTable(1024 * 1024)) * 2 * ENTRY_BYTES > 1024 * 1024
@@ -0,0 +1,113 @@
+from agent.uci import ENGINE_NAME, UCIAgent, UCIEngine
+from chess.board import ChessBoard
+from chess.movement import notationToMove
+from chess.tablebase import generateTable
+import io
+import pytest
+import time
+
+STALEMATED_OPPONENT: str = "7k/5Q2/8/8/8/8/8/K7 w - - 0 1"
+
+def _engine() -> tuple[UCIEngine, io.StringIO]:
+    output: io.StringIO = io.StringIO()
+    return (UCIEngine(io.StringIO(), output), output)
+
+def _lines(output: io.StringIO) -> list[str]:
+    return output.getvalue().splitlines()
+
+def _finish(engine: UCIEngine) -> None:
+    engine._searchThread.join(60)
+    assert not engine._searchThread.is_alive()
+
+def _bestMove(output: io.StringIO) -> str:
+    moves: list[str] = [line.split()[1] for line in _lines(output) if line.startswith("bestmove")]
+    assert len(moves) == 1
+    return moves[0]
+
+def test_handshake():
+    engine, output = _engine()
+    assert engine.handle("uci")
+    assert engine.handle("isready")
+    lines: list[str] = _lines(output)
+    assert lines[0] == f"id name {ENGINE_NAME}"
+    assert any(line.startswith("option name Hash ") for line in lines)
+    assert lines[-2:] == ["uciok", "readyok"]
+    assert not engine.handle("quit")
+
+def test_goDepth():
+    engine, output = _engine()
+    engine.handle("position startpos moves e2e4 e7e5")
+    engine.handle("go depth 2")
+    _finish(engine)
+    assert [line.split()[2] for line in _lines(output) if line.startswith("info depth")] == ["1", "2"]
+    board: ChessBoard = ChessBoard.fromFEN("rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+    assert notationToMove(_bestMove(output)) in board.getLegalMoveCodes(board.sideToMove)
+
+def test_stalematedOpponent():
+    engine, output = _engine()
+    engine.handle(f"position fen {STALEMATED_OPPONENT}")
+    engine.handle("go depth 2")
+    _finish(engine)
+    board: ChessBoard = ChessBoard.fromFEN(STALEMATED_OPPONENT)
+    assert notationToMove(_bestMove(output)) in board.getLegalMoveCodes(board.sideToMove)
+
+def test_nullMoveOnlyWithoutLegalMoves():
+    engine, output = _engine()
+    engine.handle("position fen k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")
+    engine.handle("go depth 1")
+    _finish(engine)
+    assert _bestMove(output) == "0000"
+
+def test_illegalPositionMove():
+    engine, output = _engine()
+    engine.handle("position startpos moves e2e5")
+    assert _lines(output) == ["info string illegal move e2e5"]
+
+def test_infiniteWaitsForStop():
+    engine, output = _engine()
+    engine.handle("position startpos")
+    engine.handle("go infinite")
+    time.sleep(0.3)
+    assert not any(line.startswith("bestmove") for line in _lines(output))
+    engine.handle("stop")
+    assert engine._searchThread is None
+    assert notationToMove(_bestMove(output)) in ChessBoard().getLegalMoveCodes(ChessBoard().sideToMove)
+
+def test_ponderHit():
+    engine, output = _engine()
+    engine.handle("position startpos")
+    engine.handle("go ponder movetime 300")
+    time.sleep(0.3)
+    assert not any(line.startswith("bestmove") for line in _lines(output))
+    engine.handle("ponderhit")
+    _finish(engine)
+    assert notationToMove(_bestMove(output)) in ChessBoard().getLegalMoveCodes(ChessBoard().sideToMove)
+
+def test_nodeLimit():
+    engine, output = _engine()
+    engine.handle("position startpos")
+    engine.handle("go nodes 500")
+    _finish(engine)
+    last: list[str] = [line for line in _lines(output) if line.startswith("info depth")][-1].split()
+    assert last[last.index("nodes") + 1].isdigit()
+    assert _bestMove(output) != "0000"
+
+def test_scoreText():
+    agent: UCIAgent = UCIAgent(lambda line: None)
+    assert agent.scoreText(3) == "cp 300"
+    assert agent.scoreText(-40) == "cp -4000"
+    # tablebase scores, a win in 1 and 3 plies and getting mated in 2
+    assert agent.scoreText(999) == "mate 1"
+    assert agent.scoreText(997) == "mate 2"
+    assert agent.scoreText(-998) == "mate -1"
+
+@pytest.mark.slow
+def test_tablebaseMateReported(tmp_path):
+    generateTable("KQK", str(tmp_path))
+    engine, output = _engine()
+    engine.handle(f"setoption name TablebaseDir value {tmp_path}")
+    engine.handle("position fen k7/8/1K6/8/8/8/8/6Q1 w - - 0 1")
+    engine.handle("go depth 3")
+    _finish(engine)
+    assert any(" score mate 1 " in line for line in _lines(output) if line.startswith("info"))
+    assert _bestMove(output) == "g1g8"